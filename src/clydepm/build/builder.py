@@ -2,20 +2,41 @@
 Build system for Clydepm.
 """
 from pathlib import Path
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Set, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
 import subprocess
+import hashlib
+import json
 import logging
 import sys
 import os
-from dataclasses import dataclass
+import threading
+import fnmatch
+from dataclasses import dataclass, replace
 from enum import Enum, auto
 
-from ..core.package import Package, PackageType, CompilerInfo, BuildMetadata
+from ..core.package import Package, PackageType, CompilerInfo, BuildMetadata, load_package
 from ..github.registry import GitHubRegistry
+from ..core.version.solver import SolveFailure, Solver
 from ..core.version.version import Version
-from .cache import BuildCache
+from ..core.lockfile import LOCKFILE_NAME, LockedPackage, Lockfile, tree_digest
+from .cache import BuildCache, package_roots
 from .hooks import BuildHookManager, BuildStage, BuildContext
 from .collector import BuildDataCollector
+from .events import EventPublisher
+from .jobs import JobServer, resolve_jobs
+from .scheduler import PackageScheduler
+from .resolve import GraphProvider
+from .depfile import DependencyDatabase, parse_depfile
+from .compiler import CompilerProbeCache
+from .profile import (
+    TranslationUnitProfile,
+    compiler_family,
+    parse_time_report,
+    parse_time_trace,
+    profile_flags,
+    time_trace_path,
+)
 
 # Set up build log file handler
 logger = logging.getLogger("build")
@@ -34,26 +55,73 @@ class BuildResult:
     success: bool
     error: Optional[str] = None
     artifacts: Dict[str, Path] = None
+    up_to_date: bool = False  # Output was current; nothing was linked
 
 class Builder:
     """Builds packages."""
     
-    def __init__(self, cache_dir: Optional[Path] = None):
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        jobs: Optional[Union[int, str]] = None,
+        max_parallel_packages: Optional[int] = None,
+        profile: bool = False,
+        frozen: bool = False
+    ):
         """Initialize builder.
         
         Args:
             cache_dir: Directory to store cache. Defaults to ~/.clydepm/cache
+            jobs: Maximum number of compiler/linker processes running at once, or
+                "auto" for one per CPU. Defaults to 1. The budget is shared by
+                all packages being built.
+            max_parallel_packages: Maximum number of dependency packages built
+                concurrently. Defaults to the job count.
+            profile: Compile every source, skipping the object cache, with the
+                compiler reporting where its time goes. The collector saves the
+                reports with the build data.
+            frozen: Install remote dependencies only as locked in the built
+                package's clyde.lock, without looking up versions, and never
+                update the lockfile.
         """
         self.cache = BuildCache(cache_dir)
+        self.jobs = resolve_jobs(jobs)
+        self.job_server = JobServer(self.jobs)
+        self.max_parallel_packages = max_parallel_packages or self.jobs
+        self.profile = profile
+        self.frozen = frozen
+        self.lockfile: Optional[Lockfile] = None  # Of the top-level package being built
+        self._solution: Optional[Dict[str, Version]] = None  # Versions solved for the current build
+        self._solution_orgs: Dict[str, Optional[str]] = {}  # Organizations they were solved in
+        self._solution_lock = threading.Lock()
+        # Registry downloads of the current build by (organization, name, version),
+        # so versions read while solving aren't fetched again to install them
+        self._downloads: Dict[Tuple[Optional[str], str, str], Tuple[str, Package]] = {}
+        self._downloads_lock = threading.Lock()
         self.hook_manager = BuildHookManager()
         self.error_handler = None
         self._built_packages = set()  # Track packages that have been built
+        self._built_lock = threading.Lock()
+        self._dependency_dbs: Dict[Path, DependencyDatabase] = {}
+        self._dependency_dbs_lock = threading.Lock()
+        self.compiler_probe = CompilerProbeCache(
+            cache_dir / "compilers.json" if cache_dir else None
+        )
+        # Resolved dependency graphs, reused across builds when set to a dict.
+        # Whoever enables it must clear it when a package.yml changes.
+        self.graph_cache: Optional[Dict[Tuple[Path, Optional[str]], Tuple[Dict[str, Set[str]], Dict[str, Package]]]] = None
+        # Whether the last top-level build installed or replaced a dependency
+        self.installed_dependencies = False
         
         # Initialize and register build data collector
         build_data_dir = cache_dir / "build_data" if cache_dir else Path.home() / ".clydepm" / "build_data"
         self.collector = BuildDataCollector(build_data_dir)
         self.collector.register_hooks(self)
         
+        # Stream hook events to the build inspector, if it is running
+        self.events = EventPublisher()
+        self.events.register_hooks(self)
+        
     def add_hook(self, stage: BuildStage, hook: Callable[[BuildContext], None]) -> None:
         """Add a build hook."""
         self.hook_manager.add_hook(stage, hook)
@@ -63,38 +131,39 @@ class Builder:
         self.error_handler = handler
         
     def _get_compiler_info(self) -> CompilerInfo:
-        """Get information about the current compiler."""
-        try:
-            # Get compiler version - use g++ for C++
-            result = subprocess.run(
-                ["g++", "--version"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            version = result.stdout.split("\n")[0].split()[-1]
-            
-            # Get compiler target
-            result = subprocess.run(
-                ["g++", "-dumpmachine"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            target = result.stdout.strip()
+        """Get information about the current compiler (g++ is used for C++)."""
+        return self.compiler_probe.probe("g++")
             
-            return CompilerInfo(
-                name="g++",
-                version=version,
-                target=target
-            )
-        except subprocess.CalledProcessError as e:
-            logger.error("Failed to get compiler info: %s", e)
-            return CompilerInfo(
-                name="g++",
-                version="unknown",
-                target="unknown"
-            )
+    def _create_build_metadata(
+        self,
+        package: Package,
+        traits: Optional[Dict[str, str]] = None
+    ) -> BuildMetadata:
+        """Create build metadata for a package with the current compiler and traits."""
+        build_metadata = package.create_build_metadata(self._get_compiler_info())
+        if traits:
+            build_metadata.traits.update(traits)
+            logger.debug(f"Added traits to build metadata: {traits}")
+        return build_metadata
+        
+    def _build_dir(self, package: Package, parent_package: Optional[Package] = None) -> Path:
+        """Get the directory a package is built in.
+        
+        Dependencies build in their parent's build/deps directory.
+        """
+        if parent_package:
+            return parent_package.get_build_path(package._validated_config.name)
+        return package.get_build_dir()
+        
+    def _get_dependency_db(self, package: Package) -> DependencyDatabase:
+        """Get the header dependency database for a package, loading it once per builder."""
+        key = package.path.resolve()
+        with self._dependency_dbs_lock:
+            db = self._dependency_dbs.get(key)
+            if db is None:
+                db = DependencyDatabase(self.cache.get_dependency_db_path(package))
+                self._dependency_dbs[key] = db
+            return db
             
     def _compile_source(
         self,
@@ -103,7 +172,8 @@ class Builder:
         package: Package,
         build_metadata: BuildMetadata,
         verbose: bool = False,
-        traits: Optional[Dict[str, str]] = None
+        traits: Optional[Dict[str, str]] = None,
+        build_dir: Optional[Path] = None
     ) -> Optional[str]:
         """Compile a source file to an object file.
         
@@ -114,10 +184,13 @@ class Builder:
             build_metadata: Build metadata
             verbose: Whether to show verbose output
             traits: Optional build traits
+            build_dir: Directory the compiler runs in. Defaults to the current directory
         
         Returns:
             Error message if compilation failed, None if successful
         """
+        build_dir = build_dir or Path.cwd()
+        
         # Create context for hooks
         context = BuildContext(
             package=package,
@@ -125,60 +198,41 @@ class Builder:
             traits=traits or {},
             verbose=verbose,
             source_file=source_path,
-            object_file=object_path
+            object_file=object_path,
+            build_dir=build_dir
         )
         
         # Run pre-compile hooks
         self.hook_manager.run_hooks(BuildStage.PRE_COMPILE, context)
         
-        # Check if we have a cached object file
-        if self.cache.has_cached_object(source_path, build_metadata):
-            if self.cache.get_cached_object(source_path, build_metadata, object_path):
-                logger.debug("[CACHE] Using cached object for %s", source_path)
-                return None
-                
-        # Build command - use g++ for .cpp files
-        compiler = "g++" if source_path.suffix in [".cpp", ".cc", ".cxx"] else "gcc"
-        
-        # Get relative paths from build directory
-        rel_source = os.path.relpath(source_path)
-        
-        cmd = [compiler, "-c", "-o", str(object_path), rel_source]
-        cmd.extend(build_metadata.cflags)
+        # Headers the source included last time it was compiled, here or (for a
+        # fresh checkout) on a machine sharing the remote cache. Without them we
+        # can't tell whether a cached object is stale, so always compile.
+        dependency_db = self._get_dependency_db(package)
+        roots = package_roots(package, build_dir)
+        headers = dependency_db.get(source_path)
+        if headers is None and not self.profile:
+            headers = self.cache.get_remote_headers(source_path, build_metadata, roots)
+        if headers is not None and self._uses_pch(package, source_path):
+            # Objects from before the package had a pch didn't force-include it
+            stub = Path(os.path.normpath((build_dir / self._pch_stub(package)).absolute()))
+            if stub not in headers:
+                headers = None
         
-        # Add include paths, making them relative when possible
-        for include_path in build_metadata.includes:
-            try:
-                # Always add include paths - they should already be properly namespaced
-                rel_include = os.path.relpath(include_path)
-                cmd.extend(["-I", rel_include])
-            except ValueError:
-                # Path is on different drive/root, use absolute
-                cmd.extend(["-I", str(include_path)])
-        
-        # Add include paths for dependencies
-        for dep in package.get_all_dependencies():
-            # Add the dependency's include directory
-            include_dir = dep.path / "include"
-            if include_dir.exists():
-                try:
-                    rel_include = os.path.relpath(include_dir)
-                    logger.debug(f"Adding dependency include path: {rel_include}")
-                    cmd.extend(["-I", rel_include])
-                except ValueError:
-                    logger.debug(f"Adding absolute dependency include path: {include_dir}")
-                    cmd.extend(["-I", str(include_dir)])
-            
-            # Also add the dependency's src directory for header files
-            src_dir = dep.path / "src"
-            if src_dir.exists():
-                try:
-                    rel_include = os.path.relpath(src_dir)
-                    logger.debug(f"Adding dependency src path: {rel_include}")
-                    cmd.extend(["-I", rel_include])
-                except ValueError:
-                    logger.debug(f"Adding absolute dependency src path: {src_dir}")
-                    cmd.extend(["-I", str(src_dir)])
+        # Check if we have a cached object file. Profiling needs the compiler to run.
+        if headers is not None and not self.profile and self.cache.get_cached_object(
+            source_path, build_metadata, build_dir / object_path, headers, roots
+        ):
+            logger.debug("[CACHE] Using cached object for %s", source_path)
+            context.cache_hit = True
+            self.hook_manager.run_hooks(BuildStage.POST_COMPILE, context)
+            return None
+                
+        cmd = self._compile_command(source_path, object_path, package, build_metadata, build_dir)
+        if self.profile:
+            cmd.extend(profile_flags(compiler_family(cmd[0])))
+        rel_source = os.path.relpath(source_path, build_dir)
+        depfile = object_path.with_suffix(".d")
         
         # Update context with command
         context.command = cmd
@@ -190,21 +244,30 @@ class Builder:
             logger.info("Compiling %s -> %s", rel_source, object_path)
             logger.info("Command: %s", " ".join(cmd))
             
-        # Run compilation
+        # Run compilation once a job slot is free
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            # The old object may be hard linked to a cache entry; never write through it
+            (build_dir / object_path).unlink(missing_ok=True)
+            with self.job_server.slot():
+                result = subprocess.run(
+                    cmd,
+                    cwd=build_dir,
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
             
             # Log compiler output if any
             if result.stdout:
                 logger.debug("[COMPILER OUTPUT]\n%s", result.stdout)
             
-            # Cache the successful compilation
-            self.cache.cache_object(source_path, object_path, build_metadata)
+            # Record the headers this compile read, then cache under a key covering them
+            headers = self._read_depfile(build_dir / depfile, build_dir, source_path)
+            dependency_db.update(source_path, headers)
+            self.cache.cache_object(source_path, build_dir / object_path, build_metadata, headers, roots)
+            
+            if self.profile:
+                context.profile = self._read_profile(cmd[0], source_path, object_path, build_dir, result.stderr)
             
             # Run post-compile hooks
             self.hook_manager.run_hooks(BuildStage.POST_COMPILE, context)
@@ -215,6 +278,230 @@ class Builder:
             logger.error("[COMPILE ERROR] %s", error_msg)
             return error_msg
             
+    def _read_profile(
+        self,
+        compiler: str,
+        source_path: Path,
+        object_path: Path,
+        build_dir: Path,
+        stderr: str
+    ) -> Optional[TranslationUnitProfile]:
+        """Read the timing report of a profiled compile.
+        
+        Args:
+            compiler: Compiler that ran
+            source_path: Path to source file (absolute)
+            object_path: Path to the object file (relative to build dir)
+            build_dir: Directory the compiler ran in
+            stderr: Compiler's standard error, where GCC prints its report
+            
+        Returns:
+            The profile, with ``report`` pointing at the compiler's own report, or
+            None if there is no readable report
+        """
+        if compiler_family(compiler) == "clang":
+            report = build_dir / time_trace_path(object_path)
+            try:
+                with open(report) as f:
+                    profile = parse_time_trace(str(source_path), json.load(f), build_dir)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("Failed to read time trace of %s: %s", source_path, e)
+                return None
+        else:
+            report = build_dir / object_path.with_suffix(".time-report")
+            report.write_text(stderr)
+            profile = parse_time_report(str(source_path), stderr)
+        profile.report = str(report)
+        return profile
+        
+    def _compile_command(
+        self,
+        source_path: Path,
+        object_path: Path,
+        package: Package,
+        build_metadata: BuildMetadata,
+        build_dir: Path
+    ) -> List[str]:
+        """Build the compiler command for a source file.
+        
+        Args:
+            source_path: Path to source file (absolute)
+            object_path: Path to output object file (relative to build dir)
+            package: Package being built
+            build_metadata: Build metadata
+            build_dir: Directory the compiler runs in
+            
+        Returns:
+            Command line, with paths relative to build_dir where possible. It also
+            writes a depfile next to the object.
+        """
+        # Use g++ for .cpp files
+        compiler = "g++" if source_path.suffix in [".cpp", ".cc", ".cxx"] else "gcc"
+        
+        # Get relative paths from build directory
+        rel_source = os.path.relpath(source_path, build_dir)
+        
+        # Have the compiler list the headers it reads, for the next cache lookup
+        depfile = object_path.with_suffix(".d")
+        
+        cmd = [compiler, "-c", "-o", str(object_path), rel_source, "-MMD", "-MF", str(depfile)]
+        cmd.extend(build_metadata.cflags)
+        if self._uses_pch(package, source_path):
+            # GCC picks up pch/<header>.gch next to the stub if its flags match,
+            # and compiles the stub (which includes the real header) otherwise.
+            # -fpch-deps keeps the headers behind the pch in the depfile.
+            cmd.extend(["-include", str(self._pch_stub(package)), "-fpch-deps", "-Winvalid-pch"])
+        cmd.extend(self._include_flags(package, build_metadata, build_dir))
+        return cmd
+        
+    def _include_flags(self, package: Package, build_metadata: BuildMetadata, build_dir: Path) -> List[str]:
+        """Get the -I flags for compiling a package's sources in build_dir."""
+        includes: List[str] = []
+        
+        def add(path: Path) -> None:
+            # Make paths relative when possible
+            try:
+                include = os.path.relpath(path, build_dir)
+            except ValueError:
+                # Path is on different drive/root, use absolute
+                include = str(path)
+            if include not in includes:
+                includes.append(include)
+        
+        # Add include paths - they should already be properly namespaced
+        for include_path in build_metadata.includes:
+            add(include_path)
+        
+        # Add include paths for dependencies
+        for dep in package.get_all_dependencies():
+            # Add the dependency's include directory
+            include_dir = dep.path / "include"
+            if include_dir.exists():
+                add(include_dir)
+            
+            # Also add the dependency's src directory for header files
+            src_dir = dep.path / "src"
+            if src_dir.exists():
+                add(src_dir)
+        
+        cmd: List[str] = []
+        for include in includes:
+            cmd.extend(["-I", include])
+        return cmd
+        
+    def _uses_pch(self, package: Package, source_path: Path) -> bool:
+        """Check whether a source is compiled with the package's precompiled header.
+        
+        The header is precompiled in the package language, so sources in the
+        other language (e.g. .c files in a C++ package) can't use it.
+        """
+        if package.get_pch() is None:
+            return False
+        language = "c++" if source_path.suffix in [".cpp", ".cc", ".cxx"] else "c"
+        return language == package.language
+        
+    def _pch_stub(self, package: Package) -> Path:
+        """Get the stub header sources force-include, relative to the build dir."""
+        return Path("pch") / package.get_pch().name
+        
+    def _write_pch_stub(self, package: Package, build_dir: Path) -> Path:
+        """Write the stub header that includes the package's precompiled header.
+        
+        Returns:
+            The stub, relative to build_dir. Its .gch goes next to it.
+        """
+        stub = self._pch_stub(package)
+        content = (
+            "/* Generated by clyde for precompiled header support; do not edit. */\n"
+            f'#include "{self._include_path(package.get_pch(), (build_dir / stub).parent)}"\n'
+        )
+        path = build_dir / stub
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Leave an unchanged stub alone so it keeps its file state
+        if not path.exists() or path.read_text() != content:
+            path.write_text(content)
+        return stub
+        
+    def _pch_command(self, package: Package, build_metadata: BuildMetadata, build_dir: Path) -> List[str]:
+        """Build the command precompiling a package's header (see _build_pch())."""
+        stub = self._pch_stub(package)
+        compiler = "g++" if package.language == "c++" else "gcc"
+        cmd = [
+            compiler, "-x", f"{package.language}-header",
+            "-o", f"{stub}.gch", str(stub),
+            "-MMD", "-MF", f"{stub}.d",
+        ]
+        cmd.extend(build_metadata.cflags)
+        cmd.extend(self._include_flags(package, build_metadata, build_dir))
+        return cmd
+        
+    def _build_pch(self, context: BuildContext) -> Optional[str]:
+        """Precompile the package's pch header, or restore it from the cache.
+        
+        Cached like an object whose source is the header: the key covers the
+        header, everything it includes and the flags, plus the header language
+        so it never collides with an object of the same file.
+        
+        Returns:
+            Error message if precompiling failed, None if successful or the
+            package has no pch
+        """
+        package = context.package
+        header = package.get_pch()
+        if header is None:
+            return None
+        if not header.exists():
+            return f"Precompiled header {header} not found"
+            
+        build_dir = context.build_dir
+        stub = self._write_pch_stub(package, build_dir)
+        gch = Path(f"{stub}.gch")
+        pch_metadata = replace(
+            context.build_metadata,
+            cflags=[*context.build_metadata.cflags, "-x", f"{package.language}-header"]
+        )
+        
+        dependency_db = self._get_dependency_db(package)
+        roots = package_roots(package, build_dir)
+        headers = dependency_db.get(header)
+        if headers is None:
+            headers = self.cache.get_remote_headers(header, pch_metadata, roots)
+        if headers is not None and self.cache.get_cached_object(
+            header, pch_metadata, build_dir / gch, headers, roots
+        ):
+            logger.debug("[CACHE] Using cached precompiled header for %s", header)
+            return None
+            
+        cmd = self._pch_command(package, context.build_metadata, build_dir)
+        logger.debug("[PCH] %s", " ".join(cmd))
+        if context.verbose:
+            logger.info("Precompiling %s", os.path.relpath(header, build_dir))
+            logger.info("Command: %s", " ".join(cmd))
+        try:
+            (build_dir / gch).unlink(missing_ok=True)
+            with self.job_server.slot():
+                subprocess.run(cmd, cwd=build_dir, capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError as e:
+            error_msg = f"Precompiling {header} failed:\n{e.stderr}"
+            logger.error("[PCH ERROR] %s", error_msg)
+            return error_msg
+            
+        headers = self._read_depfile(build_dir / f"{stub}.d", build_dir, header)
+        dependency_db.update(header, headers)
+        self.cache.cache_object(header, build_dir / gch, pch_metadata, headers, roots)
+        return None
+        
+    def _read_depfile(self, depfile: Path, build_dir: Path, source_path: Path) -> List[Path]:
+        """Read the headers listed in a depfile, excluding the source itself."""
+        if not depfile.exists():
+            logger.warning("Compiler did not write depfile %s", depfile)
+            return []
+        source = Path(os.path.normpath(source_path.absolute()))
+        return [
+            path for path in parse_depfile(depfile, build_dir.absolute())
+            if path != source
+        ]
+        
     def _link_objects(
         self,
         objects: List[Path],
@@ -222,7 +509,8 @@ class Builder:
         package: Package,
         build_metadata: BuildMetadata,
         verbose: bool = False,
-        traits: Optional[Dict[str, str]] = None
+        traits: Optional[Dict[str, str]] = None,
+        build_dir: Optional[Path] = None
     ) -> Optional[str]:
         """Link object files into final artifact.
         
@@ -233,30 +521,37 @@ class Builder:
             build_metadata: Build metadata
             verbose: Whether to show verbose output
             traits: Optional build traits
+            build_dir: Directory the linker runs in. Defaults to the current directory
         
         Returns:
             Error message if linking failed, None if successful
         """
+        build_dir = build_dir or Path.cwd()
+        
         # Create context for hooks
         context = BuildContext(
             package=package,
             build_metadata=build_metadata,
             traits=traits or {},
             verbose=verbose,
-            output_file=output_path
+            output_file=output_path,
+            build_dir=build_dir
         )
         
         # Run pre-link hooks
         self.hook_manager.run_hooks(BuildStage.PRE_LINK, context)
         
+        cmd = self._link_command(objects, output_path, package, build_metadata, build_dir)
+        
+        # Update context with command
+        context.command = cmd
+        
+        # Start from a fresh output: it may be hard linked to a cache entry, and
+        # ar would otherwise keep members of the previous archive (e.g. objects
+        # of deleted sources)
+        (build_dir / output_path).unlink(missing_ok=True)
+        
         if package.package_type == PackageType.LIBRARY:
-            # Create static library with ar
-            cmd = ["ar", "rcs", str(output_path)]
-            cmd.extend(str(obj) for obj in objects)
-            
-            # Update context with command
-            context.command = cmd
-            
             # Log the library creation command
             logger.debug("[ARCHIVE] %s", " ".join(cmd))
             
@@ -266,12 +561,14 @@ class Builder:
                 
             # Run ar
             try:
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
+                with self.job_server.slot():
+                    result = subprocess.run(
+                        cmd,
+                        cwd=build_dir,
+                        capture_output=True,
+                        text=True,
+                        check=True
+                    )
                 
                 # Log archiver output if any
                 if result.stdout:
@@ -286,39 +583,6 @@ class Builder:
                 logger.error("[ARCHIVE ERROR] %s", error_msg)
                 return error_msg
         else:
-            # Build command - use g++ for linking C++ code
-            cmd = ["g++", "-o", str(output_path)]
-            cmd.extend(str(obj) for obj in objects)
-            
-            # Add library paths from build metadata, making them relative when possible
-            for lib_path in build_metadata.libs:
-                if isinstance(lib_path, Path) and lib_path.exists():
-                    try:
-                        rel_lib = os.path.relpath(lib_path)
-                        cmd.extend(["-L", rel_lib])
-                    except ValueError:
-                        # Path is on different drive/root, use absolute
-                        cmd.extend(["-L", str(lib_path)])
-            
-            # Add library paths for dependencies
-            for dep in package.get_all_dependencies():
-                if dep.package_type == PackageType.LIBRARY:
-                    # Use parent package's build path for the dependency
-                    build_dir = package.get_build_path(dep.name)
-                    if build_dir.exists():
-                        try:
-                            rel_lib = os.path.relpath(build_dir)
-                            cmd.extend(["-L", rel_lib])
-                        except ValueError:
-                            cmd.extend(["-L", str(build_dir)])
-                        cmd.append(f"-l{dep.package_name}")
-
-            # Add ldflags from build metadata
-            cmd.extend(build_metadata.ldflags)
-            
-            # Update context with command
-            context.command = cmd
-            
             # Log the linking command
             logger.debug("[LINK] %s", " ".join(cmd))
             
@@ -328,12 +592,14 @@ class Builder:
                 
             # Run linker
             try:
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
+                with self.job_server.slot():
+                    result = subprocess.run(
+                        cmd,
+                        cwd=build_dir,
+                        capture_output=True,
+                        text=True,
+                        check=True
+                    )
                 
                 # Log linker output if any
                 if result.stdout:
@@ -348,6 +614,117 @@ class Builder:
                 logger.error("[LINK ERROR] %s", error_msg)
                 return error_msg
 
+    def _link_command(
+        self,
+        objects: List[Path],
+        output_path: Path,
+        package: Package,
+        build_metadata: BuildMetadata,
+        build_dir: Path
+    ) -> List[str]:
+        """Build the archiver or linker command for a package.
+        
+        Args:
+            objects: List of object files (relative to build dir)
+            output_path: Output path (relative to build dir)
+            package: Package being built
+            build_metadata: Build metadata
+            build_dir: Directory the command runs in
+            
+        Returns:
+            Command line, with paths relative to build_dir where possible
+        """
+        if package.package_type == PackageType.LIBRARY:
+            # Create static library with ar
+            cmd = ["ar", "rcs", str(output_path)]
+            cmd.extend(str(obj) for obj in objects)
+            return cmd
+            
+        # Build command - use g++ for linking C++ code
+        cmd = ["g++", "-o", str(output_path)]
+        cmd.extend(str(obj) for obj in objects)
+        
+        # Add library paths from build metadata, making them relative when possible
+        for lib_path in build_metadata.libs:
+            if isinstance(lib_path, Path) and lib_path.exists():
+                try:
+                    rel_lib = os.path.relpath(lib_path, build_dir)
+                    cmd.extend(["-L", rel_lib])
+                except ValueError:
+                    # Path is on different drive/root, use absolute
+                    cmd.extend(["-L", str(lib_path)])
+        
+        # Add library paths for dependencies
+        for dep in package.get_all_dependencies():
+            if dep.package_type == PackageType.LIBRARY:
+                # Use parent package's build path for the dependency
+                dep_build_dir = package.get_build_path(dep.name)
+                if dep_build_dir.exists():
+                    try:
+                        rel_lib = os.path.relpath(dep_build_dir, build_dir)
+                        cmd.extend(["-L", rel_lib])
+                    except ValueError:
+                        cmd.extend(["-L", str(dep_build_dir)])
+                    cmd.append(f"-l{dep.package_name}")
+
+        # Add ldflags from build metadata
+        cmd.extend(build_metadata.ldflags)
+        return cmd
+        
+    def _link_signature(
+        self,
+        objects: List[Path],
+        output_path: Path,
+        package: Package,
+        build_metadata: BuildMetadata,
+        build_dir: Path
+    ) -> str:
+        """Hash everything that goes into a link: the command and the content of
+        every object and dependency archive it reads."""
+        cmd = self._link_command(objects, output_path, package, build_metadata, build_dir)
+        inputs = {
+            "command": cmd,
+            "objects": [self.cache.file_states.digest(build_dir / obj) for obj in objects],
+            "archives": {}
+        }
+        if package.package_type != PackageType.LIBRARY:
+            for dep in package.get_all_dependencies():
+                if dep.package_type == PackageType.LIBRARY:
+                    archive = package.get_build_path(dep.name) / f"lib{dep.package_name}.a"
+                    if archive.exists():
+                        inputs["archives"][str(archive)] = self.cache.file_states.digest(archive)
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+        
+    def _signature_path(self, output_path: Path, build_dir: Path) -> Path:
+        """Get the link signature file kept beside an output."""
+        return build_dir / f"{output_path.name}.linksig"
+        
+    def _is_link_up_to_date(self, output_path: Path, build_dir: Path, signature: str) -> bool:
+        """Check whether an output was linked from exactly these inputs and is untouched."""
+        output = build_dir / output_path
+        signature_path = self._signature_path(output_path, build_dir)
+        if not output.exists() or not signature_path.exists():
+            return False
+        try:
+            with open(signature_path) as f:
+                recorded = json.load(f)
+            return (
+                recorded.get("inputs") == signature
+                and recorded.get("output") == self.cache.file_states.digest(output)
+            )
+        except (OSError, ValueError) as e:
+            logger.debug("Ignoring unreadable link signature %s: %s", signature_path, e)
+            return False
+            
+    def _write_link_signature(self, output_path: Path, build_dir: Path, signature: str) -> None:
+        """Record the inputs an output was just linked from."""
+        signature_path = self._signature_path(output_path, build_dir)
+        with open(signature_path, "w") as f:
+            json.dump({
+                "inputs": signature,
+                "output": self.cache.file_states.digest(build_dir / output_path)
+            }, f)
+
     def _ensure_dependencies(
         self,
         package: Package,
@@ -355,6 +732,12 @@ class Builder:
     ) -> Optional[str]:
         """Ensure all dependencies are installed.
         
+        Versions are solved once per build for the whole graph (see
+        _resolve_versions()). Dependencies locked at the solved version are
+        installed straight from their locked source and checked against their
+        locked digest; others are looked up in the registry and locked. With
+        frozen set, every dependency must already be locked.
+        
         Returns:
             Error message if failed, None if successful
         """
@@ -362,6 +745,10 @@ class Builder:
             deps = package.get_dependencies()
             if not deps:
                 return None
+
+            # Local dependencies are built in place, nothing to install
+            if all(spec.startswith("local:") for spec in deps.values()):
+                return None
                 
             logger.info("Checking dependencies...")
             
@@ -369,154 +756,241 @@ class Builder:
             deps_dir = package.path / "deps"
             deps_dir.mkdir(exist_ok=True)
             
-            # Get GitHub token and organization
-            from ..github.config import get_github_token, load_config
-            token = get_github_token()
-            if not token:
-                return "No GitHub token configured. Run 'clyde auth' to set up GitHub authentication"
-                
             # Create registries dict to cache registries by username/org
-            registries = {}
+            registries: Dict[str, GitHubRegistry] = {}
+            installed = False
+            
+            # One version of every package, agreed on by the whole graph
+            solution = self._resolve_versions(package, registries)
             
             # Check each dependency
             for name, version_spec in deps.items():
-                if not version_spec.startswith("local:"):
-                    # For @org/pkg format, extract org and package name
-                    if name.startswith('@'):
-                        org = name.split('/')[0][1:]  # Remove @ from org
-                        pkg_name = name.split('/')[1]
-                    else:
-                        # Use package's organization as fallback
-                        org = package.organization
-                        if not org:
-                            config = load_config()
-                            org = config.get("organization")
-                        pkg_name = name
-                        
-                    # Get or create registry for this org
-                    if org not in registries:
-                        registries[org] = GitHubRegistry(token, org)
-                    registry = registries[org]
+                if version_spec.startswith("local:"):
+                    continue
                     
-                    dep_path = package.get_dependency_path(name)
-                    if not dep_path.exists():
-                        logger.info(f"Installing {name} {version_spec}")
-                        
-                        # Get all available versions
-                        available_versions = registry.get_versions(pkg_name)
-                        if not available_versions:
-                            return f"No versions found for package {name}"
-                            
-                        # Find best matching version
-                        if version_spec.startswith('^'):
-                            # For ^x.y.z, find highest compatible version
-                            base_version = Version.parse(version_spec[1:])
-                            compatible_versions = [v for v in available_versions if v.is_compatible_with(base_version)]
-                            if not compatible_versions:
-                                return f"No compatible versions found for {name}@{version_spec}"
-                            target_version = str(max(compatible_versions))
-                        else:
-                            # For exact version, find exact match
-                            target_version = version_spec
-                            
-                        # Get package with resolved version
-                        dep_pkg = registry.get_package(pkg_name, target_version)
-                        
-                        # Create parent directories if needed
-                        dep_path.parent.mkdir(parents=True, exist_ok=True)
-                        # Copy package files
-                        import shutil
-                        shutil.copytree(dep_pkg.path, dep_path)
-                    else:
-                        # Verify installed version matches
-                        dep_pkg = Package(dep_path)
-                        if not dep_pkg.is_compatible_with(version_spec):
-                            logger.info(f"Updating {name} to match {version_spec}")
-                            
-                            # Get all available versions
-                            available_versions = registry.get_versions(pkg_name)
-                            if not available_versions:
-                                return f"No versions found for package {name}"
-                                
-                            # Find best matching version
-                            if version_spec.startswith('^'):
-                                # For ^x.y.z, find highest compatible version
-                                base_version = Version.parse(version_spec[1:])
-                                compatible_versions = [v for v in available_versions if v.is_compatible_with(base_version)]
-                                if not compatible_versions:
-                                    return f"No compatible versions found for {name}@{version_spec}"
-                                target_version = str(max(compatible_versions))
-                            else:
-                                # For exact version, find exact match
-                                target_version = version_spec
-                                
-                            # Get package with resolved version
-                            new_pkg = registry.get_package(pkg_name, target_version)
-                            
-                            # Remove old package
-                            import shutil
-                            shutil.rmtree(dep_path)
-                            # Copy new package files
-                            shutil.copytree(new_pkg.path, dep_path)
+                # Install the package the solve picked, from where it looked
+                org, pkg_name = self._split_dependency_name(
+                    self._solution_orgs.get(name, package.organization), name
+                )
+                dep_path = package.get_dependency_path(name)
+                if name not in solution:
+                    return f"No version of {name} was resolved for {package.name}"
+                target_version = str(solution[name])
+                locked = self.lockfile.get(name) if self.lockfile else None
+                if locked and locked.version != target_version:
+                    # Resolved to something else since it was locked
+                    locked = None
+                if self.frozen and not locked:
+                    return (
+                        f"{name}@{version_spec} is not locked in {LOCKFILE_NAME}. "
+                        "Build without --frozen to update the lockfile"
+                    )
+                    
+                if dep_path.exists():
+                    current = load_package(dep_path).version
+                    if locked and current == target_version:
+                        if self.frozen and tree_digest(dep_path) != locked.digest:
+                            return f"Installed {name}@{current} does not match the digest in {LOCKFILE_NAME}"
+                        continue
+                    if current == target_version:
+                        # Installed before the lockfile existed; lock what is there
+                        if self.lockfile:
+                            registry = self._get_registry(registries, org)
+                            _, tarball_url = registry.find_tarball(pkg_name, current)
+                            self.lockfile.lock(name, LockedPackage(
+                                version=current,
+                                source=tarball_url,
+                                digest=tree_digest(dep_path),
+                                requires=load_package(dep_path).get_dependencies()
+                            ))
+                        continue
+                    logger.info(f"Updating {name} to match {version_spec}")
+                else:
+                    logger.info(f"Installing {name} {version_spec}")
+                    
+                # A locked dependency is fetched from exactly its locked source
+                tarball_url, dep_pkg = self._download(
+                    registries, org, pkg_name, target_version, locked.source if locked else None
+                )
+                digest = tree_digest(dep_pkg.path)
+                if locked and digest != locked.digest:
+                    return (
+                        f"Downloaded {name}@{target_version} does not match the digest in "
+                        f"{LOCKFILE_NAME} (expected {locked.digest}, got {digest})"
+                    )
+                    
+                # Replace any other installed version with the package files
+                import shutil
+                if dep_path.exists():
+                    shutil.rmtree(dep_path)
+                dep_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copytree(dep_pkg.path, dep_path)
+                installed = True
+                
+                if self.lockfile:
+                    self.lockfile.lock(name, LockedPackage(
+                        version=target_version,
+                        source=tarball_url,
+                        digest=digest,
+                        requires=dep_pkg.get_dependencies()
+                    ))
                             
+            if installed:
+                # The dependency graph changed under the package, including any
+                # graph resolved from the old deps/ tree earlier in this build
+                package.dependency_closure(refresh=True)
+                if self.graph_cache is not None:
+                    self.graph_cache.clear()
+                self.installed_dependencies = True
             return None
         except Exception as e:
             error_msg = f"Failed to install dependencies: {str(e)}"
             logger.error(error_msg)
             return error_msg
             
+    def _split_dependency_name(self, organization: Optional[str], name: str) -> Tuple[Optional[str], str]:
+        """Get the registry organization and package name of a dependency.
+        
+        Args:
+            organization: Organization of the package declaring the dependency
+            name: Dependency name, optionally @org/pkg
+        """
+        # For @org/pkg format, extract org and package name
+        if name.startswith('@'):
+            org = name.split('/')[0][1:]  # Remove @ from org
+            return org, name.split('/')[1]
+        # Use the declaring package's organization as fallback
+        org = organization
+        if not org:
+            from ..github.config import load_config
+            org = load_config().get("organization")
+        return org, name
+        
+    def _get_registry(self, registries: Dict[str, GitHubRegistry], org: Optional[str]) -> GitHubRegistry:
+        """Get the registry for an organization, creating it on first use.
+        
+        Raises:
+            ValueError: If no GitHub token is configured
+        """
+        if org not in registries:
+            from ..github.config import get_github_token
+            token = get_github_token()
+            if not token:
+                raise ValueError("No GitHub token configured. Run 'clyde auth' to set up GitHub authentication")
+            registries[org] = GitHubRegistry(token, org)
+        return registries[org]
+        
+    def _download(
+        self,
+        registries: Dict[str, GitHubRegistry],
+        org: Optional[str],
+        name: str,
+        version: str,
+        tarball_url: Optional[str] = None
+    ) -> Tuple[str, Package]:
+        """Download a package version from the registry, once per build.
+        
+        Args:
+            registries: Registries by organization (see _get_registry())
+            org: Organization the package is in
+            name: Package name in the registry
+            version: Exact version
+            tarball_url: Tarball to fetch, e.g. from the lockfile. Looked up if not given.
+            
+        Returns:
+            Tuple of (tarball URL, package)
+        """
+        key = (org, name, version)
+        with self._downloads_lock:
+            downloaded = self._downloads.get(key)
+        if downloaded is None or (tarball_url is not None and downloaded[0] != tarball_url):
+            registry = self._get_registry(registries, org)
+            if tarball_url is None:
+                _, tarball_url = registry.find_tarball(name, version)
+            downloaded = (tarball_url, registry.download(name, version, tarball_url))
+            with self._downloads_lock:
+                self._downloads[key] = downloaded
+        return downloaded
+        
+    def _resolve_versions(self, root: Package, registries: Dict[str, GitHubRegistry]) -> Dict[str, Version]:
+        """Get the version of every package in the build's dependency graph.
+        
+        Solved on first use in a build, with the package whose dependencies
+        are installed first (the top-level package) as root. If the versions
+        in the lockfile still satisfy every requirement they are used as-is,
+        without asking the registry anything.
+        
+        Raises:
+            SolveFailure: If the requirements conflict
+            ValueError: If building frozen and the lockfile doesn't satisfy them
+        """
+        with self._solution_lock:
+            if self._solution is not None:
+                return self._solution
+            try:
+                provider = GraphProvider(root, self.lockfile)
+                self._solution = Solver(provider).solve(root.name)
+                self._solution_orgs = provider.organizations
+                return self._solution
+            except SolveFailure as e:
+                if self.frozen:
+                    raise ValueError(
+                        f"Dependencies are not locked in {LOCKFILE_NAME} "
+                        f"(build without --frozen to update it):\n{e}"
+                    )
+                logger.debug(f"Lockfile is out of date, resolving versions:\n{e}")
+                
+            def get_versions(name: str, organization: Optional[str]) -> List[Version]:
+                org, pkg_name = self._split_dependency_name(organization, name)
+                return self._get_registry(registries, org).get_versions(pkg_name)
+                
+            def get_package(name: str, organization: Optional[str], version: str) -> Package:
+                org, pkg_name = self._split_dependency_name(organization, name)
+                return self._download(registries, org, pkg_name, version)[1]
+                
+            preferred = {}
+            if self.lockfile:
+                preferred = {name: Version.parse(locked.version) for name, locked in self.lockfile.packages.items()}
+            provider = GraphProvider(root, self.lockfile, get_versions, get_package)
+            self._solution = Solver(provider, preferred).solve(root.name)
+            self._solution_orgs = provider.organizations
+            return self._solution
+            
     def _build_dependencies(
         self,
         package: Package,
         context: BuildContext,
         parent_package: Optional[Package] = None
     ) -> Optional[str]:
-        """Build all dependencies in the correct order.
+        """Build all dependencies, each as soon as its own dependencies are built.
+        
+        Independent dependencies build concurrently, up to max_parallel_packages
+        at a time, sharing the builder's global job budget.
         
         Returns:
             Error message if failed, None if successful
         """
         try:
-            # Create dependency resolver
-            from ..core.dependency.resolver import DependencyResolver
-            resolver = DependencyResolver(verbose=context.verbose)
-            
             try:
-                # Add package and its dependencies to the graph
-                resolver.add_package(package)
+                with self.collector.span("resolve", "resolve", package=package.name):
+                    graph, packages = self._dependency_graph(package, context.verbose, parent_package)
             except ValueError as e:
-                # This is likely a dependency not found error
-                return str(e)  # Return the detailed error from resolver
-                
-            try:
-                # Get build order (this will also check for cycles)
-                build_order = resolver.get_build_order()
-            except ValueError as e:
-                return str(e)  # This will include cycle detection errors
-                
-            # Build each dependency in order
-            for dep in build_order:
-                # Skip the root package if it's not a dependency of another package
-                # Also skip if the dependency is the same as the parent package to prevent infinite recursion
-                if (dep.name == package.name and not parent_package) or (parent_package and dep.name == parent_package.name):
-                    continue
-                    
+                # Dependency not found or cycle; the resolver's message is detailed enough
+                return str(e)
+            
+            def build_dependency(name: str) -> Optional[str]:
+                dep = packages[name]
                 logger.info(f"Building dependency: {dep.name}")
                 
-                # Create build context for dependency
-                dep_context = BuildContext(
-                    package=dep,
-                    build_metadata=dep.create_build_metadata(context.build_metadata.compiler),
-                    traits=context.traits,
-                    verbose=context.verbose
-                )
-                
                 # Build the dependency, passing the parent package
                 result = self.build(dep, traits=context.traits, verbose=context.verbose, parent_package=package)
-                if not result.success:
-                    # Get the build directory for better error messages
-                    build_dir = package.get_build_path(dep.name)
-                    return result.error  # Just return the error, don't wrap it again
+                return None if result.success else result.error  # Don't wrap the error again
+                
+            # Build each dependency as soon as everything it depends on is built
+            scheduler = PackageScheduler(self.max_parallel_packages)
+            error = scheduler.run(graph, build_dependency)
+            if error:
+                return error
                     
             return None
         except Exception as e:
@@ -524,6 +998,209 @@ class Builder:
             logger.error(error_msg)
             return error_msg
 
+    def _dependency_graph(
+        self,
+        package: Package,
+        verbose: bool = False,
+        parent_package: Optional[Package] = None
+    ) -> Tuple[Dict[str, Set[str]], Dict[str, Package]]:
+        """Resolve the transitive dependencies of a package.
+        
+        Args:
+            package: Package whose dependencies to resolve
+            verbose: Whether the resolver should log details
+            parent_package: Package depending on ``package``, excluded from the graph
+            
+        Returns:
+            Tuple of (graph mapping each dependency to the ones it depends on,
+            dependency packages by graph name)
+            
+        Raises:
+            ValueError: If a dependency can't be found or the graph has a cycle
+        """
+        cache_key = (package.path.resolve(), parent_package.name if parent_package else None)
+        if self.graph_cache is not None and cache_key in self.graph_cache:
+            graph, packages = self.graph_cache[cache_key]
+            return {name: set(deps) for name, deps in graph.items()}, dict(packages)
+            
+        from ..core.dependency.resolver import DependencyResolver
+        resolver = DependencyResolver(verbose=verbose)
+        
+        # Add package and its dependencies to the graph
+        resolver.add_package(package)
+        
+        # Get the dependency graph (this will also check for cycles)
+        graph = resolver.get_build_graph()
+        
+        # Skip the package itself, and the parent package to prevent infinite recursion
+        skip = {package.name}
+        if parent_package:
+            skip.add(parent_package.name)
+        graph = {
+            name: deps for name, deps in graph.items()
+            if resolver.nodes[name].package.name not in skip
+        }
+        packages = {name: resolver.nodes[name].package for name in graph}
+        if self.graph_cache is not None:
+            self.graph_cache[cache_key] = (graph, packages)
+            graph = {name: set(deps) for name, deps in graph.items()}
+        return graph, packages
+        
+    def _source_objects(
+        self,
+        package: Package,
+        build_dir: Optional[Path] = None
+    ) -> Tuple[List[Path], List[Path]]:
+        """Get a package's source files in a stable order, and the object file for each.
+        
+        Args:
+            package: Package to get sources for
+            build_dir: Package build directory. For unity builds, the generated
+                translation units are written there and returned in place of
+                the sources they include.
+        
+        Returns:
+            Tuple of (absolute sources, objects relative to the build dir)
+        """
+        sources = sorted(package.get_source_files())
+        unity = package.get_unity_config()
+        if unity is None or build_dir is None:
+            objects = [Path(f"{source.stem}.o") for source in sources]
+            return sources, objects
+            
+        batches, single = self._unity_batches(package, sources)
+        unity_sources = self._write_unity_sources(build_dir, batches)
+        objects = [source.relative_to(build_dir.absolute()).with_suffix(".o") for source in unity_sources]
+        objects.extend(Path(f"{source.stem}.o") for source in single)
+        return unity_sources + single, objects
+        
+    def _unity_batches(self, package: Package, sources: List[Path]) -> Tuple[List[List[Path]], List[Path]]:
+        """Group sources into unity batches.
+        
+        Sources are batched per language, in sorted order, up to the configured
+        batch size. Sources matching an exclude glob (relative to the package
+        root) are compiled on their own.
+        
+        Returns:
+            Tuple of (batches of sources, sources compiled on their own)
+        """
+        unity = package.get_unity_config()
+        by_language: Dict[str, List[Path]] = {}
+        single = []
+        for source in sources:
+            relative = Path(os.path.relpath(source, package.path)).as_posix()
+            if any(fnmatch.fnmatch(relative, pattern) for pattern in unity.exclude):
+                single.append(source)
+            else:
+                by_language.setdefault(source.suffix, []).append(source)
+                
+        batches = []
+        for suffix in sorted(by_language):
+            members = by_language[suffix]
+            for start in range(0, len(members), unity.batch_size):
+                batches.append(members[start:start + unity.batch_size])
+        return batches, single
+        
+    def _include_path(self, path: Path, from_dir: Path) -> str:
+        """Get how a generated file in from_dir includes path.
+        
+        Relative, so generated files (and the cache keys covering them) are the
+        same in every checkout.
+        """
+        return Path(os.path.relpath(path.absolute(), from_dir.absolute())).as_posix()
+        
+    def _write_unity_sources(self, build_dir: Path, batches: List[List[Path]]) -> List[Path]:
+        """Write one translation unit including each batch's sources.
+        
+        Unchanged units are left alone so they keep their file state, and units
+        of batches that no longer exist are removed.
+        
+        Returns:
+            Absolute paths of the units, build_dir/unity/<n>.<ext>
+        """
+        unity_dir = build_dir.absolute() / "unity"
+        unity_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        for index, members in enumerate(batches):
+            path = unity_dir / f"{index}{members[0].suffix}"
+            content = "/* Generated by clyde for a unity build; do not edit. */\n" + "".join(
+                f'#include "{self._include_path(Path(member), unity_dir)}"\n' for member in members
+            )
+            if not path.exists() or path.read_text() != content:
+                path.write_text(content)
+            written.append(path)
+        for stale in unity_dir.iterdir():
+            if stale not in written and stale.suffix in (".c", ".cpp", ".cc", ".cxx"):
+                stale.unlink()
+        return written
+        
+    def _output_name(self, package: Package) -> Path:
+        """Get a package's output file, relative to its build dir."""
+        if package.package_type == PackageType.LIBRARY:
+            return Path(f"lib{package.package_name}.a")
+        return Path(package.name)
+        
+    def _compile_sources(
+        self,
+        sources: List[Path],
+        objects: List[Path],
+        context: BuildContext
+    ) -> Optional[Tuple[Path, str]]:
+        """Compile source files, dispatching up to ``self.jobs`` compilers at once.
+        
+        Hooks still run once per file, from the worker that compiles it.
+        Results are inspected in source order, so the reported failure is always
+        the first failing file in that order regardless of completion order.
+        
+        Args:
+            sources: Source files to compile (absolute)
+            objects: Object file for each source (relative to build dir)
+            context: Build context for the package
+            
+        Returns:
+            Tuple of (source, error message) for the first failure, None if all succeeded
+        """
+        def compile_one(source: Path, object_path: Path) -> Optional[str]:
+            logger.debug(f"Compiling source file: {source}")
+            with self.collector.span(source.name, "compile", package=context.package.name, source=source):
+                return self._compile_source(
+                    source,
+                    object_path,
+                    context.package,
+                    context.build_metadata,
+                    context.verbose,
+                    context.traits,
+                    context.build_dir
+                )
+            
+        if self.jobs == 1 or len(sources) <= 1:
+            for source, object_path in zip(sources, objects):
+                error = compile_one(source, object_path)
+                if error:
+                    return source, error
+            return None
+            
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.jobs, len(sources)),
+            thread_name_prefix="clyde-compile"
+        )
+        try:
+            futures = [
+                executor.submit(compile_one, source, object_path)
+                for source, object_path in zip(sources, objects)
+            ]
+            for source, future in zip(sources, futures):
+                try:
+                    error = future.result()
+                except Exception as e:
+                    error = str(e)
+                if error:
+                    return source, error
+            return None
+        finally:
+            # Drop queued compiles after a failure, but let running ones finish
+            executor.shutdown(wait=True, cancel_futures=True)
+
     def _build_package(self, context: BuildContext, parent_package: Optional[Package] = None) -> BuildResult:
         """Build a package after dependencies are built.
         
@@ -535,8 +1212,8 @@ class Builder:
             BuildResult indicating success/failure and artifacts
         """
         try:
-            # Get source files and make paths relative to build dir
-            sources = context.package.get_source_files()
+            # Get source files in a stable order so errors are reported deterministically
+            sources, objects = self._source_objects(context.package, context.build_dir)
             logger.debug(f"Found source files for {context.package.name}: {sources}")
             
             if not sources:
@@ -544,44 +1221,71 @@ class Builder:
                 logger.error(error_msg)
                 return BuildResult(success=False, error=error_msg)
                 
-            # Compile each source file
-            objects = []
-            for source in sources:
-                logger.debug(f"Compiling source file: {source}")
-                # Use relative paths for object files
-                object_path = Path(f"{source.stem}.o")
-                error = self._compile_source(
-                    source,
-                    object_path,
-                    context.package,
-                    context.build_metadata,
-                    context.verbose,
-                    context.traits
+            # Every source of the package needs the precompiled header first
+            with self.collector.span("pch", "compile", package=context.package.name):
+                error = self._build_pch(context)
+            if error:
+                self._get_dependency_db(context.package).save()
+                return BuildResult(success=False, error=f"Failed to build {context.package.name}:\n{error}")
+                
+            # Ask a shared cache about all objects at once rather than one request per miss
+            dependency_db = self._get_dependency_db(context.package)
+            if not self.profile:
+                self.cache.prefetch_objects(
+                    [(source, context.build_metadata, dependency_db.get(source)) for source in sources],
+                    package_roots(context.package, context.build_dir)
                 )
-                if error:
-                    logger.error(f"Failed to compile {source}: {error}")
-                    return BuildResult(success=False, error=f"Failed to compile {source}:\n{error}")
-                objects.append(object_path)
+
+            # Compile each source file, in parallel when jobs > 1
+            try:
+                with self.collector.span("compile", "compile", package=context.package.name, files=len(sources)):
+                    failed = self._compile_sources(sources, objects, context)
+            finally:
+                # Keep what successful compiles learned even if another one failed
+                self._get_dependency_db(context.package).save()
+            if failed:
+                source, error = failed
+                if source.parent == context.build_dir.absolute() / "unity":
+                    error += (
+                        "\nThis is a unity build of several sources. If some of them can't "
+                        "share a translation unit (e.g. conflicting static names), list "
+                        "them under unity.exclude in package.yml."
+                    )
+                logger.error(f"Failed to compile {source}: {error}")
+                return BuildResult(success=False, error=f"Failed to compile {source}:\n{error}")
                 
             # Link objects
-            if context.package.package_type == PackageType.LIBRARY:
-                output_name = f"lib{context.package.package_name}.a"
-            else:
-                output_name = context.package.name
-            output_path = Path(output_name)
+            output_path = self._output_name(context.package)
             
-            logger.debug(f"Linking objects for {context.package.name}: {objects}")
-            error = self._link_objects(
+            # Skip the link when the output was produced from identical inputs
+            signature = self._link_signature(
                 objects,
                 output_path,
                 context.package,
                 context.build_metadata,
-                context.verbose,
-                context.traits
+                context.build_dir
             )
-            if error:
-                logger.error(f"Failed to link {context.package.name}: {error}")
-                return BuildResult(success=False, error=f"Failed to link {context.package.name}:\n{error}")
+            up_to_date = self._is_link_up_to_date(output_path, context.build_dir, signature)
+            if up_to_date:
+                logger.debug(f"{context.package.name} is up to date, skipping link")
+            else:
+                logger.debug(f"Linking objects for {context.package.name}: {objects}")
+                # Drop the old signature first so an interrupted link is never trusted
+                self._signature_path(output_path, context.build_dir).unlink(missing_ok=True)
+                with self.collector.span("link", "link", package=context.package.name):
+                    error = self._link_objects(
+                        objects,
+                        output_path,
+                        context.package,
+                        context.build_metadata,
+                        context.verbose,
+                        context.traits,
+                        context.build_dir
+                    )
+                if error:
+                    logger.error(f"Failed to link {context.package.name}: {error}")
+                    return BuildResult(success=False, error=f"Failed to link {context.package.name}:\n{error}")
+                self._write_link_signature(output_path, context.build_dir, signature)
                 
             # Run post-build hooks
             try:
@@ -595,7 +1299,8 @@ class Builder:
             logger.debug(f"Build successful for {context.package.name}, output at: {output_path}")
             return BuildResult(
                 success=True,
-                artifacts={"output": output_path}
+                artifacts={"output": output_path},
+                up_to_date=up_to_date
             )
         except Exception as e:
             error_msg = f"Build failed for {context.package.name}: {str(e)}"
@@ -613,33 +1318,61 @@ class Builder:
         parent_package: Optional[Package] = None
     ) -> BuildResult:
         """Build a package."""
+        if parent_package is None:
+            # A new top-level build: a long-lived builder must rebuild everything it built before
+            with self._built_lock:
+                self._built_packages.clear()
+            self.installed_dependencies = False
+            self._solution = None
+            self._solution_orgs = {}
+            with self._downloads_lock:
+                self._downloads.clear()
+            try:
+                self.lockfile = Lockfile.load(package.path)
+            except ValueError as e:
+                return BuildResult(success=False, error=str(e))
+        try:
+            parent_name = parent_package.name if parent_package else None
+            with self.collector.span(package.name, "package", dependency_of=parent_name):
+                return self._build(package, traits, verbose, parent_package)
+        finally:
+            if parent_package is None:
+                # Top-level build done: persist file states, forget memoized digests
+                self.cache.flush()
+                if not self.frozen:
+                    self.lockfile.save()
+                self.cache.maybe_gc_in_background()
+                
+    def _build(
+        self,
+        package: Package,
+        traits: Optional[Dict[str, str]] = None,
+        verbose: bool = False,
+        parent_package: Optional[Package] = None
+    ) -> BuildResult:
+        """Build a package and its dependencies (see build())."""
         logger.debug(f"Starting build of {package.name}")
         if parent_package:
             logger.debug(f"Building as dependency of {parent_package.name}")
         
         # Check if package has already been built
         package_key = (package.name, package.path)
-        if package_key in self._built_packages:
+        with self._built_lock:
+            already_built = package_key in self._built_packages
+        if already_built:
             logger.debug(f"Package {package.name} has already been built, skipping")
             return BuildResult(success=True)
         
+        context: Optional[BuildContext] = None
         try:
+            # Load the dependency graph once for this build
+            package.dependency_closure(refresh=True)
+            
             # Create build metadata
-            compiler_info = self._get_compiler_info()
-            build_metadata = package.create_build_metadata(compiler_info)
+            build_metadata = self._create_build_metadata(package, traits)
             logger.debug(f"Created build metadata for {package.name}")
-            
-            # Add traits to build metadata
-            if traits:
-                build_metadata.traits.update(traits)
-                logger.debug(f"Added traits to build metadata: {traits}")
-                
-            # Create build directory - use parent's build/deps directory if this is a dependency
-            if parent_package:
-                build_dir = parent_package.get_build_path(package._validated_config.name)
-            else:
-                build_dir = package.get_build_dir()
                 
+            build_dir = self._build_dir(package, parent_package)
             logger.debug(f"Using build directory: {build_dir}")
                 
             try:
@@ -649,74 +1382,37 @@ class Builder:
                 logger.error(error_msg)
                 return BuildResult(success=False, error=error_msg)
             
-            # Change to build directory for all operations
+            # Create build context. Tools run with the build directory as their
+            # working directory; the process cwd is left alone so packages can
+            # build concurrently.
+            context = BuildContext(
+                package=package,
+                build_metadata=build_metadata,
+                traits=traits or {},
+                verbose=verbose,
+                build_dir=build_dir
+            )
+            
             try:
-                old_cwd = Path.cwd()
-                os.chdir(build_dir)
-                logger.debug(f"Changed working directory to: {build_dir}")
+                # Run pre-build hooks
+                logger.debug("Running pre-build hooks")
+                self.hook_manager.run_hooks(BuildStage.PRE_BUILD, context)
             except Exception as e:
-                error_msg = f"Failed to change to build directory {build_dir}: {str(e)}"
+                error_msg = f"Pre-build hook failed for {package.name}: {str(e)}"
                 logger.error(error_msg)
                 return BuildResult(success=False, error=error_msg)
-                
-            try:
-                # Create build context
-                context = BuildContext(
-                    package=package,
-                    build_metadata=build_metadata,
-                    traits=traits or {},
-                    verbose=verbose
-                )
-                
-                try:
-                    # Run pre-build hooks
-                    logger.debug("Running pre-build hooks")
-                    self.hook_manager.run_hooks(BuildStage.PRE_BUILD, context)
-                except Exception as e:
-                    error_msg = f"Pre-build hook failed for {package.name}: {str(e)}"
-                    logger.error(error_msg)
-                    return BuildResult(success=False, error=error_msg)
-                
-                # Step 1: Ensure all dependencies are installed
-                logger.debug("Ensuring dependencies are installed")
-                error = self._ensure_dependencies(package, context)
-                if error:
-                    logger.error(f"Dependency installation failed for {package.name}: {error}")
-                    return BuildResult(success=False, error=error)
-                
-                # Step 2: Build all dependencies in topological order
-                logger.debug("Building dependencies")
-                error = self._build_dependencies(package, context, parent_package)
-                if error:
-                    logger.error(f"Dependency build failed for {package.name}: {error}")
-                    return BuildResult(success=False, error=error)
-                
-                # Run post-dependency hooks
-                try:
-                    logger.debug("Running post-dependency hooks")
-                    self.hook_manager.run_hooks(BuildStage.POST_DEPENDENCY_BUILD, context)
-                except Exception as e:
-                    error_msg = f"Post-dependency hook failed for {package.name}: {str(e)}"
-                    logger.error(error_msg)
-                    return BuildResult(success=False, error=error_msg)
-                
-                # Step 3: Build the package itself
-                logger.debug(f"Building package {package.name}")
-                result = self._build_package(context, parent_package)
-                if not result.success:
-                    logger.error(f"Package build failed for {package.name}: {result.error}")
-                    return result
-                
-                # Mark package as built
-                self._built_packages.add(package_key)
-                
-                logger.debug(f"Successfully built {package.name}")
+            
+            result = self._build_steps(context, parent_package)
+            if not result.success:
+                self._report_error(context, result.error)
                 return result
-                
-            finally:
-                # Change back to original directory
-                logger.debug(f"Changing back to original directory: {old_cwd}")
-                os.chdir(old_cwd)
+            
+            # Mark package as built
+            with self._built_lock:
+                self._built_packages.add(package_key)
+            
+            logger.debug(f"Successfully built {package.name}")
+            return result
                 
         except Exception as e:
             error_msg = f"Build failed for {package.name}: {str(e)}"
@@ -724,4 +1420,56 @@ class Builder:
                 import traceback
                 error_msg += f"\nTraceback:\n{''.join(traceback.format_tb(e.__traceback__))}"
             logger.error(error_msg)
-            return BuildResult(success=False, error=error_msg) 
\ No newline at end of file
+            if context is not None:
+                self._report_error(context, error_msg)
+            return BuildResult(success=False, error=error_msg)
+            
+    def _build_steps(self, context: BuildContext, parent_package: Optional[Package] = None) -> BuildResult:
+        """Fetch and build a package's dependencies, then build the package.
+        
+        Args:
+            context: Build context, after the pre-build hooks ran
+            parent_package: If building a dependency, the package that depends on this one
+        """
+        package = context.package
+        
+        # Step 1: Ensure all dependencies are installed
+        logger.debug("Ensuring dependencies are installed")
+        with self.collector.span("fetch", "fetch", package=package.name):
+            error = self._ensure_dependencies(package, context)
+        if error:
+            logger.error(f"Dependency installation failed for {package.name}: {error}")
+            return BuildResult(success=False, error=error)
+        
+        # Step 2: Build all dependencies, independent ones concurrently
+        logger.debug("Building dependencies")
+        error = self._build_dependencies(package, context, parent_package)
+        if error:
+            logger.error(f"Dependency build failed for {package.name}: {error}")
+            return BuildResult(success=False, error=error)
+        
+        # Run post-dependency hooks
+        try:
+            logger.debug("Running post-dependency hooks")
+            self.hook_manager.run_hooks(BuildStage.POST_DEPENDENCY_BUILD, context)
+        except Exception as e:
+            error_msg = f"Post-dependency hook failed for {package.name}: {str(e)}"
+            logger.error(error_msg)
+            return BuildResult(success=False, error=error_msg)
+        
+        # Step 3: Build the package itself
+        logger.debug(f"Building package {package.name}")
+        result = self._build_package(context, parent_package)
+        if not result.success:
+            logger.error(f"Package build failed for {package.name}: {result.error}")
+        return result
+        
+    def _report_error(self, context: BuildContext, error: str) -> None:
+        """Tell the error handler and event listeners that a package failed to build."""
+        self.events.publish_error(context, error)
+        if self.error_handler is None:
+            return
+        try:
+            self.error_handler(context, error)
+        except Exception as e:
+            logger.error(f"Build error handler failed for {context.package.name}: {e}") 
\ No newline at end of file
@@ -2,16 +2,21 @@
 Build artifact caching system.
 """
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 import hashlib
 import json
 import shutil
 import logging
 import os
 import tarfile
-from dataclasses import asdict
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
 
 from ..core.package import Package, BuildMetadata
+from .filestate import FileStateIndex
+from .materialize import MaterializeStrategy, materialize
+from .remote import CacheBackend, HttpBackend
 
 logger = logging.getLogger(__name__)
 
@@ -41,19 +46,194 @@ class TarFilter:
             
         return member
 
+# Minimum seconds between opportunistic gcs after builds
+GC_INTERVAL = 3600
+
+def package_roots(package: Package, build_dir: Optional[Path] = None) -> Dict[str, Path]:
+    """Get the directories paths in a package's cache keys are relative to.
+    
+    Headers and include directories under the package, one of its dependencies
+    or its build directory are hashed relative to that directory, so checkouts
+    at different locations (e.g. CI runners) share cache entries.
+    
+    Args:
+        package: Package being built
+        build_dir: Directory the package is built in, if paths under it are hashed
+        
+    Returns:
+        Root directories by name
+    """
+    roots = {f"dep:{dep.name}": dep.path for dep in package.dependency_closure().packages}
+    roots["package"] = package.path
+    if build_dir is not None:
+        roots["build"] = build_dir
+    return {name: Path(os.path.normpath(path.absolute())) for name, path in roots.items()}
+
+def _relative_path(path: Path, roots: Optional[Dict[str, Path]]) -> Tuple[Optional[str], str]:
+    """Split a path into the innermost root containing it and the rest.
+    
+    Returns:
+        (root name, path relative to it), or (None, absolute path) outside every root
+    """
+    path = Path(os.path.normpath(path.absolute()))
+    best = None
+    for name, root in (roots or {}).items():
+        if (path == root or root in path.parents) and (best is None or len(root.parts) > len(roots[best].parts)):
+            best = name
+    if best is None:
+        return None, str(path)
+    return best, path.relative_to(roots[best]).as_posix()
+
+def _absolute_path(root: Optional[str], path: str, roots: Optional[Dict[str, Path]]) -> Optional[Path]:
+    """Reverse _relative_path(). Returns None for a root this build doesn't have."""
+    if root is None:
+        return Path(path)
+    if not roots or root not in roots:
+        return None
+    return roots[root] / path
+
+@dataclass
+class CacheSettings:
+    """User settings for the build cache, stored in <cache_dir>/config.json."""
+    # How cached files are placed into build directories and back
+    materialize: str = MaterializeStrategy.AUTO.value
+    # Evict least recently used entries beyond this many bytes (None: unbounded)
+    max_size: Optional[int] = None
+    # Evict entries not used for this many seconds (None: keep forever)
+    max_age: Optional[float] = None
+    # Shared cache server to fetch misses from and upload results to
+    # (see `clyde cache serve`). CLYDE_CACHE_URL overrides it.
+    remote_url: Optional[str] = None
+    
+    @classmethod
+    def load(cls, cache_dir: Path) -> "CacheSettings":
+        """Load settings, falling back to defaults for anything missing."""
+        config_path = cache_dir / "config.json"
+        if not config_path.exists():
+            return cls()
+        try:
+            with open(config_path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Ignoring unreadable cache settings %s: %s", config_path, e)
+            return cls()
+        known = {field.name for field in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+        
+    def save(self, cache_dir: Path) -> None:
+        """Save settings."""
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(cache_dir / "config.json", "w") as f:
+            json.dump(asdict(self), f, indent=2)
+            
+    def validate(self) -> None:
+        """Check setting values.
+        
+        Raises:
+            ValueError: If a setting is invalid
+        """
+        try:
+            MaterializeStrategy(self.materialize)
+        except ValueError:
+            choices = ", ".join(s.value for s in MaterializeStrategy)
+            raise ValueError(f"Invalid materialize strategy: {self.materialize} (expected one of {choices})")
+        if self.max_size is not None and self.max_size < 0:
+            raise ValueError(f"Invalid max cache size: {self.max_size}")
+        if self.max_age is not None and self.max_age < 0:
+            raise ValueError(f"Invalid max cache age: {self.max_age}")
+        if self.remote_url is not None and not self.remote_url.startswith(("http://", "https://")):
+            raise ValueError(f"Invalid remote cache URL: {self.remote_url}")
+
+@dataclass
+class GCResult:
+    """Outcome of a cache garbage collection."""
+    removed: int = 0  # Number of entries removed
+    freed: int = 0  # Bytes freed
+    remaining: int = 0  # Number of entries kept
+    remaining_size: int = 0  # Bytes kept
+
+class AccessIndex:
+    """Records when each cache entry was last stored or used.
+    
+    Kept in <cache_dir>/access.json instead of relying on file atimes, which
+    many filesystems don't update. Entries missing from the index count as last
+    used at their mtime.
+    """
+    
+    def __init__(self, path: Path):
+        """Initialize access index.
+        
+        Args:
+            path: JSON file the index is persisted in
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending: Dict[str, float] = {}
+        
+    def _load(self) -> Dict[str, float]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.debug("Ignoring unreadable access index %s: %s", self.path, e)
+            return {}
+            
+    def touch(self, entry: str) -> None:
+        """Record that an entry (path relative to the cache directory) was used now."""
+        with self._lock:
+            self._pending[entry] = time.time()
+            
+    def times(self) -> Dict[str, float]:
+        """Get last use times of all recorded entries, including unflushed ones."""
+        with self._lock:
+            times = self._load()
+            for entry, when in self._pending.items():
+                times[entry] = max(when, times.get(entry, 0))
+            return times
+            
+    def flush(self, removed: Optional[Set[str]] = None) -> None:
+        """Merge recorded uses into the index file, dropping removed entries."""
+        with self._lock:
+            if not self._pending and not removed:
+                return
+            times = self._load()
+            for entry, when in self._pending.items():
+                times[entry] = max(when, times.get(entry, 0))
+            for entry in removed or ():
+                times.pop(entry, None)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(times, f)
+            os.replace(tmp_path, self.path)
+            self._pending.clear()
+
 class BuildCache:
     """Manages caching of build artifacts."""
     
-    def __init__(self, cache_dir: Optional[Path] = None):
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        settings: Optional[CacheSettings] = None,
+        remote: Optional[CacheBackend] = None
+    ):
         """Initialize build cache.
         
         Args:
             cache_dir: Directory to store cache. Defaults to ~/.clydepm/cache
+            settings: Cache settings. Defaults to those saved in the cache directory
+            remote: Shared backend consulted on local misses. Defaults to an
+                HttpBackend for CLYDE_CACHE_URL or the remote_url setting, if set,
+                authenticating with CLYDE_CACHE_TOKEN
         """
         if cache_dir is None:
             cache_dir = Path.home() / ".clydepm" / "cache"
             
         self.cache_dir = cache_dir
+        self.settings = settings or CacheSettings.load(cache_dir)
+        self.settings.validate()
         self.objects_dir = cache_dir / "objects"
         self.deps_dir = cache_dir / "deps"
         self.artifacts_dir = cache_dir / "artifacts"
@@ -62,80 +242,369 @@ class BuildCache:
         for dir in [self.cache_dir, self.objects_dir, self.deps_dir, self.artifacts_dir]:
             dir.mkdir(parents=True, exist_ok=True)
             
+        self.file_states = FileStateIndex(cache_dir / "file_state.json")
+        self.access = AccessIndex(cache_dir / "access.json")
+        
+        if remote is None:
+            remote_url = os.environ.get("CLYDE_CACHE_URL") or self.settings.remote_url
+            if remote_url:
+                remote = HttpBackend(remote_url, token=os.environ.get("CLYDE_CACHE_TOKEN"))
+        self.remote = remote
+        # Remote keys known to exist (True) or be missing (False), from prefetch
+        self._remote_known: Dict[str, bool] = {}
+        # Remote header lists by key as fetched or uploaded (None: the remote has none)
+        self._remote_headers: Dict[str, Optional[List[List[Optional[str]]]]] = {}
+        self._remote_lock = threading.Lock()
+            
         logger.debug("Using build cache at %s", self.cache_dir)
         
     def _hash_file(self, path: Path) -> str:
-        """Generate hash for a file based on its contents."""
-        hasher = hashlib.sha256()
-        with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hasher.update(chunk)
-        return hasher.hexdigest()
+        """Generate hash for a file based on its contents.
         
-    def _hash_source(self, source_path: Path, build_metadata: BuildMetadata) -> str:
-        """Generate hash for a source file and its build configuration."""
-        # Hash the source file
-        file_hash = self._hash_file(source_path)
+        Unchanged files (same mtime, size and inode as last seen) are not read.
+        """
+        return self.file_states.digest(path)
         
-        # Hash the build configuration
+    def _hash_config(self, build_metadata: BuildMetadata, roots: Optional[Dict[str, Path]] = None) -> str:
+        """Generate hash for the build configuration objects are compiled with."""
         config = {
             "compiler": asdict(build_metadata.compiler),
             "cflags": sorted(build_metadata.cflags),
-            "includes": [str(p) for p in build_metadata.includes],
+            "includes": [_relative_path(p, roots) for p in build_metadata.includes],
             "traits": build_metadata.traits
         }
-        config_hash = hashlib.sha256(
+        return hashlib.sha256(
             json.dumps(config, sort_keys=True).encode()
         ).hexdigest()
         
+    def _hash_source(
+        self,
+        source_path: Path,
+        build_metadata: BuildMetadata,
+        headers: Optional[List[Path]] = None,
+        roots: Optional[Dict[str, Path]] = None
+    ) -> str:
+        """Generate hash for a source file, the headers it includes and its build configuration.
+        
+        Args:
+            source_path: Source file
+            build_metadata: Build configuration
+            headers: Headers the source includes (transitively), as recorded from
+                its last depfile. A missing header hashes differently from any
+                existing one, so deleting a header invalidates its dependents.
+            roots: Directories header and include paths are hashed relative to
+                (see package_roots()). Other paths are hashed as they are.
+        """
+        # Hash the source file and the build configuration
+        key = f"{self._hash_file(source_path)}:{self._hash_config(build_metadata, roots)}"
+        if headers:
+            header_hasher = hashlib.sha256()
+            for header in sorted(headers):
+                try:
+                    digest = self._hash_file(header)
+                except FileNotFoundError:
+                    digest = "missing"
+                root, path = _relative_path(header, roots)
+                header_hasher.update(f"{root}\0{path}\0{digest}\0".encode())
+            key = f"{key}:{header_hasher.hexdigest()}"
+        
         # Combine hashes
-        return hashlib.sha256(
-            f"{file_hash}:{config_hash}".encode()
-        ).hexdigest()
+        return hashlib.sha256(key.encode()).hexdigest()
         
-    def get_object_path(self, source_path: Path, build_metadata: BuildMetadata) -> Path:
+    def _headers_key(
+        self,
+        source_path: Path,
+        build_metadata: BuildMetadata,
+        roots: Optional[Dict[str, Path]] = None
+    ) -> str:
+        """Get the remote key of a source's header list, which can't depend on the headers."""
+        key = f"headers:{self._hash_file(source_path)}:{self._hash_config(build_metadata, roots)}"
+        return f"{hashlib.sha256(key.encode()).hexdigest()}.headers"
+        
+    def get_object_path(
+        self,
+        source_path: Path,
+        build_metadata: BuildMetadata,
+        headers: Optional[List[Path]] = None,
+        roots: Optional[Dict[str, Path]] = None
+    ) -> Path:
         """Get path where cached object file should be stored."""
-        obj_hash = self._hash_source(source_path, build_metadata)
+        obj_hash = self._hash_source(source_path, build_metadata, headers, roots)
         return self.objects_dir / f"{obj_hash}.o"
         
-    def has_cached_object(self, source_path: Path, build_metadata: BuildMetadata) -> bool:
+    def has_cached_object(
+        self,
+        source_path: Path,
+        build_metadata: BuildMetadata,
+        headers: Optional[List[Path]] = None,
+        roots: Optional[Dict[str, Path]] = None
+    ) -> bool:
         """Check if object file is cached for source file."""
-        cached = self.get_object_path(source_path, build_metadata).exists()
+        cached = self.get_object_path(source_path, build_metadata, headers, roots).exists()
         if cached:
             logger.debug("[Cache Hit] Found cached object for %s", source_path.name)
         else:
             logger.debug("[Cache Miss] No cached object for %s", source_path.name)
         return cached
         
-    def cache_object(self, source_path: Path, object_path: Path, build_metadata: BuildMetadata) -> None:
-        """Cache compiled object file."""
-        cached_path = self.get_object_path(source_path, build_metadata)
-        logger.debug("Caching object %s -> %s", object_path, cached_path)
-        shutil.copy2(object_path, cached_path)
+    def cache_object(
+        self,
+        source_path: Path,
+        object_path: Path,
+        build_metadata: BuildMetadata,
+        headers: Optional[List[Path]] = None,
+        roots: Optional[Dict[str, Path]] = None
+    ) -> None:
+        """Cache compiled object file.
+        
+        With a remote cache, the header list is shared too, so builds that never
+        compiled the source can still work out the object's key.
+        """
+        cached_path = self.get_object_path(source_path, build_metadata, headers, roots)
+        used = self._materialize(object_path, cached_path)
+        self._touch(cached_path)
+        logger.debug("Caching object %s -> %s (%s)", object_path, cached_path, used.value)
+        self._upload_remote(cached_path.name, cached_path)
+        if headers is not None:
+            self._upload_remote_headers(source_path, build_metadata, headers, roots)
+            
+    def _upload_remote_headers(
+        self,
+        source_path: Path,
+        build_metadata: BuildMetadata,
+        headers: List[Path],
+        roots: Optional[Dict[str, Path]]
+    ) -> None:
+        """Store the headers a source included in the remote cache."""
+        if self.remote is None:
+            return
+        key = self._headers_key(source_path, build_metadata, roots)
+        entries = sorted(
+            [root, path] for root, path in (_relative_path(h, roots) for h in headers)
+        )
+        with self._remote_lock:
+            if self._remote_headers.get(key) == entries:
+                return
+        # Backends store files, so write the list to one first
+        tmp_path = self.objects_dir / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f)
+            self.remote.put(key, tmp_path)
+        except Exception as e:
+            self._remote_failed("upload", e)
+            return
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        with self._remote_lock:
+            self._remote_headers[key] = entries
+            
+    def get_remote_headers(
+        self,
+        source_path: Path,
+        build_metadata: BuildMetadata,
+        roots: Optional[Dict[str, Path]] = None
+    ) -> Optional[List[Path]]:
+        """Get the headers a source included when another build compiled it.
+        
+        For sources this machine has no depfile for yet. Lists are fetched once
+        per process.
+        
+        Returns:
+            Header paths, or None if the remote cache doesn't know the source
+        """
+        if self.remote is None:
+            return None
+        try:
+            key = self._headers_key(source_path, build_metadata, roots)
+        except FileNotFoundError:
+            return None  # Reported by the compile
+        with self._remote_lock:
+            known = key in self._remote_headers
+            entries = self._remote_headers.get(key)
+        if not known:
+            entries = self._fetch_remote_headers(key)
+            with self._remote_lock:
+                self._remote_headers[key] = entries
+        if entries is None:
+            return None
+        headers = []
+        for root, path in entries:
+            header = _absolute_path(root, path, roots)
+            if header is None:
+                logger.debug("Ignoring remote headers of %s: no root %s here", source_path.name, root)
+                return None
+            headers.append(header)
+        logger.debug("[Remote Hit] Fetched headers of %s", source_path.name)
+        return headers
+        
+    def _fetch_remote_headers(self, key: str) -> Optional[List[List[Optional[str]]]]:
+        """Download a header list from the remote cache."""
+        if self.remote is None:
+            return None
+        tmp_path = self.objects_dir / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if not self.remote.get(key, tmp_path):
+                return None
+            with open(tmp_path) as f:
+                return json.load(f)
+        except json.JSONDecodeError as e:
+            logger.debug("Ignoring unreadable remote headers %s: %s", key, e)
+            return None
+        except Exception as e:
+            self._remote_failed("fetch", e)
+            return None
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        
+    def prefetch_objects(
+        self,
+        sources: List[Tuple[Path, BuildMetadata, Optional[List[Path]]]],
+        roots: Optional[Dict[str, Path]] = None
+    ) -> None:
+        """Check which of several objects the remote cache has, in one request.
+        
+        Later lookups of objects the remote lacks then skip the round trip.
+        Sources without a local header list first get the remote one, if any.
+        
+        Args:
+            sources: (source, build metadata, headers or None) for each object
+                about to be looked up
+            roots: Directories paths are hashed relative to (see package_roots())
+        """
+        if self.remote is None:
+            return
+            
+        # Only ask for header lists the remote has, in one request too
+        unknown = {}
+        for source_path, build_metadata, headers in sources:
+            if headers is None:
+                try:
+                    unknown[self._headers_key(source_path, build_metadata, roots)] = source_path
+                except FileNotFoundError:
+                    continue
+        with self._remote_lock:
+            unknown = {key: source for key, source in unknown.items() if key not in self._remote_headers}
+        if unknown:
+            try:
+                present = self.remote.contains(list(unknown))
+            except Exception as e:
+                self._remote_failed("check", e)
+                return
+            with self._remote_lock:
+                for key in unknown:
+                    if key not in present:
+                        self._remote_headers[key] = None
+                        
+        keys = []
+        for source_path, build_metadata, headers in sources:
+            if headers is None:
+                headers = self.get_remote_headers(source_path, build_metadata, roots)
+                if headers is None:
+                    continue  # Will be compiled
+            try:
+                cached_path = self.get_object_path(source_path, build_metadata, headers, roots)
+            except FileNotFoundError:
+                continue  # Reported by the compile
+            if not cached_path.exists():
+                keys.append(cached_path.name)
+        if self.remote is None:
+            return  # Failed fetching header lists
+        with self._remote_lock:
+            keys = [key for key in keys if key not in self._remote_known]
+        if not keys:
+            return
+        try:
+            present = self.remote.contains(keys)
+        except Exception as e:
+            self._remote_failed("check", e)
+            return
+        logger.debug("Remote cache has %d of %d missing objects", len(present), len(keys))
+        with self._remote_lock:
+            for key in keys:
+                self._remote_known[key] = key in present
+                
+    def _fetch_remote(self, cached_path: Path) -> bool:
+        """Download a missing object entry from the remote cache.
+        
+        Returns:
+            True if the entry now exists locally
+        """
+        if self.remote is None:
+            return False
+        key = cached_path.name
+        with self._remote_lock:
+            if self._remote_known.get(key) is False:
+                return False
+        try:
+            found = self.remote.get(key, cached_path)
+        except Exception as e:
+            self._remote_failed("fetch", e)
+            return False
+        if found:
+            logger.debug("[Remote Hit] Fetched %s", key)
+        return found
+        
+    def _upload_remote(self, key: str, path: Path) -> None:
+        """Store a local entry in the remote cache. Failures are only logged."""
+        if self.remote is None:
+            return
+        with self._remote_lock:
+            if self._remote_known.get(key):
+                return
+        try:
+            self.remote.put(key, path)
+        except Exception as e:
+            self._remote_failed("upload", e)
+            return
+        with self._remote_lock:
+            self._remote_known[key] = True
+            
+    def _remote_failed(self, action: str, error: Exception) -> None:
+        """Stop using an unreachable remote cache for the rest of the process."""
+        if self.remote is not None:
+            logger.warning("Remote cache %s failed, continuing without it: %s", action, error)
+            self.remote = None
         
     def get_cached_object(
         self,
         source_path: Path,
         build_metadata: BuildMetadata,
-        dest_path: Path
+        dest_path: Path,
+        headers: Optional[List[Path]] = None,
+        roots: Optional[Dict[str, Path]] = None
     ) -> bool:
         """Get cached object file if it exists.
         
         Returns:
             True if cached object was found and copied, False otherwise
         """
-        cached_path = self.get_object_path(source_path, build_metadata)
-        if cached_path.exists():
-            logger.debug("Using cached object %s -> %s", cached_path, dest_path)
-            # Create destination directory
-            dest_path.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(cached_path, dest_path)
+        cached_path = self.get_object_path(source_path, build_metadata, headers, roots)
+        if cached_path.exists() or self._fetch_remote(cached_path):
+            try:
+                used = self._materialize(cached_path, dest_path)
+            except FileNotFoundError:
+                # Evicted between the check and the copy
+                logger.debug("[Cache Miss] Cached object for %s was evicted", source_path.name)
+                return False
+            self._touch(cached_path)
+            logger.debug("[Cache Hit] Using cached object %s -> %s (%s)", cached_path, dest_path, used.value)
             return True
+        logger.debug("[Cache Miss] No cached object for %s", source_path.name)
         return False
         
+    def _touch(self, entry: Path) -> None:
+        """Record a use of a cache entry for LRU eviction."""
+        self.access.touch(str(entry.relative_to(self.cache_dir)))
+        
+    def _materialize(self, src: Path, dest: Path) -> MaterializeStrategy:
+        """Place src at dest using the configured strategy."""
+        return materialize(src, dest, MaterializeStrategy(self.settings.materialize))
+        
     def _hash_artifact(self, package: Package, build_metadata: BuildMetadata) -> str:
         """Generate hash for final artifact based on all source files and build config."""
         hasher = hashlib.sha256()
+        roots = package_roots(package)
         
         # Hash all source files
         for source in sorted(package.get_source_files()):
@@ -149,7 +618,7 @@ class BuildCache:
             "type": package.package_type.value,
             "compiler": asdict(build_metadata.compiler),
             "cflags": sorted(build_metadata.cflags),
-            "includes": [str(p) for p in build_metadata.includes],
+            "includes": [_relative_path(p, roots) for p in build_metadata.includes],
             "traits": build_metadata.traits
         }
         hasher.update(
@@ -173,61 +642,127 @@ class BuildCache:
         return cached
         
     def cache_artifact(self, package: Package, build_metadata: BuildMetadata) -> None:
-        """Cache final build artifact."""
+        """Cache final build artifact.
+        
+        The entry is a directory holding the artifact and the runtime dependency
+        artifacts next to it, each materialized like cached objects.
+        """
         cached_path = self.get_artifact_path(package, build_metadata)
         output_path = package.get_output_path()
         
         logger.debug("Caching artifact %s -> %s", output_path, cached_path)
         
-        # Create tarball of the artifact and its dependencies
-        with tarfile.open(cached_path, "w:gz") as tar:
-            # Add the main artifact
-            tar.add(output_path, arcname=output_path.name)
-            
-            # Add any dependency artifacts needed for runtime
-            for dep in package.get_runtime_dependencies():
-                dep_output = dep.get_output_path()
-                if dep_output.exists():
-                    tar.add(dep_output, arcname=dep_output.name)
+        # Assemble the entry beside its final name, then swap it in
+        tmp_path = cached_path.with_name(f".{cached_path.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        
+        # Add the main artifact
+        self._materialize(output_path, tmp_path / output_path.name)
+        
+        # Add any dependency artifacts needed for runtime
+        for dep in package.get_runtime_dependencies():
+            dep_output = dep.get_output_path()
+            if dep_output.exists():
+                self._materialize(dep_output, tmp_path / dep_output.name)
+                
+        self._remove_entry(cached_path)
+        os.replace(tmp_path, cached_path)
+        self._touch(cached_path)
+        
+        if self.remote is not None:
+            # The remote stores blobs, so share the entry as a tarball
+            archive = cached_path.with_name(f".{cached_path.name}.{os.getpid()}.tar")
+            try:
+                with tarfile.open(archive, "w") as tar:
+                    for cached_file in sorted(cached_path.iterdir()):
+                        tar.add(cached_file, arcname=cached_file.name)
+                self._upload_remote(f"{cached_path.name}.tar", archive)
+            finally:
+                archive.unlink(missing_ok=True)
+                    
+    def _fetch_remote_artifact(self, cached_path: Path) -> bool:
+        """Download a missing artifact entry from the remote cache.
+        
+        Returns:
+            True if the entry now exists locally
+        """
+        if self.remote is None:
+            return False
+        archive = cached_path.with_name(f".{cached_path.name}.{os.getpid()}.tar")
+        tmp_path = cached_path.with_name(f".{cached_path.name}.{os.getpid()}.tmp")
+        try:
+            try:
+                found = self.remote.get(f"{cached_path.name}.tar", archive)
+            except Exception as e:
+                self._remote_failed("fetch", e)
+                return False
+            if not found:
+                return False
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            tmp_path.mkdir(parents=True)
+            with tarfile.open(archive, "r") as tar:
+                tar.extractall(tmp_path, filter="data")
+            self._remove_entry(cached_path)
+            os.replace(tmp_path, cached_path)
+            logger.debug("[Remote Hit] Fetched artifact %s", cached_path.name)
+            return True
+        finally:
+            archive.unlink(missing_ok=True)
+            shutil.rmtree(tmp_path, ignore_errors=True)
                     
     def get_cached_artifact(self, package: Package, build_metadata: BuildMetadata) -> bool:
         """Get cached final artifact if it exists.
         
         Returns:
-            True if cached artifact was found and extracted, False otherwise
+            True if cached artifact was found and restored, False otherwise
         """
         cached_path = self.get_artifact_path(package, build_metadata)
-        if cached_path.exists():
-            logger.debug("Using cached artifact %s", cached_path)
+        if not cached_path.exists() and not self._fetch_remote_artifact(cached_path):
+            return False
             
-            # Extract the cached artifact
-            with tarfile.open(cached_path, "r:gz") as tar:
-                def is_within_directory(directory, target):
-                    abs_directory = os.path.abspath(directory)
-                    abs_target = os.path.abspath(target)
-                    prefix = os.path.commonprefix([abs_directory, abs_target])
-                    return prefix == abs_directory
-                
-                def safe_extract(tar, path=".", members=None, *, numeric_owner=False):
-                    for member in tar.getmembers():
-                        member_path = os.path.join(path, member.name)
-                        if not is_within_directory(path, member_path):
-                            raise Exception("Attempted path traversal in tar file")
-                    
-                    tar.extractall(
-                        path,
-                        members,
-                        numeric_owner=numeric_owner,
-                        filter=TarFilter()
-                    )
-                
-                # Safely extract to the package's output directory
-                output_dir = package.get_output_path().parent
-                output_dir.mkdir(parents=True, exist_ok=True)
-                safe_extract(tar, str(output_dir))
-                
+        logger.debug("Using cached artifact %s", cached_path)
+        self._touch(cached_path)
+        output_dir = package.get_output_path().parent
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        if cached_path.is_dir():
+            for cached_file in cached_path.iterdir():
+                self._materialize(cached_file, output_dir / cached_file.name)
             return True
-        return False
+            
+        # Entries written before artifacts were stored as directories are tarballs
+        with tarfile.open(cached_path, "r:gz") as tar:
+            def is_within_directory(directory, target):
+                abs_directory = os.path.abspath(directory)
+                abs_target = os.path.abspath(target)
+                prefix = os.path.commonprefix([abs_directory, abs_target])
+                return prefix == abs_directory
+            
+            def safe_extract(tar, path=".", members=None, *, numeric_owner=False):
+                for member in tar.getmembers():
+                    member_path = os.path.join(path, member.name)
+                    if not is_within_directory(path, member_path):
+                        raise Exception("Attempted path traversal in tar file")
+                
+                tar.extractall(
+                    path,
+                    members,
+                    numeric_owner=numeric_owner,
+                    filter=TarFilter()
+                )
+            
+            # Safely extract to the package's output directory
+            safe_extract(tar, str(output_dir))
+            
+        return True
+        
+    def _remove_entry(self, path: Path) -> None:
+        """Remove a cache entry, whether a file or a directory."""
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path)
+        elif path.exists():
+            path.unlink()
         
     def clean_package(self, package: Package) -> None:
         """Clean cached artifacts for a specific package.
@@ -240,7 +775,7 @@ class BuildCache:
         # Clean artifacts directory
         for artifact in self.artifacts_dir.glob(f"{package.name}-*"):
             logger.debug("Removing artifact %s", artifact)
-            artifact.unlink()
+            self._remove_entry(artifact)
             
         # Clean object files
         build_dir = package.get_build_dir()
@@ -252,11 +787,122 @@ class BuildCache:
         for dep in package.get_all_dependencies():
             self.clean_package(dep)
             
+    def flush(self) -> None:
+        """Persist file states gathered during a build and drop in-process digests.
+        
+        Call at the end of every top-level build so the next one sees edits.
+        """
+        self.file_states.flush()
+        self.access.flush()
+        
+    def _entry_size(self, path: Path) -> int:
+        """Get the size of a cache entry in bytes."""
+        if path.is_dir():
+            return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+        return path.stat().st_size
+        
+    def gc(
+        self,
+        max_size: Optional[int] = None,
+        max_age: Optional[float] = None,
+        dry_run: bool = False
+    ) -> GCResult:
+        """Evict cached objects and artifacts, least recently used first.
+        
+        Args:
+            max_size: Keep at most this many bytes. Defaults to the max_size setting.
+            max_age: Remove entries unused for this many seconds. Defaults to the
+                max_age setting.
+            dry_run: Only report what would be removed
+            
+        Returns:
+            What was (or would be) removed and kept
+        """
+        max_size = self.settings.max_size if max_size is None else max_size
+        max_age = self.settings.max_age if max_age is None else max_age
+        
+        times = self.access.times()
+        entries = []
+        for path in [*self.objects_dir.glob("*.o"), *self.artifacts_dir.iterdir()]:
+            if path.name.startswith("."):
+                continue  # Entry still being written
+            try:
+                key = str(path.relative_to(self.cache_dir))
+                last_used = times.get(key) or path.stat().st_mtime
+                entries.append((last_used, key, path, self._entry_size(path)))
+            except FileNotFoundError:
+                continue  # Removed by a concurrent gc
+        entries.sort()
+        
+        result = GCResult()
+        total = sum(size for _, _, _, size in entries)
+        now = time.time()
+        removed = set()
+        for last_used, key, path, size in entries:
+            expired = max_age is not None and now - last_used > max_age
+            oversized = max_size is not None and total > max_size
+            if not expired and not oversized:
+                result.remaining += 1
+                result.remaining_size += size
+                continue
+            logger.debug("Evicting %s (last used %s)", key, time.ctime(last_used))
+            if not dry_run:
+                try:
+                    self._remove_entry(path)
+                except FileNotFoundError:
+                    pass
+                removed.add(key)
+            total -= size
+            result.removed += 1
+            result.freed += size
+            
+        if removed:
+            self.access.flush(removed)
+        return result
+        
+    def maybe_gc_in_background(self, interval: float = GC_INTERVAL) -> Optional[threading.Thread]:
+        """Start a gc in the background if limits are set and none ran recently.
+        
+        The thread isn't a daemon, so the process finishes evicting before it exits.
+        
+        Returns:
+            The gc thread, or None if no gc was started
+        """
+        if self.settings.max_size is None and self.settings.max_age is None:
+            return None
+        stamp = self.cache_dir / ".last_gc"
+        try:
+            if time.time() - stamp.stat().st_mtime < interval:
+                return None
+        except FileNotFoundError:
+            pass
+        stamp.touch()
+        
+        def run() -> None:
+            try:
+                result = self.gc()
+                if result.removed:
+                    logger.info("Evicted %d cache entries (%d bytes)", result.removed, result.freed)
+            except Exception as e:
+                logger.warning("Background cache gc failed: %s", e)
+                
+        thread = threading.Thread(target=run, name="clyde-cache-gc")
+        thread.start()
+        return thread
+        
+    def get_dependency_db_path(self, package: Package) -> Path:
+        """Get path of the header dependency database for a package checkout."""
+        key = hashlib.sha256(str(package.path.resolve()).encode()).hexdigest()[:16]
+        return self.deps_dir / f"{package.name.replace('/', '_')}-{key}.json"
+        
     def clean(self) -> None:
         """Clean the entire cache."""
         logger.info("Cleaning build cache at %s", self.cache_dir)
         shutil.rmtree(self.cache_dir)
         self.cache_dir.mkdir(parents=True)
+        if (self.cache_dir / "config.json").exists() or self.settings != CacheSettings():
+            # Settings aren't cache contents; keep them
+            self.settings.save(self.cache_dir)
         self.objects_dir.mkdir()
         self.deps_dir.mkdir()
         self.artifacts_dir.mkdir() 
\ No newline at end of file
@@ -1,12 +1,20 @@
-from dataclasses import dataclass, field
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, ContextManager, Dict, List, Optional, Tuple
 import json
 import time
 import logging
+import shutil
+import threading
+import uuid
 
 from .hooks import BuildContext, BuildStage
+from .trace import TraceRecorder, write_chrome_trace
+from .critical_path import CriticalPathReport, compute_critical_path, load_session
+from .history import BuildHistory
+from .profile import ProfileSummary, TranslationUnitProfile, load_profiles, summarize_profiles
 from ..core.package import Package
 
 logger = logging.getLogger(__name__)
@@ -22,6 +30,8 @@ class CompilationStep:
     end_time: float = 0.0
     success: bool = False
     error: Optional[str] = None
+    worker: Optional[str] = None  # Name of the thread that ran the step
+    cache_hit: bool = False
 
 @dataclass
 class BuildData:
@@ -38,6 +48,27 @@ class BuildData:
     end_time: float = 0.0
     success: bool = False
     error: Optional[str] = None
+    session: Optional[str] = None  # Shared by a top-level build and the dependencies it builds
+    root: Optional[str] = None  # Top-level package of the session
+    dependencies_built_time: float = 0.0  # When the package's own work could start
+    link_start: float = 0.0
+    link_end: float = 0.0
+
+    def phases(self) -> Dict[str, Optional[float]]:
+        """Get the seconds spent compiling, linking, and on the package's own work in total.
+        
+        Own work starts once the package's dependencies are built.
+        """
+        compile_time = None
+        if self.compilation_steps:
+            ends = [step.end_time for step in self.compilation_steps if step.end_time]
+            if ends:
+                compile_time = max(ends) - min(step.start_time for step in self.compilation_steps)
+        link_time = self.link_end - self.link_start if self.link_end else None
+        own = None
+        if self.end_time:
+            own = self.end_time - (self.dependencies_built_time or self.start_time)
+        return {"compile": compile_time, "link": link_time, "own": own}
 
     def to_json(self) -> dict:
         """Convert to JSON-serializable dict."""
@@ -64,12 +95,17 @@ class BuildData:
                         "duration": step.end_time - step.start_time if step.end_time else None
                     },
                     "success": step.success,
-                    "error": step.error
+                    "error": step.error,
+                    "worker": step.worker,
+                    "cache_hit": step.cache_hit
                 }
                 for step in self.compilation_steps
             ],
             "dependencies": self.dependencies,
             "dependency_graph": self.dependency_graph,
+            "session": self.session,
+            "root": self.root,
+            "phases": self.phases(),
             "include_paths": self.include_paths,
             "library_paths": self.library_paths,
             "success": self.success,
@@ -77,13 +113,51 @@ class BuildData:
         }
 
 class BuildDataCollector:
-    """Collects build data using Builder hooks."""
+    """Collects build data using Builder hooks.
+    
+    Dependencies may build concurrently, so in-progress builds are tracked per
+    package and in-flight compilation steps per source file. ``current_build``
+    is the most recently started build that has not finished yet.
+    """
     
     def __init__(self, output_dir: Path):
         self.output_dir = output_dir
+        self.profiles_dir = output_dir / "profiles"  # Compiler profiles, one directory per session
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.history = BuildHistory(output_dir / "history.db")
+        self.history.migrate(output_dir)
         self.current_build: Optional[BuildData] = None
-        self.current_step: Optional[CompilationStep] = None
+        self._builds: Dict[str, BuildData] = {}
+        # In-flight steps keyed by source file, with the build each belongs to
+        self._active_steps: Dict[str, Tuple[CompilationStep, Optional[BuildData]]] = {}
+        self._lock = threading.Lock()
+        self.trace: Optional[TraceRecorder] = None  # Set by enable_trace()
+        self._session: Optional[str] = None
+        self._session_root: Optional[str] = None
+        
+    def enable_trace(self) -> TraceRecorder:
+        """Start recording a timeline of packages, build phases, files and hooks."""
+        if self.trace is None:
+            self.trace = TraceRecorder()
+        return self.trace
+        
+    def span(self, name: str, category: str, **args: Any) -> ContextManager[Dict[str, Any]]:
+        """Time a piece of work, if tracing is enabled (see enable_trace())."""
+        if self.trace is None:
+            return nullcontext(args)
+        return self.trace.span(name, category, **args)
+        
+    def write_trace(self, path: Path) -> None:
+        """Write the recorded timeline as a Chrome trace-event file."""
+        write_chrome_trace(self.trace.spans if self.trace else [], path)
+        
+    @property
+    def current_step(self) -> Optional[CompilationStep]:
+        """Most recently started compilation step that has not finished yet."""
+        with self._lock:
+            if not self._active_steps:
+                return None
+            return next(reversed(self._active_steps.values()))[0]
         
     def register_hooks(self, builder) -> None:
         """Register all hooks with the builder."""
@@ -91,18 +165,30 @@ class BuildDataCollector:
         builder.add_hook(BuildStage.PRE_COMPILE, self._on_compile_start)
         builder.add_hook(BuildStage.POST_COMPILE, self._on_compile_end)
         builder.add_hook(BuildStage.POST_DEPENDENCY_BUILD, self._on_dependencies_built)
+        builder.add_hook(BuildStage.PRE_LINK, self._on_link_start)
+        builder.add_hook(BuildStage.POST_LINK, self._on_link_end)
         builder.add_hook(BuildStage.POST_BUILD, self._on_build_end)
         
         # Register error handler
         builder.set_error_handler(self.on_build_error)
         
+        # Time hooks too
+        builder.hook_manager.span = self.span
+        
+    def _build_for(self, context: BuildContext) -> Optional[BuildData]:
+        """Get the in-progress build for the context's package.
+        
+        Must be called with the lock held.
+        """
+        return self._builds.get(context.package.name, self.current_build)
+        
     def _on_build_start(self, context: BuildContext) -> None:
         """Called when build starts."""
         try:
             # Ensure output directory exists
             self.output_dir.mkdir(parents=True, exist_ok=True)
             
-            self.current_build = BuildData(
+            build = BuildData(
                 package_name=context.package.name,
                 package_version=str(context.package.version),
                 start_time=time.time(),
@@ -114,20 +200,30 @@ class BuildDataCollector:
             )
             
             # Collect dependency resolution information immediately
-            self.current_build.include_paths = [str(p) for p in context.build_metadata.includes]
-            self.current_build.library_paths = [str(p) for p in context.build_metadata.libs]
+            build.include_paths = [str(p) for p in context.build_metadata.includes]
+            build.library_paths = [str(p) for p in context.build_metadata.libs]
             
             # Build dependency graph
             for dep in context.package.get_all_dependencies():
-                self.current_build.dependencies[dep.name] = str(dep.version)
+                build.dependencies[dep.name] = str(dep.version)
                 # Get direct dependencies for this package
                 direct_deps = list(dep.get_dependencies().keys())  # Get just the package names
-                self.current_build.dependency_graph[dep.name] = direct_deps
+                build.dependency_graph[dep.name] = direct_deps
                 
             # Add the main package's direct dependencies to the graph
-            self.current_build.dependency_graph[context.package.name] = list(
+            build.dependency_graph[context.package.name] = list(
                 context.package.get_dependencies().keys()
             )
+            
+            with self._lock:
+                if not self._builds:
+                    # Nothing in progress: a new top-level build
+                    self._session = uuid.uuid4().hex[:12]
+                    self._session_root = context.package.name
+                build.session = self._session
+                build.root = self._session_root
+                self._builds[context.package.name] = build
+                self.current_build = build
         except Exception as e:
             error_msg = f"Failed to initialize build data: {str(e)}"
             logger.error(error_msg)
@@ -138,54 +234,155 @@ class BuildDataCollector:
         if not context.source_file or not context.object_file:
             return
             
-        self.current_step = CompilationStep(
+        step = CompilationStep(
             source_file=str(context.source_file),
             object_file=str(context.object_file),
             command=context.command,
             include_paths=[str(p) for p in context.build_metadata.includes],
-            start_time=time.time()
+            start_time=time.time(),
+            worker=threading.current_thread().name
         )
+        with self._lock:
+            self._active_steps[step.source_file] = (step, self._build_for(context))
         
     def _on_compile_end(self, context: BuildContext) -> None:
         """Called after each compilation step."""
-        if not self.current_step:
+        if not context.source_file:
             return
             
-        self.current_step.end_time = time.time()
-        self.current_step.success = True
-        if self.current_build:
-            self.current_build.compilation_steps.append(self.current_step)
-        self.current_step = None
+        with self._lock:
+            step, build = self._active_steps.pop(str(context.source_file), (None, None))
+            if not step:
+                return
+                
+            step.end_time = time.time()
+            step.success = True
+            step.cache_hit = context.cache_hit
+            if context.command:
+                step.command = context.command
+            if build:
+                build.compilation_steps.append(step)
+                
+        if context.profile and build:
+            self._save_profile(build, context.object_file, context.profile)
+            
+    def _save_profile(self, build: BuildData, object_file: Path, profile: TranslationUnitProfile) -> None:
+        """Save a compile's profile, and the compiler's report it came from, with the build's session."""
+        profile_dir = self.profiles_dir / (build.session or "unknown") / build.package_name.replace('/', '_')
+        stem = str(object_file.with_suffix("")).replace('/', '_')
+        try:
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            profile.package = build.package_name
+            profile.root = build.root
+            if profile.report:
+                report = Path(profile.report)
+                copied = profile_dir / f"{stem}{'.trace.json' if report.suffix == '.json' else report.suffix}"
+                shutil.copyfile(report, copied)
+                profile.report = copied.name
+            with open(profile_dir / f"{stem}.profile.json", 'w') as f:
+                json.dump(asdict(profile), f, indent=2)
+        except OSError as e:
+            logger.warning(f"Failed to save compiler profile of {profile.source}: {e}")
         
     def _on_dependencies_built(self, context: BuildContext) -> None:
         """Called after dependencies are built."""
-        if not self.current_build:
+        with self._lock:
+            build = self._build_for(context)
+        if not build:
             return
             
-        self.current_build.dependencies = {
+        build.dependencies_built_time = time.time()
+        build.dependencies = {
             dep.name: str(dep.version)
             for dep in context.package.get_all_dependencies()
         }
         
+    def _on_link_start(self, context: BuildContext) -> None:
+        """Called before a package is linked."""
+        with self._lock:
+            build = self._build_for(context)
+            if build:
+                build.link_start = time.time()
+                
+    def _on_link_end(self, context: BuildContext) -> None:
+        """Called after a package is linked."""
+        with self._lock:
+            build = self._build_for(context)
+            if build:
+                build.link_end = time.time()
+                
+    def critical_path(
+        self,
+        session: Optional[str] = None,
+        package: Optional[str] = None
+    ) -> Optional[CriticalPathReport]:
+        """Compute the critical path of a recorded build.
+        
+        Args:
+            session: Build session. Defaults to the latest one
+            package: Only consider builds of this top-level package
+            
+        Returns:
+            The report, or None if no matching build was recorded
+        """
+        timings = load_session(self.history, session, package)
+        if not timings:
+            return None
+        return compute_critical_path(timings)
+        
+    def profile_summary(
+        self,
+        session: Optional[str] = None,
+        package: Optional[str] = None,
+        top: int = 20
+    ) -> Optional[ProfileSummary]:
+        """Aggregate the compiler profiles of a profiling build.
+        
+        Args:
+            session: Build session. Defaults to the latest profiled one
+            package: Only consider builds of this top-level package
+            top: Number of headers, templates and TUs to report
+            
+        Returns:
+            The summary, or None if no matching build was profiled
+        """
+        session, profiles = load_profiles(self.profiles_dir, session, package)
+        if not profiles:
+            return None
+        return summarize_profiles(session, profiles, top)
+        
+    def _finish_build(self, package_name: Optional[str]) -> Optional[BuildData]:
+        """Remove a build from the in-progress set.
+        
+        Args:
+            package_name: Package whose build finished, or None for the current build
+            
+        Returns:
+            The finished build, if any
+        """
+        with self._lock:
+            build = self._builds.pop(package_name, None) if package_name else None
+            if build is None:
+                build = self.current_build
+                if build is not None:
+                    self._builds.pop(build.package_name, None)
+            if build is not None and self.current_build is build:
+                self.current_build = next(reversed(self._builds.values()), None)
+            return build
+        
     def _save_build_data(self, context: BuildContext, error: Optional[str] = None) -> None:
-        """Save current build data to file."""
-        if not self.current_build:
+        """Save the build data for the context's package to the build history."""
+        build = self._finish_build(context.package.name)
+        if not build:
             return
             
-        self.current_build.end_time = time.time()
+        build.end_time = time.time()
         if error:
-            self.current_build.success = False
-            self.current_build.error = error
+            build.success = False
+            build.error = error
         else:
-            self.current_build.success = True
-            
-        # Save build data - replace / with _ in package name for safe filename
-        safe_name = context.package.name.replace('/', '_')
-        build_file = self.output_dir / f"build_{safe_name}_{int(time.time())}.json"
-        with open(build_file, 'w') as f:
-            json.dump(self.current_build.to_json(), f, indent=2)
-            
-        self.current_build = None
+            build.success = True
+        self.history.add(build.to_json())
         
     def _on_build_end(self, context: BuildContext) -> None:
         """Called when build ends successfully."""
@@ -193,26 +390,25 @@ class BuildDataCollector:
         
     def on_build_error(self, context: Optional[BuildContext], error: str) -> None:
         """Called when build fails with an error."""
-        if self.current_step:
-            self.current_step.end_time = time.time()
-            self.current_step.success = False
-            self.current_step.error = error
-            if self.current_build:
-                self.current_build.compilation_steps.append(self.current_step)
-            self.current_step = None
+        with self._lock:
+            owner = self._build_for(context) if context else None
+            for source, (step, build) in list(self._active_steps.items()):
+                if owner is not None and build is not owner:
+                    continue
+                step.end_time = time.time()
+                step.success = False
+                step.error = error
+                if build:
+                    build.compilation_steps.append(step)
+                del self._active_steps[source]
             
         if context:
             self._save_build_data(context, error)
         else:
             # If we don't have a context, just save what we have
-            if self.current_build:
-                self.current_build.end_time = time.time()
-                self.current_build.success = False
-                self.current_build.error = error
-                
-                # Save build data with a generic name
-                build_file = self.output_dir / f"build_error_{int(time.time())}.json"
-                with open(build_file, 'w') as f:
-                    json.dump(self.current_build.to_json(), f, indent=2)
-                    
-                self.current_build = None 
\ No newline at end of file
+            build = self._finish_build(None)
+            if build:
+                build.end_time = time.time()
+                build.success = False
+                build.error = error
+                self.history.add(build.to_json())
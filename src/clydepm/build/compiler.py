@@ -0,0 +1,106 @@
+"""
+Compiler discovery with a persistent probe cache.
+"""
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Optional
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+
+from ..core.package import CompilerInfo
+
+logger = logging.getLogger("build")
+
+
+class CompilerProbeCache:
+    """Caches ``--version``/``-dumpmachine`` probes per compiler binary.
+
+    Entries are keyed by the binary's resolved path and validated against its
+    mtime, size and inode, so upgrading or switching the compiler re-probes
+    while unchanged compilers never spawn a process again.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize compiler probe cache.
+
+        Args:
+            path: JSON file probes are persisted in. Defaults to ~/.clydepm/compilers.json
+        """
+        self.path = path or Path.home() / ".clydepm" / "compilers.json"
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.debug("Ignoring unreadable compiler cache %s: %s", self.path, e)
+
+    def probe(self, name: str = "g++") -> CompilerInfo:
+        """Get information about a compiler, probing it only if it changed.
+
+        Args:
+            name: Compiler command, looked up on PATH
+
+        Returns:
+            Compiler information. Version and target are "unknown" if probing failed.
+        """
+        binary = shutil.which(name)
+        if binary is None:
+            logger.error("Compiler not found: %s", name)
+            return CompilerInfo(name=name, version="unknown", target="unknown")
+        binary = os.path.realpath(binary)
+        st = os.stat(binary)
+        state = [st.st_mtime_ns, st.st_size, st.st_ino]
+
+        # Hold the lock while probing so concurrent package builds probe once
+        with self._lock:
+            entry = self._entries.get(binary)
+            if entry is not None and entry["state"] == state and entry["info"]["name"] == name:
+                return CompilerInfo(**entry["info"])
+
+            info = self._run_probe(name)
+            if info.version != "unknown":
+                self._entries[binary] = {"state": state, "info": asdict(info)}
+                self._save()
+            return info
+
+    def _run_probe(self, name: str) -> CompilerInfo:
+        """Ask the compiler for its version and target."""
+        logger.debug("Probing compiler %s", name)
+        try:
+            result = subprocess.run(
+                [name, "--version"],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            version = result.stdout.split("\n")[0].split()[-1]
+
+            result = subprocess.run(
+                [name, "-dumpmachine"],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            target = result.stdout.strip()
+
+            return CompilerInfo(name=name, version=version, target=target)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.error("Failed to get compiler info: %s", e)
+            return CompilerInfo(name=name, version="unknown", target="unknown")
+
+    def _save(self) -> None:
+        """Write probes to disk. Must be called with the lock held."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.debug("Failed to save compiler cache %s: %s", self.path, e)
@@ -0,0 +1,171 @@
+"""
+Critical path analysis of the package DAG of a build.
+
+Each package's own work (compiling and linking, once its dependencies were
+built) is a node weight. The critical path is the heaviest chain of
+dependencies: no amount of parallelism can finish the build faster.
+"""
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .history import BuildHistory
+
+
+@dataclass
+class PackageTiming:
+    """A package's own build work, in seconds."""
+    name: str
+    duration: float
+    dependencies: List[str] = field(default_factory=list)
+    compile_time: float = 0.0  # Wall time from first compile start to last compile end
+    link_time: float = 0.0
+
+
+@dataclass
+class PackageSchedule:
+    """Where a package sits relative to the critical path."""
+    name: str
+    duration: float
+    earliest_start: float  # With unlimited parallelism
+    earliest_finish: float
+    slack: float  # How much longer it could take without delaying the build
+    critical: bool
+    compile_time: float = 0.0
+    link_time: float = 0.0
+
+
+@dataclass
+class CriticalPathReport:
+    """Critical path of one build."""
+    path: List[str]  # Dependencies first, the package bounding the build last
+    length: float  # Seconds along the critical path
+    total_work: float  # Seconds of work across all packages
+    packages: List[PackageSchedule]
+
+    @property
+    def speedup(self) -> float:
+        """Best possible speedup of building packages in parallel over one at a time."""
+        return self.total_work / self.length if self.length else 1.0
+
+    def to_json(self) -> Dict[str, Any]:
+        """Convert to JSON-serializable dict."""
+        return {
+            "path": self.path,
+            "length": self.length,
+            "total_work": self.total_work,
+            "speedup": self.speedup,
+            "packages": [asdict(package) for package in self.packages],
+        }
+
+
+def compute_critical_path(timings: Dict[str, PackageTiming]) -> CriticalPathReport:
+    """Compute the critical path through a package DAG.
+
+    Dependencies not in ``timings`` (e.g. built by an earlier build) are
+    treated as already done.
+
+    Raises:
+        ValueError: If the dependencies form a cycle
+    """
+    deps = {
+        name: sorted(set(timing.dependencies) & set(timings) - {name})
+        for name, timing in timings.items()
+    }
+
+    # Topological order, dependencies first
+    order: List[str] = []
+    remaining = {name: set(d) for name, d in deps.items()}
+    while remaining:
+        ready = sorted(name for name, d in remaining.items() if not d)
+        if not ready:
+            raise ValueError(f"Dependency cycle among: {', '.join(sorted(remaining))}")
+        order.extend(ready)
+        for name in ready:
+            del remaining[name]
+        for d in remaining.values():
+            d.difference_update(ready)
+
+    earliest_finish: Dict[str, float] = {}
+    for name in order:
+        start = max((earliest_finish[dep] for dep in deps[name]), default=0.0)
+        earliest_finish[name] = start + timings[name].duration
+    length = max(earliest_finish.values(), default=0.0)
+
+    # Latest finish that doesn't delay the build, walking back from the end
+    dependents: Dict[str, List[str]] = {name: [] for name in timings}
+    for name, d in deps.items():
+        for dep in d:
+            dependents[dep].append(name)
+    latest_finish: Dict[str, float] = {}
+    for name in reversed(order):
+        latest_finish[name] = min(
+            (latest_finish[dependent] - timings[dependent].duration for dependent in dependents[name]),
+            default=length,
+        )
+
+    path: List[str] = []
+    if order:
+        current: Optional[str] = max(order, key=lambda name: earliest_finish[name])
+        while current is not None:
+            path.append(current)
+            current = max(deps[current], key=lambda dep: earliest_finish[dep], default=None)
+        path.reverse()
+
+    on_path = set(path)
+    packages = [
+        PackageSchedule(
+            name=name,
+            duration=timings[name].duration,
+            earliest_start=earliest_finish[name] - timings[name].duration,
+            earliest_finish=earliest_finish[name],
+            slack=max(0.0, latest_finish[name] - earliest_finish[name]),
+            critical=name in on_path,
+            compile_time=timings[name].compile_time,
+            link_time=timings[name].link_time,
+        )
+        for name in order
+    ]
+    return CriticalPathReport(
+        path=path,
+        length=length,
+        total_work=sum(timing.duration for timing in timings.values()),
+        packages=packages,
+    )
+
+
+def timing_from_build_data(data: Dict[str, Any]) -> PackageTiming:
+    """Get a package's own work from a build data file written by BuildDataCollector."""
+    phases = data.get("phases") or {}
+    duration = phases.get("own")
+    if duration is None:
+        duration = (data.get("timing") or {}).get("duration") or 0.0
+    name = data["package"]["name"]
+    return PackageTiming(
+        name=name,
+        duration=duration,
+        dependencies=list((data.get("dependency_graph") or {}).get(name, [])),
+        compile_time=phases.get("compile") or 0.0,
+        link_time=phases.get("link") or 0.0,
+    )
+
+
+def load_session(
+    history: BuildHistory,
+    session: Optional[str] = None,
+    package: Optional[str] = None
+) -> Dict[str, PackageTiming]:
+    """Load the package timings of one build session.
+
+    Args:
+        history: Build history BuildDataCollector records builds in
+        session: Session to load. Defaults to the latest one
+        package: Only consider sessions building this top-level package
+
+    Returns:
+        Timings by package name, empty if there is no matching session
+    """
+    session = session or history.latest_session(package)
+    if session is None:
+        return {}
+    builds = history.builds(session=session, root=package, steps=False)
+    return {timing.name: timing for timing in map(timing_from_build_data, builds)}
@@ -0,0 +1,277 @@
+"""
+Local build daemon that keeps packages, dependency graphs and caches warm.
+
+The daemon listens on a Unix socket and speaks JSON lines: each request is one
+JSON object with a ``command`` ("build", "status" or "stop"), answered by one
+JSON object.
+"""
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from ..core.package import Package, load_package
+from .builder import Builder, BuildResult
+from .watch import create_watcher
+
+logger = logging.getLogger("build")
+
+
+def get_socket_path() -> Path:
+    """Get the default daemon socket path (~/.clydepm/daemon.sock)."""
+    return Path(os.environ.get("CLYDE_DAEMON_SOCKET", Path.home() / ".clydepm" / "daemon.sock"))
+
+
+class DaemonUnavailable(ConnectionError):
+    """Raised when no daemon is listening on the socket."""
+    pass
+
+
+class BuildDaemon:
+    """Serves build requests from a long-lived Builder.
+
+    Parsed top-level packages and resolved dependency graphs are kept between
+    builds and dropped whenever a watched package.yml changes. The builder
+    itself keeps the compiler probe, file-state index and header dependency
+    databases in memory.
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[Path] = None,
+        cache_dir: Optional[Path] = None,
+        jobs: Optional[str] = None,
+        poll_interval: float = 0.5
+    ):
+        """Initialize daemon.
+
+        Args:
+            socket_path: Socket to listen on. Defaults to get_socket_path()
+            cache_dir: Build cache directory. Defaults to ~/.clydepm/cache
+            jobs: Job count for the builder ("auto" for one per CPU)
+            poll_interval: Seconds between filesystem polls, if inotify is unavailable
+        """
+        self.socket_path = socket_path or get_socket_path()
+        self.builder = Builder(cache_dir=cache_dir, jobs=jobs)
+        self.builder.graph_cache = {}
+        self.started = time.time()
+        self.builds = 0
+        self._packages: Dict[Path, Package] = {}
+        self._build_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self.watcher = create_watcher(self._on_change, poll_interval=poll_interval)
+        self._server: Optional[socketserver.UnixStreamServer] = None
+
+    def _on_change(self, changed: Set[Path]) -> None:
+        """Drop cached packages and graphs after a package.yml changed."""
+        if not any(path.name == "package.yml" for path in changed):
+            return
+        logger.info("Package configuration changed, dropping cached packages")
+        with self._state_lock:
+            self._packages.clear()
+            self.builder.graph_cache.clear()
+
+    def _get_package(self, path: Path) -> Package:
+        """Get a parsed package, loading and watching it on first use."""
+        path = path.resolve()
+        with self._state_lock:
+            package = self._packages.get(path)
+        if package is not None:
+            return package
+
+        package = load_package(path)
+        self._watch(package)
+        with self._state_lock:
+            self._packages[path] = package
+        return package
+
+    def _watch(self, package: Package) -> None:
+        """Watch the package.yml of a package and of all its dependencies."""
+        watched = [package.path / "package.yml"]
+        try:
+            _, packages = self.builder._dependency_graph(package)
+            watched.extend(dep.path / "package.yml" for dep in packages.values())
+        except ValueError:
+            pass  # Reported by the build itself
+        self.watcher.watch(watched)
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle one request.
+
+        Returns:
+            Response object
+        """
+        command = request.get("command")
+        if command == "status":
+            with self._state_lock:
+                cached = len(self._packages)
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "uptime": time.time() - self.started,
+                "builds": self.builds,
+                "packages": cached,
+            }
+        if command == "stop":
+            threading.Thread(target=self.shutdown, name="clyde-daemon-stop").start()
+            return {"ok": True}
+        if command == "build":
+            try:
+                package = self._get_package(Path(request["path"]))
+            except Exception as e:
+                return {"ok": True, "success": False, "error": f"Failed to load package: {e}"}
+            with self._build_lock:
+                result = self.builder.build(
+                    package,
+                    request.get("traits") or {},
+                    bool(request.get("verbose"))
+                )
+                self.builds += 1
+                if self.builder.installed_dependencies:
+                    # Replaced deps/ directories took their watches with them
+                    self._watch(package)
+            return {
+                "ok": True,
+                "success": result.success,
+                "error": result.error,
+                "artifacts": {k: str(v) for k, v in (result.artifacts or {}).items()},
+                "up_to_date": result.up_to_date,
+            }
+        return {"ok": False, "error": f"Unknown command: {command}"}
+
+    def serve_forever(self) -> None:
+        """Listen on the socket until stopped."""
+        if self.socket_path.exists():
+            if _is_listening(self.socket_path):
+                raise RuntimeError(f"A daemon is already running on {self.socket_path}")
+            self.socket_path.unlink()  # Left behind by a daemon that died
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for line in self.rfile:
+                    try:
+                        response = daemon.handle(json.loads(line))
+                    except Exception as e:
+                        logger.error("Daemon request failed: %s", e)
+                        response = {"ok": False, "error": str(e)}
+                    self.wfile.write(json.dumps(response).encode() + b"\n")
+                    self.wfile.flush()
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        # Create the socket owner-only; chmod after bind would leave a window
+        # in which any local user could connect and run builds
+        old_umask = os.umask(0o077)
+        try:
+            self._server = Server(str(self.socket_path), Handler)
+        finally:
+            os.umask(old_umask)
+        self.watcher.start()
+        logger.info("Build daemon listening on %s (pid %d)", self.socket_path, os.getpid())
+        try:
+            self._server.serve_forever()
+        finally:
+            self.watcher.stop()
+            self._server.server_close()
+            self.socket_path.unlink(missing_ok=True)
+
+    def shutdown(self) -> None:
+        """Stop serving, after any running build finishes."""
+        with self._build_lock:
+            if self._server is not None:
+                self._server.shutdown()
+
+
+def _is_listening(socket_path: Path) -> bool:
+    """Check whether something accepts connections on a socket."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+            return True
+        except OSError:
+            return False
+
+
+class DaemonClient:
+    """Talks to a running build daemon."""
+
+    def __init__(self, socket_path: Optional[Path] = None, timeout: Optional[float] = None):
+        """Initialize client.
+
+        Args:
+            socket_path: Daemon socket. Defaults to get_socket_path()
+            timeout: Seconds to wait for a response (None waits forever)
+        """
+        self.socket_path = socket_path or get_socket_path()
+        self.timeout = timeout
+
+    def request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one request and wait for its response.
+
+        Raises:
+            DaemonUnavailable: If no daemon is listening
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(str(self.socket_path))
+            except OSError as e:
+                raise DaemonUnavailable(f"No build daemon on {self.socket_path}: {e}")
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as stream:
+                line = stream.readline()
+        if not line:
+            raise DaemonUnavailable("Build daemon closed the connection")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error") or "Daemon request failed")
+        return response
+
+    def build(
+        self,
+        path: Path,
+        traits: Optional[Dict[str, str]] = None,
+        verbose: bool = False
+    ) -> BuildResult:
+        """Build a package in the daemon."""
+        response = self.request({
+            "command": "build",
+            "path": str(Path(path).resolve()),
+            "traits": traits or {},
+            "verbose": verbose,
+        })
+        return BuildResult(
+            success=response["success"],
+            error=response.get("error"),
+            artifacts={k: Path(v) for k, v in (response.get("artifacts") or {}).items()},
+            up_to_date=response.get("up_to_date", False),
+        )
+
+    def status(self) -> Dict[str, Any]:
+        """Get daemon status."""
+        return self.request({"command": "status"})
+
+    def stop(self) -> None:
+        """Ask the daemon to exit."""
+        self.request({"command": "stop"})
+
+
+def main() -> None:
+    """Run a daemon in the foreground: python -m clydepm.build.daemon [socket] [jobs]."""
+    socket_path = Path(sys.argv[1]) if len(sys.argv) > 1 else None
+    jobs = sys.argv[2] if len(sys.argv) > 2 else None
+    BuildDaemon(socket_path, jobs=jobs).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Compiler depfile parsing and per-package header dependency tracking.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def parse_depfile(depfile: Path, base_dir: Optional[Path] = None) -> List[Path]:
+    """Parse a Makefile-style depfile written by ``-MMD -MF``.
+
+    Args:
+        depfile: Path to the depfile
+        base_dir: Directory relative prerequisites are resolved against.
+            Defaults to the depfile's directory.
+
+    Returns:
+        Absolute paths of all prerequisites, in the order the compiler listed them
+    """
+    base_dir = base_dir or depfile.parent
+    text = depfile.read_text()
+
+    # Join continuation lines, keeping escaped spaces inside file names
+    text = text.replace("\\\r\n", " ").replace("\\\n", " ")
+
+    prerequisites: List[Path] = []
+    seen = set()
+    for line in text.splitlines():
+        # Skip the target: everything up to the first unescaped ": "
+        _, sep, rest = line.partition(": ")
+        if not sep:
+            continue
+        token = ""
+        tokens = []
+        i = 0
+        while i < len(rest):
+            char = rest[i]
+            if char == "\\" and i + 1 < len(rest) and rest[i + 1] in " #":
+                token += rest[i + 1]
+                i += 2
+                continue
+            if char.isspace():
+                if token:
+                    tokens.append(token)
+                token = ""
+            elif char == "$" and rest[i + 1:i + 2] == "$":
+                token += "$"
+                i += 1
+            else:
+                token += char
+            i += 1
+        if token:
+            tokens.append(token)
+
+        for token in tokens:
+            path = Path(os.path.normpath(base_dir / token))
+            if path not in seen:
+                seen.add(path)
+                prerequisites.append(path)
+
+    return prerequisites
+
+
+class DependencyDatabase:
+    """Persistent map from each source file to the headers it includes.
+
+    Filled from compiler depfiles after every compilation and consulted before
+    the next one, so cache keys can cover the headers a translation unit
+    actually uses.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize dependency database.
+
+        Args:
+            path: JSON file the database is stored in
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries: Dict[str, List[str]] = {}
+        if path.exists():
+            try:
+                with open(path) as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.debug("Ignoring unreadable dependency database %s: %s", path, e)
+
+    def get(self, source: Path) -> Optional[List[Path]]:
+        """Get the headers a source included when it was last compiled.
+
+        Returns:
+            Header paths, or None if the source has never been compiled
+        """
+        with self._lock:
+            headers = self._entries.get(str(source))
+        if headers is None:
+            return None
+        return [Path(h) for h in headers]
+
+    def update(self, source: Path, headers: List[Path]) -> None:
+        """Record the headers a source included."""
+        value = [str(h) for h in headers]
+        with self._lock:
+            if self._entries.get(str(source)) != value:
+                self._entries[str(source)] = value
+                self._dirty = True
+
+    def save(self) -> None:
+        """Write the database to disk if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
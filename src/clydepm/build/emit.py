@@ -0,0 +1,250 @@
+"""
+Export the builder's command model as build.ninja and compile_commands.json.
+"""
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+import json
+import logging
+import shlex
+
+from ..core.package import Package, PackageType
+
+if TYPE_CHECKING:
+    from .builder import Builder
+
+logger = logging.getLogger("build")
+
+
+class EmitFormat(str, Enum):
+    """Build description formats that can be emitted."""
+    NINJA = "ninja"
+    COMPILE_COMMANDS = "compile-commands"
+
+
+@dataclass
+class CompileStep:
+    """One compiler invocation. Paths are absolute."""
+    source: Path
+    object: Path
+    depfile: Path
+    directory: Path
+    command: List[str]
+    pch: Optional[Path] = None  # Precompiled header this compile uses
+
+
+@dataclass
+class LinkStep:
+    """The archiver or linker invocation producing a package's output."""
+    output: Path
+    inputs: List[Path]
+    directory: Path
+    command: List[str]
+    archive: bool
+
+
+@dataclass
+class PackagePlan:
+    """Every command needed to build one package."""
+    package: Package
+    build_dir: Path
+    compiles: List[CompileStep] = field(default_factory=list)
+    link: Optional[LinkStep] = None
+    pch: Optional[CompileStep] = None  # Precompiles the package's pch header
+
+
+def plan_build(
+    builder: "Builder",
+    package: Package,
+    traits: Optional[Dict[str, str]] = None
+) -> List[PackagePlan]:
+    """Compute the commands a build of a package and its dependencies would run.
+
+    Nothing is compiled; build directories are created so the commands match
+    the ones a real build would produce.
+
+    Args:
+        builder: Builder whose command model to use
+        package: Top-level package
+        traits: Optional build traits
+
+    Returns:
+        One plan per package, dependencies before their dependents
+
+    Raises:
+        ValueError: If dependencies can't be resolved
+    """
+    graph, packages = builder._dependency_graph(package)
+
+    # Dependencies first, in a stable topological order
+    order: List[str] = []
+    remaining = {name: set(deps) & set(graph) for name, deps in graph.items()}
+    while remaining:
+        ready = sorted(name for name, deps in remaining.items() if not deps)
+        if not ready:
+            raise ValueError(f"Dependency cycle among: {', '.join(sorted(remaining))}")
+        for name in ready:
+            order.append(name)
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    targets = [(packages[name], package) for name in order] + [(package, None)]
+    for target, parent in targets:
+        builder._build_dir(target, parent).mkdir(parents=True, exist_ok=True)
+
+    plans = []
+    for target, parent in targets:
+        build_dir = builder._build_dir(target, parent).absolute()
+        build_metadata = builder._create_build_metadata(target, traits)
+        plan = PackagePlan(package=target, build_dir=build_dir)
+
+        if target.get_pch() is not None:
+            stub = builder._write_pch_stub(target, build_dir)
+            plan.pch = CompileStep(
+                source=build_dir / stub,
+                object=build_dir / f"{stub}.gch",
+                depfile=build_dir / f"{stub}.d",
+                directory=build_dir,
+                command=builder._pch_command(target, build_metadata, build_dir),
+            )
+
+        sources, objects = builder._source_objects(target, build_dir)
+        for source, object_path in zip(sources, objects):
+            plan.compiles.append(CompileStep(
+                source=Path(source).absolute(),
+                object=build_dir / object_path,
+                depfile=build_dir / object_path.with_suffix(".d"),
+                directory=build_dir,
+                command=builder._compile_command(source, object_path, target, build_metadata, build_dir),
+                pch=plan.pch.object if builder._uses_pch(target, source) else None,
+            ))
+
+        output = builder._output_name(target)
+        inputs = [step.object for step in plan.compiles]
+        if target.package_type != PackageType.LIBRARY:
+            for dep in target.get_all_dependencies():
+                if dep.package_type == PackageType.LIBRARY:
+                    inputs.append(
+                        (target.get_build_path(dep.name) / f"lib{dep.package_name}.a").absolute()
+                    )
+        plan.link = LinkStep(
+            output=build_dir / output,
+            inputs=inputs,
+            directory=build_dir,
+            command=builder._link_command(objects, output, target, build_metadata, build_dir),
+            archive=target.package_type == PackageType.LIBRARY,
+        )
+        plans.append(plan)
+
+    return plans
+
+
+def write_compile_commands(plans: Sequence[PackagePlan], path: Path) -> None:
+    """Write a compilation database for clangd and other tools."""
+    entries = [
+        {
+            "directory": str(step.directory),
+            "arguments": step.command,
+            "file": str(step.source),
+            "output": str(step.object),
+        }
+        for plan in plans
+        for step in plan.compiles
+    ]
+    with open(path, "w") as f:
+        json.dump(entries, f, indent=2)
+
+
+def _ninja_path(path: Path) -> str:
+    """Escape a path for use in a ninja build line."""
+    return str(path).replace("$", "$$").replace(" ", "$ ").replace(":", "$:")
+
+
+def _ninja_value(value: str) -> str:
+    """Escape a variable value."""
+    return value.replace("$", "$$")
+
+
+def _ninja_command(directory: Path, command: List[str], prefix: str = "") -> str:
+    return _ninja_value(f"cd {shlex.quote(str(directory))} && {prefix}{shlex.join(command)}")
+
+
+def write_ninja(plans: Sequence[PackagePlan], path: Path) -> None:
+    """Write a ninja build file running the same commands as the builder.
+
+    Commands run in each package's build directory, exactly as the builder
+    runs them, so every path in them stays valid.
+    """
+    lines = [
+        "# Generated by clyde build --emit ninja; do not edit.",
+        "ninja_required_version = 1.3",
+        f"builddir = {_ninja_value(str(path.parent.absolute()))}",
+        "",
+        "rule compile",
+        "  command = $cmd",
+        "  description = CC $out",
+        "  depfile = $depfile",
+        "  deps = gcc",
+        "",
+        "rule archive",
+        "  command = $cmd",
+        "  description = AR $out",
+        "",
+        "rule link",
+        "  command = $cmd",
+        "  description = LINK $out",
+        "",
+    ]
+
+    outputs = []
+    for plan in plans:
+        lines.append(f"# {plan.package.name}")
+        steps = ([plan.pch] if plan.pch else []) + plan.compiles
+        for step in steps:
+            implicit = f" | {_ninja_path(step.pch)}" if step.pch else ""
+            lines.append(f"build {_ninja_path(step.object)}: compile {_ninja_path(step.source)}{implicit}")
+            lines.append(f"  cmd = {_ninja_command(step.directory, step.command)}")
+            lines.append(f"  depfile = {_ninja_value(str(step.depfile))}")
+        link = plan.link
+        rule = "archive" if link.archive else "link"
+        # ar updates archives in place; start from an empty one like the builder does
+        prefix = f"rm -f {shlex.quote(link.output.name)} && " if link.archive else ""
+        inputs = " ".join(_ninja_path(p) for p in link.inputs)
+        lines.append(f"build {_ninja_path(link.output)}: {rule} {inputs}")
+        lines.append(f"  cmd = {_ninja_command(link.directory, link.command, prefix)}")
+        lines.append("")
+        outputs.append(link.output)
+
+    lines.append(f"default {_ninja_path(outputs[-1])}")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def emit(
+    builder: "Builder",
+    package: Package,
+    formats: Sequence[EmitFormat],
+    traits: Optional[Dict[str, str]] = None
+) -> Dict[EmitFormat, Path]:
+    """Write build descriptions for a package and its dependencies.
+
+    build.ninja goes into the package's build directory (run it with
+    ``ninja -f .build/build.ninja``); compile_commands.json goes into the
+    package root, where clangd looks for it.
+
+    Returns:
+        Path written for each format
+    """
+    plans = plan_build(builder, package, traits)
+    written = {}
+    for fmt in formats:
+        if fmt == EmitFormat.NINJA:
+            path = package.get_build_dir() / "build.ninja"
+            write_ninja(plans, path)
+        else:
+            path = package.path / "compile_commands.json"
+            write_compile_commands(plans, path)
+        logger.debug("Wrote %s", path)
+        written[fmt] = path
+    return written
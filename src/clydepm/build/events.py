@@ -0,0 +1,249 @@
+"""
+Live build events.
+
+Builders publish an event per hook stage (and per failure) as a JSON datagram
+on a Unix socket. Sending never blocks: if nobody is listening or the socket
+buffer is full, the event is dropped, so watching a build can't slow it down.
+The build inspector listens on the socket and fans events out through an
+EventBus, which gives every subscriber its own bounded buffer.
+"""
+from collections import deque
+from functools import partial
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+from .hooks import BuildContext, BuildStage
+
+logger = logging.getLogger("build")
+
+# Long compiler errors are cut so every event fits in one datagram
+MAX_ERROR_LENGTH = 8192
+
+# After finding nobody listening, wait this long before trying again
+_RETRY_INTERVAL = 1.0
+
+
+def get_events_socket_path() -> Path:
+    """Get the default build events socket path (~/.clydepm/events.sock)."""
+    return Path(os.environ.get("CLYDE_EVENTS_SOCKET", Path.home() / ".clydepm" / "events.sock"))
+
+
+class EventPublisher:
+    """Sends build events to whoever listens on the events socket."""
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize publisher.
+
+        Args:
+            path: Socket to send to. Defaults to get_events_socket_path()
+        """
+        self.path = path or get_events_socket_path()
+        self.dropped = 0
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+        self._idle_until = 0.0  # No listener was found until this time
+
+    def register_hooks(self, builder) -> None:
+        """Publish an event for every hook stage of a builder."""
+        for stage in BuildStage:
+            builder.add_hook(stage, partial(self._on_stage, stage))
+
+    def _on_stage(self, stage: BuildStage, context: BuildContext) -> None:
+        event: Dict[str, Any] = {"type": stage.name.lower(), "package": context.package.name}
+        if context.source_file:
+            event["source"] = str(context.source_file)
+        if context.object_file:
+            event["object"] = str(context.object_file)
+        if stage == BuildStage.POST_COMPILE:
+            event["cache_hit"] = context.cache_hit
+        if context.output_file:
+            event["output"] = str(context.output_file)
+        self.publish(event)
+
+    def publish_error(self, context: BuildContext, error: str) -> None:
+        """Publish that a package failed to build."""
+        self.publish({"type": "error", "package": context.package.name, "error": error[:MAX_ERROR_LENGTH]})
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Send an event, or drop it if it can't be sent right away."""
+        now = time.time()
+        if now < self._idle_until:
+            return
+        event = {"time": now, "pid": os.getpid(), **event}
+        try:
+            self._socket.sendto(json.dumps(event).encode(), str(self.path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            # Nobody listening; don't pay for a failed send per event
+            self._idle_until = now + _RETRY_INTERVAL
+        except OSError:
+            # Listener's buffer is full (or the event is too big); never wait
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Close the socket."""
+        self._socket.close()
+
+
+class Subscription:
+    """A subscriber's bounded buffer of events.
+
+    When the buffer is full the oldest event is dropped and counted, so a
+    slow subscriber misses events instead of holding anything up.
+    """
+
+    def __init__(self, bus: "EventBus", size: int, loop: asyncio.AbstractEventLoop):
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self.dropped = 0
+        self._bus = bus
+        self._loop = loop
+        self._ready = asyncio.Event()
+
+    def push(self, event: Dict[str, Any]) -> None:
+        """Add an event. Safe to call from any thread."""
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append(event)
+        self._loop.call_soon_threadsafe(self._ready.set)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for the next event.
+
+        Returns:
+            The event, or None if none arrived within the timeout
+        """
+        while not self.events:
+            self._ready.clear()
+            if self.events:
+                break
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self.events.popleft()
+
+    def close(self) -> None:
+        """Stop receiving events."""
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    """Fans events out to subscribers."""
+
+    def __init__(self, buffer_size: int = 1024):
+        """Initialize bus.
+
+        Args:
+            buffer_size: Events buffered per subscriber before the oldest are dropped
+        """
+        self.buffer_size = buffer_size
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Subscription:
+        """Start receiving events on the calling thread's event loop."""
+        subscription = Subscription(self, self.buffer_size, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Deliver an event to every subscriber, without waiting on any."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.push(event)
+            except RuntimeError:
+                # The subscriber's event loop is gone
+                self.unsubscribe(subscription)
+
+
+class EventListener:
+    """Receives events from builders on the events socket and publishes them on a bus."""
+
+    def __init__(self, bus: EventBus, path: Optional[Path] = None):
+        """Initialize listener.
+
+        Args:
+            bus: Bus to publish received events on
+            path: Socket to listen on. Defaults to get_events_socket_path()
+        """
+        self.bus = bus
+        self.path = path or get_events_socket_path()
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Bind the socket and start receiving in a background thread.
+
+        Raises:
+            OSError: If another listener is using the socket
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # Owner-only, like the daemon socket, so other users can't inject events
+        old_umask = os.umask(0o077)
+        try:
+            try:
+                self._socket.bind(str(self.path))
+            except OSError:
+                if not self._is_stale():
+                    self._socket.close()
+                    raise
+                self.path.unlink()
+                self._socket.bind(str(self.path))
+        finally:
+            os.umask(old_umask)
+        self._socket.settimeout(0.5)
+        self._thread = threading.Thread(target=self._receive, name="clyde-events", daemon=True)
+        self._thread.start()
+
+    def _is_stale(self) -> bool:
+        """Check whether the socket file is left over from a listener that exited."""
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            probe.connect(str(self.path))
+            return False
+        except ConnectionRefusedError:
+            return True
+        except OSError:
+            return False
+        finally:
+            probe.close()
+
+    def _receive(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                data = self._socket.recv(65536 + MAX_ERROR_LENGTH)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                event = json.loads(data)
+            except ValueError:
+                logger.debug("Ignoring malformed build event")
+                continue
+            self.bus.publish(event)
+
+    def stop(self) -> None:
+        """Stop receiving and remove the socket."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._socket is not None:
+            self._socket.close()
+            self.path.unlink(missing_ok=True)
@@ -0,0 +1,110 @@
+"""
+Stat-validated file digest index for the build cache.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# A file modified this recently may still change within the same timestamp
+# tick, so its stat can't vouch for its digest on a later run
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def hash_file(path: Path) -> str:
+    """Generate a SHA-256 hash of a file's contents."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class FileStateIndex:
+    """Maps file paths to (mtime_ns, size, inode, digest).
+
+    A file whose stat still matches its entry is not read again. Digests are
+    also memoized in process until the next ``flush()``, so within one build
+    each file is hashed (or even stat'ed) at most once.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize file state index.
+
+        Args:
+            path: JSON file the index is persisted in
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._memo: Dict[str, str] = {}
+        self._entries: Dict[str, List] = {}
+        if path.exists():
+            try:
+                with open(path) as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.debug("Ignoring unreadable file state index %s: %s", path, e)
+
+    @staticmethod
+    def _state(st: os.stat_result) -> Tuple[int, int, int]:
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def digest(self, path: Path) -> str:
+        """Get the content digest of a file, reading it only if its stat changed.
+
+        Raises:
+            OSError: If the file can't be stat'ed or read
+        """
+        key = str(path)
+        with self._lock:
+            digest = self._memo.get(key)
+            if digest is not None:
+                return digest
+            entry = self._entries.get(key)
+
+        st = os.stat(path)
+        state = self._state(st)
+        if entry is not None and tuple(entry[:3]) == state:
+            digest = entry[3]
+        else:
+            digest = hash_file(path)
+
+        with self._lock:
+            self._memo[key] = digest
+            if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+                # Too fresh to trust next time; keep it for this build only
+                if self._entries.pop(key, None) is not None:
+                    self._dirty = True
+            elif entry is None or entry != [*state, digest]:
+                self._entries[key] = [*state, digest]
+                self._dirty = True
+        return digest
+
+    def flush(self) -> None:
+        """Persist the index if it changed and forget in-process digests.
+
+        Entries of files that no longer exist (deleted sources, temporary build
+        outputs) are dropped, so the index only holds files still on disk.
+        """
+        with self._lock:
+            seen = set(self._memo)
+            self._memo.clear()
+            if not self._dirty:
+                return
+            self._entries = {
+                key: entry for key, entry in self._entries.items()
+                if key in seen or os.path.exists(key)
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
@@ -0,0 +1,376 @@
+"""
+Build history store.
+
+Every finished build is appended to one SQLite database in the build data
+directory, with a row per build, per compilation step and per resolved
+dependency. Builds are indexed by package, session and start time, so
+readers such as the build inspector query what they need instead of
+parsing every build ever recorded.
+
+Builds are exchanged in the JSON shape of ``BuildData.to_json()``, the
+format of the per-build JSON files earlier versions wrote. Those files are
+imported once, then moved to ``migrated/``.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger("build")
+
+SCHEMA_VERSION = 1
+
+# Build ids bound per IN (...) query; SQLite before 3.32 allows 999 parameters
+_ID_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    package TEXT NOT NULL,
+    version TEXT NOT NULL,
+    session TEXT,
+    root TEXT,
+    start_time REAL NOT NULL,
+    end_time REAL,
+    success INTEGER NOT NULL,
+    error TEXT,
+    compiler TEXT NOT NULL,
+    dependency_graph TEXT NOT NULL,
+    include_paths TEXT NOT NULL,
+    library_paths TEXT NOT NULL,
+    phases TEXT,
+    imported_from TEXT UNIQUE
+);
+CREATE INDEX IF NOT EXISTS builds_package_time ON builds (package, start_time);
+CREATE INDEX IF NOT EXISTS builds_time ON builds (start_time);
+CREATE INDEX IF NOT EXISTS builds_session ON builds (session);
+
+CREATE TABLE IF NOT EXISTS steps (
+    id INTEGER PRIMARY KEY,
+    build_id INTEGER NOT NULL REFERENCES builds (id),
+    source TEXT NOT NULL,
+    object TEXT NOT NULL,
+    command TEXT NOT NULL,
+    include_paths TEXT NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL,
+    success INTEGER NOT NULL,
+    error TEXT,
+    worker TEXT,
+    cache_hit INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS steps_build ON steps (build_id);
+
+CREATE TABLE IF NOT EXISTS dependencies (
+    build_id INTEGER NOT NULL REFERENCES builds (id),
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    PRIMARY KEY (build_id, name)
+);
+CREATE INDEX IF NOT EXISTS dependencies_name ON dependencies (name);
+"""
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    """Convert an ISO timestamp from build JSON to seconds since the epoch."""
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def _isoformat(value: Optional[float]) -> Optional[str]:
+    """Convert seconds since the epoch to an ISO timestamp for build JSON."""
+    return datetime.fromtimestamp(value).isoformat() if value is not None else None
+
+
+def _timing(start: float, end: Optional[float]) -> Dict[str, Any]:
+    return {
+        "start": _isoformat(start),
+        "end": _isoformat(end),
+        "duration": end - start if end is not None else None
+    }
+
+
+class BuildHistory:
+    """Append-only store of finished builds.
+
+    Safe to use from several threads; several processes (e.g. the build daemon
+    and the inspector) may open the same database.
+    """
+
+    def __init__(self, path: Path):
+        """Open or create a build history database.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            # Readers don't block the writer and vice versa
+            self._db.execute("PRAGMA journal_mode=WAL")
+            version = self._db.execute("PRAGMA user_version").fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise RuntimeError(
+                    f"Build history {path} is from a newer clydepm (schema {version})"
+                )
+            self._db.executescript(_SCHEMA)
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def add(self, data: Dict[str, Any], imported_from: Optional[str] = None) -> int:
+        """Append a build.
+
+        Args:
+            data: Build in the shape of ``BuildData.to_json()``
+            imported_from: JSON file the build was migrated from
+
+        Returns:
+            ID of the build
+        """
+        with self._lock, self._db:
+            return self._insert(data, imported_from)
+
+    def _insert(self, data: Dict[str, Any], imported_from: Optional[str]) -> int:
+        """Insert a build. Must be called with the lock held, in a transaction."""
+        timing = data.get("timing") or {}
+        cursor = self._db.execute(
+            "INSERT INTO builds (package, version, session, root, start_time, end_time, success, "
+            "error, compiler, dependency_graph, include_paths, library_paths, phases, imported_from) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                data["package"]["name"],
+                data["package"]["version"],
+                data.get("session"),
+                data.get("root"),
+                _timestamp(timing.get("start")),
+                _timestamp(timing.get("end")),
+                bool(data.get("success")),
+                data.get("error"),
+                json.dumps(data.get("compiler") or {}),
+                json.dumps(data.get("dependency_graph") or {}),
+                json.dumps(data.get("include_paths") or []),
+                json.dumps(data.get("library_paths") or []),
+                json.dumps(data["phases"]) if data.get("phases") else None,
+                imported_from,
+            )
+        )
+        build_id = cursor.lastrowid
+        self._db.executemany(
+            "INSERT INTO steps (build_id, source, object, command, include_paths, start_time, "
+            "end_time, success, error, worker, cache_hit) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    build_id,
+                    step["source"],
+                    step["object"],
+                    json.dumps(step.get("command") or []),
+                    json.dumps(step.get("include_paths") or []),
+                    _timestamp(step["timing"]["start"]),
+                    _timestamp(step["timing"].get("end")),
+                    bool(step.get("success")),
+                    step.get("error"),
+                    step.get("worker"),
+                    bool(step.get("cache_hit")),
+                )
+                for step in data.get("compilation_steps", [])
+            ]
+        )
+        self._db.executemany(
+            "INSERT INTO dependencies (build_id, name, version) VALUES (?, ?, ?)",
+            [(build_id, name, version) for name, version in (data.get("dependencies") or {}).items()]
+        )
+        return build_id
+
+    def migrate(self, directory: Path) -> int:
+        """Import the per-build JSON files earlier versions wrote.
+
+        Imported files are moved to ``directory/migrated``. Unreadable files
+        are left where they are.
+
+        Args:
+            directory: Build data directory
+
+        Returns:
+            Number of builds imported
+        """
+        files = sorted(directory.glob("build_*.json"))
+        if not files:
+            return 0
+        archive = directory / "migrated"
+        archive.mkdir(exist_ok=True)
+        imported = 0
+        for path in files:
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                with self._lock, self._db:
+                    known = self._db.execute(
+                        "SELECT 1 FROM builds WHERE imported_from = ?", (path.name,)
+                    ).fetchone()
+                    if not known:
+                        self._insert(data, path.name)
+                        imported += 1
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning("Failed to import build data %s: %s", path, e)
+                continue
+            path.replace(archive / path.name)
+        if imported:
+            logger.info("Imported %d builds into %s", imported, self.path)
+        return imported
+
+    def builds(
+        self,
+        package: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        session: Optional[str] = None,
+        root: Optional[str] = None,
+        success: Optional[bool] = None,
+        before: Optional[int] = None,
+        limit: Optional[int] = None,
+        steps: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Query builds, newest first.
+
+        Args:
+            package: Only builds of this package
+            since: Only builds started at or after this time (seconds since the epoch)
+            until: Only builds started before this time
+            session: Only builds of this session
+            root: Only builds whose top-level package is this one
+            success: Only successful (True) or failed (False) builds
+            before: Only builds after this one in the order, to page through
+                results by passing the ID of the last build of the previous page
+            limit: Maximum number of builds
+            steps: Whether to load compilation steps
+
+        Returns:
+            Builds in the shape of ``BuildData.to_json()``, with an ``id``
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, op, value in (
+            ("package", "=", package),
+            ("start_time", ">=", since),
+            ("start_time", "<", until),
+            ("session", "=", session),
+            ("root", "=", root),
+            ("success", "=", success),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        if before is not None:
+            # Keyset pagination: seek past the cursor build using the indices
+            clauses.append("(start_time, id) < (SELECT start_time, id FROM builds WHERE id = ?)")
+            params.append(before)
+        query = "SELECT * FROM builds"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY start_time DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+            return self._load(rows, steps)
+
+    def generation(self) -> int:
+        """Get a number that changes whenever a build is added.
+
+        The store is append-only, so this is the latest build ID.
+        """
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(MAX(id), 0) FROM builds").fetchone()[0]
+
+    def get(self, build_id: int) -> Optional[Dict[str, Any]]:
+        """Get a build by ID."""
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM builds WHERE id = ?", (build_id,)).fetchall()
+            builds = self._load(rows, True)
+        return builds[0] if builds else None
+
+    def packages(self) -> List[Tuple[str, List[str]]]:
+        """Get every package built, with the versions built, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT package, version, MAX(start_time) AS last FROM builds "
+                "GROUP BY package, version ORDER BY package, last"
+            ).fetchall()
+        packages: Dict[str, List[str]] = {}
+        for row in rows:
+            packages.setdefault(row["package"], []).append(row["version"])
+        return list(packages.items())
+
+    def latest_session(self, root: Optional[str] = None) -> Optional[str]:
+        """Get the session of the most recent build, optionally of a top-level package."""
+        query = "SELECT session FROM builds WHERE session IS NOT NULL"
+        params: List[Any] = []
+        if root is not None:
+            query += " AND root = ?"
+            params.append(root)
+        with self._lock:
+            row = self._db.execute(query + " ORDER BY start_time DESC, id DESC LIMIT 1", params).fetchone()
+        return row["session"] if row else None
+
+    def _load(self, rows: Iterable[sqlite3.Row], steps: bool) -> List[Dict[str, Any]]:
+        """Convert build rows to build JSON. Must be called with the lock held."""
+        builds = {row["id"]: self._build_json(row) for row in rows}
+        ids = list(builds)
+        for start in range(0, len(ids), _ID_CHUNK):
+            self._load_chunk(builds, ids[start:start + _ID_CHUNK], steps)
+        return list(builds.values())
+
+    def _load_chunk(self, builds: Dict[int, Dict[str, Any]], ids: List[int], steps: bool) -> None:
+        """Add the dependencies and steps of some of `builds`. Must be called with the lock held."""
+        marks = ",".join("?" * len(ids))
+        for dep in self._db.execute(
+            f"SELECT build_id, name, version FROM dependencies WHERE build_id IN ({marks})", ids
+        ):
+            builds[dep["build_id"]]["dependencies"][dep["name"]] = dep["version"]
+        if steps:
+            for step in self._db.execute(
+                f"SELECT * FROM steps WHERE build_id IN ({marks}) ORDER BY id", ids
+            ):
+                builds[step["build_id"]]["compilation_steps"].append({
+                    "source": step["source"],
+                    "object": step["object"],
+                    "command": json.loads(step["command"]),
+                    "include_paths": json.loads(step["include_paths"]),
+                    "timing": _timing(step["start_time"], step["end_time"]),
+                    "success": bool(step["success"]),
+                    "error": step["error"],
+                    "worker": step["worker"],
+                    "cache_hit": bool(step["cache_hit"]),
+                })
+
+    @staticmethod
+    def _build_json(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "package": {
+                "name": row["package"],
+                "version": row["version"]
+            },
+            "timing": _timing(row["start_time"], row["end_time"]),
+            "compiler": json.loads(row["compiler"]),
+            "compilation_steps": [],
+            "dependencies": {},
+            "dependency_graph": json.loads(row["dependency_graph"]),
+            "session": row["session"],
+            "root": row["root"],
+            "phases": json.loads(row["phases"]) if row["phases"] else None,
+            "include_paths": json.loads(row["include_paths"]),
+            "library_paths": json.loads(row["library_paths"]),
+            "success": bool(row["success"]),
+            "error": row["error"]
+        }
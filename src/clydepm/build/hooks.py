@@ -1,9 +1,11 @@
+from contextlib import nullcontext
 from enum import Enum, auto
-from typing import Dict, List, Callable, Optional
+from typing import ContextManager, Dict, List, Callable, Optional
 from pathlib import Path
 import logging
 
 from ..core.package import Package, BuildMetadata
+from .profile import TranslationUnitProfile
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +35,10 @@ class BuildContext:
         source_file: Optional[Path] = None,
         object_file: Optional[Path] = None,
         output_file: Optional[Path] = None,
-        command: Optional[List[str]] = None
+        command: Optional[List[str]] = None,
+        cache_hit: bool = False,
+        build_dir: Optional[Path] = None,
+        profile: Optional[TranslationUnitProfile] = None
     ):
         self.package = package
         self.build_metadata = build_metadata
@@ -43,6 +48,9 @@ class BuildContext:
         self.object_file = object_file
         self.output_file = output_file
         self.command = command
+        self.cache_hit = cache_hit
+        self.build_dir = build_dir
+        self.profile = profile  # Set after compiles in profiling builds
 
 class BuildHookManager:
     """Manages build hooks."""
@@ -51,6 +59,8 @@ class BuildHookManager:
         self.hooks: Dict[BuildStage, List[Callable[[BuildContext], None]]] = {
             stage: [] for stage in BuildStage
         }
+        # Optional span factory, as BuildDataCollector.span, timing each stage's hooks
+        self.span: Optional[Callable[..., ContextManager]] = None
         
     def add_hook(self, stage: BuildStage, hook: Callable[[BuildContext], None]) -> None:
         """Add a hook for a build stage."""
@@ -66,6 +76,11 @@ class BuildHookManager:
         Raises:
             Exception: If any hook fails
         """
+        span = self.span(str(stage), "hook", package=context.package.name) if self.span else nullcontext()
+        with span:
+            self._run_hooks(stage, context)
+            
+    def _run_hooks(self, stage: BuildStage, context: BuildContext) -> None:
         for hook in self.hooks[stage]:
             try:
                 hook(context)
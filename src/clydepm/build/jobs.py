@@ -0,0 +1,58 @@
+"""
+Job scheduling helpers for parallel builds.
+"""
+from contextlib import contextmanager
+from typing import Iterator, Optional, Union
+import os
+import threading
+
+
+def resolve_jobs(jobs: Optional[Union[int, str]]) -> int:
+    """Resolve a job count from user input.
+
+    Args:
+        jobs: Number of jobs, "auto" for one job per CPU, or None for 1
+
+    Returns:
+        Number of parallel jobs (always >= 1)
+
+    Raises:
+        ValueError: If jobs is not a positive integer or "auto"
+    """
+    if jobs is None:
+        return 1
+    if isinstance(jobs, str):
+        value = jobs.strip().lower()
+        if value == "auto":
+            return os.cpu_count() or 1
+        try:
+            jobs = int(value)
+        except ValueError:
+            raise ValueError(f"Invalid job count: {jobs} (expected a number or 'auto')")
+    if jobs < 1:
+        raise ValueError(f"Invalid job count: {jobs} (must be at least 1)")
+    return jobs
+
+
+class JobServer:
+    """Global budget of concurrently running build tool processes.
+    
+    Shared by every package and file being built, like make's jobserver: a
+    compiler or linker process only starts once it holds a slot, so package
+    level and file level parallelism together never exceed ``jobs``.
+    """
+    
+    def __init__(self, jobs: int):
+        """Initialize job server.
+        
+        Args:
+            jobs: Maximum number of processes running at once
+        """
+        self.jobs = jobs
+        self._slots = threading.BoundedSemaphore(jobs)
+        
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one job slot for the duration of the block."""
+        with self._slots:
+            yield
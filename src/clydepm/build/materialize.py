@@ -0,0 +1,120 @@
+"""
+Materializing files between the build cache and build directories.
+"""
+from enum import Enum
+from pathlib import Path
+from typing import Set, Tuple
+import errno
+import logging
+import os
+import shutil
+import stat
+import threading
+
+logger = logging.getLogger(__name__)
+
+# ioctl request to share extents between files (Linux btrfs/xfs/...)
+FICLONE = 0x40049409
+
+# Errors meaning "this filesystem can't do that here", as opposed to real failures
+_UNSUPPORTED = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EPERM, errno.EMLINK}
+
+
+class MaterializeStrategy(str, Enum):
+    """How files are placed into and out of the cache."""
+    AUTO = "auto"  # reflink, then hardlink, then copy
+    REFLINK = "reflink"
+    HARDLINK = "hardlink"
+    COPY = "copy"
+
+
+_unsupported: Set[Tuple[MaterializeStrategy, int, int]] = set()
+_unsupported_lock = threading.Lock()
+
+
+def _reflink(src: Path, dest: Path) -> None:
+    """Clone src into dest, sharing storage until either is modified."""
+    import fcntl  # Not available on Windows; the ImportError falls through to other strategies
+    with open(src, "rb") as src_file, open(dest, "wb") as dest_file:
+        fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+    shutil.copystat(src, dest)
+
+
+def _hardlink(src: Path, dest: Path) -> None:
+    """Hard link dest to src, making the shared inode read-only.
+
+    Both names now refer to the same data, so neither may be written in place;
+    writers must unlink and recreate the file instead.
+    """
+    os.link(src, dest)
+    mode = os.stat(dest).st_mode
+    os.chmod(dest, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def _copy(src: Path, dest: Path) -> None:
+    shutil.copy2(src, dest)
+
+
+_STRATEGIES = {
+    MaterializeStrategy.REFLINK: _reflink,
+    MaterializeStrategy.HARDLINK: _hardlink,
+    MaterializeStrategy.COPY: _copy,
+}
+
+
+def materialize(
+    src: Path,
+    dest: Path,
+    strategy: MaterializeStrategy = MaterializeStrategy.AUTO
+) -> MaterializeStrategy:
+    """Place a copy of src at dest, replacing dest atomically.
+
+    Args:
+        src: Existing file
+        dest: Destination path. Its parent directory is created if needed.
+        strategy: Strategy to use. AUTO tries reflink, hardlink and copy in that
+            order; an explicit strategy still falls back to copy if unsupported.
+
+    Returns:
+        Strategy that was actually used
+    """
+    strategy = MaterializeStrategy(strategy)
+    if strategy == MaterializeStrategy.AUTO:
+        candidates = [MaterializeStrategy.REFLINK, MaterializeStrategy.HARDLINK, MaterializeStrategy.COPY]
+    elif strategy == MaterializeStrategy.COPY:
+        candidates = [MaterializeStrategy.COPY]
+    else:
+        candidates = [strategy, MaterializeStrategy.COPY]
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.exists() and os.path.samefile(src, dest):
+        # Already linked from an earlier build (renaming over it would be a no-op)
+        return MaterializeStrategy.HARDLINK
+    devices = (os.stat(src).st_dev, os.stat(dest.parent).st_dev)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    for candidate in candidates:
+        key = (candidate, *devices)
+        if candidate != MaterializeStrategy.COPY:
+            with _unsupported_lock:
+                if key in _unsupported:
+                    continue
+        try:
+            tmp.unlink(missing_ok=True)
+            _STRATEGIES[candidate](src, tmp)
+        except (OSError, ImportError) as e:
+            tmp.unlink(missing_ok=True)
+            if candidate == MaterializeStrategy.COPY:
+                raise
+            if isinstance(e, ImportError) or e.errno in _UNSUPPORTED:
+                logger.debug("%s not supported for %s -> %s: %s", candidate.value, src, dest, e)
+                with _unsupported_lock:
+                    _unsupported.add(key)
+                continue
+            raise
+        # Replacing (rather than writing into) dest never modifies a file dest was
+        # hard linked to, e.g. a cache entry restored by an earlier build
+        os.replace(tmp, dest)
+        return candidate
+
+    raise AssertionError("copy strategy is always available")
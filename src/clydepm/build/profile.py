@@ -0,0 +1,238 @@
+"""
+Compiler self-profiles of translation units and their aggregation.
+
+In profiling builds every source is compiled with the compiler's own timing
+report: ``-ftime-trace`` for Clang, a per-TU JSON with a span for every
+header parsed and template instantiated, and ``-ftime-report`` for GCC, which
+only splits the time into phases. The reports are reduced to frontend and
+backend time plus time per header and template, then aggregated across a
+build to find what the whole dependency graph spends its compile time on.
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import re
+import subprocess
+
+logger = logging.getLogger("build")
+
+# GCC -ftime-report phases, by the part of the compiler they belong to
+_GCC_FRONTEND_PHASES = {"setup", "parsing", "lang. deferred", "late parsing cleanups"}
+_GCC_BACKEND_PHASES = {"opt and generate", "last asm", "finalize"}
+# e.g. " phase parsing   :   0.01 ( 50%)   0.01 (100%)   0.01 ( 33%)   680k ( 33%)"
+_GCC_PHASE = re.compile(
+    r"^\s*phase (?P<phase>.+?)\s*:\s*[\d.]+\s*\(\s*\d+%\)\s*[\d.]+\s*\(\s*\d+%\)\s*(?P<wall>[\d.]+)"
+)
+_GCC_TOTAL = re.compile(r"^\s*TOTAL\s*:\s*[\d.]+\s+[\d.]+\s+(?P<wall>[\d.]+)")
+
+# Clang -ftime-trace events naming a template in args.detail
+_CLANG_TEMPLATE_EVENTS = {"InstantiateClass", "InstantiateFunction"}
+
+
+@dataclass
+class TranslationUnitProfile:
+    """Where one compile spent its time, in seconds."""
+    source: str
+    compiler: str  # "gcc" or "clang"
+    frontend: float = 0.0  # Preprocessing, parsing and semantic analysis
+    backend: float = 0.0  # Optimization and code generation
+    total: float = 0.0
+    headers: Dict[str, float] = field(default_factory=dict)  # Parse time, including nested headers (Clang only)
+    templates: Dict[str, float] = field(default_factory=dict)  # Instantiation time (Clang only)
+    package: Optional[str] = None
+    root: Optional[str] = None  # Top-level package of the build
+    report: Optional[str] = None  # The compiler's own report, copied next to the profile
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "TranslationUnitProfile":
+        """Load a profile saved with asdict()."""
+        return cls(**{name: data[name] for name in cls.__dataclass_fields__ if name in data})
+
+
+@lru_cache(maxsize=None)
+def compiler_family(compiler: str) -> str:
+    """Tell whether a compiler command is Clang or GCC (``gcc`` may be Clang, e.g. on macOS)."""
+    try:
+        result = subprocess.run([compiler, "--version"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.debug("Failed to identify compiler %s: %s", compiler, e)
+        return "gcc"
+    return "clang" if "clang" in result.stdout.lower() else "gcc"
+
+
+def profile_flags(family: str) -> List[str]:
+    """Get the flags making a compiler report where it spends its time."""
+    if family == "clang":
+        # Writes <object stem>.json next to the object
+        return ["-ftime-trace"]
+    # Printed to stderr
+    return ["-ftime-report"]
+
+
+def time_trace_path(object_path: Path) -> Path:
+    """Get the file Clang writes the -ftime-trace of an object to."""
+    return object_path.with_suffix(".json")
+
+
+def parse_time_report(source: str, text: str) -> TranslationUnitProfile:
+    """Parse GCC -ftime-report output (wall clock column)."""
+    profile = TranslationUnitProfile(source=source, compiler="gcc")
+    for line in text.splitlines():
+        match = _GCC_PHASE.match(line)
+        if match:
+            phase, wall = match.group("phase"), float(match.group("wall"))
+            if phase in _GCC_FRONTEND_PHASES:
+                profile.frontend += wall
+            elif phase in _GCC_BACKEND_PHASES:
+                profile.backend += wall
+            continue
+        match = _GCC_TOTAL.match(line)
+        if match:
+            profile.total = float(match.group("wall"))
+    if not profile.total:
+        profile.total = profile.frontend + profile.backend
+    return profile
+
+
+def parse_time_trace(source: str, trace: Dict[str, Any], base_dir: Optional[Path] = None) -> TranslationUnitProfile:
+    """Parse a Clang -ftime-trace file.
+
+    Args:
+        source: Source file the trace is for
+        trace: The parsed JSON
+        base_dir: Directory relative header paths are relative to (the compiler's cwd)
+    """
+    profile = TranslationUnitProfile(source=source, compiler="clang")
+    totals: Dict[str, float] = {}
+    for event in trace.get("traceEvents", []):
+        if event.get("ph") != "X":
+            continue
+        name = event.get("name", "")
+        seconds = event.get("dur", 0) / 1e6
+        detail = (event.get("args") or {}).get("detail")
+        if name.startswith("Total "):
+            totals[name[len("Total "):]] = seconds
+        elif name == "Source" and detail:
+            if base_dir is not None and not os.path.isabs(detail):
+                detail = os.path.normpath(base_dir / detail)
+            profile.headers[detail] = profile.headers.get(detail, 0.0) + seconds
+        elif name in _CLANG_TEMPLATE_EVENTS and detail:
+            profile.templates[detail] = profile.templates.get(detail, 0.0) + seconds
+        elif name in ("Frontend", "Backend"):
+            # Fallback for traces without the "Total" summary events
+            key = f"_{name}"
+            totals[key] = totals.get(key, 0.0) + seconds
+    profile.frontend = totals.get("Frontend", totals.get("_Frontend", 0.0))
+    profile.backend = totals.get("Backend", totals.get("_Backend", 0.0))
+    profile.total = totals.get("ExecuteCompiler", profile.frontend + profile.backend)
+    return profile
+
+
+@dataclass
+class ProfileSummary:
+    """Compile time of a whole build, broken down by header, template and TU."""
+    session: str
+    translation_units: int
+    total: float
+    # (header, seconds across all TUs, number of TUs including it)
+    headers: List[Tuple[str, float, int]]
+    templates: List[Tuple[str, float, int]]
+    frontend: List[TranslationUnitProfile]  # Slowest TUs to parse
+    backend: List[TranslationUnitProfile]  # Slowest TUs to optimize and generate code for
+    compilers: List[str]
+
+    def to_json(self) -> Dict[str, Any]:
+        """Convert to JSON-serializable dict."""
+        def units(profiles: List[TranslationUnitProfile]) -> List[Dict[str, Any]]:
+            return [
+                {
+                    "package": p.package,
+                    "source": p.source,
+                    "frontend": p.frontend,
+                    "backend": p.backend,
+                    "total": p.total,
+                }
+                for p in profiles
+            ]
+
+        return {
+            "session": self.session,
+            "translation_units": self.translation_units,
+            "total": self.total,
+            "headers": [{"name": name, "time": t, "count": n} for name, t, n in self.headers],
+            "templates": [{"name": name, "time": t, "count": n} for name, t, n in self.templates],
+            "frontend": units(self.frontend),
+            "backend": units(self.backend),
+            "compilers": self.compilers,
+        }
+
+
+def _top(profiles: List[TranslationUnitProfile], attr: str, top: int) -> List[Tuple[str, float, int]]:
+    """Sum a per-TU breakdown across TUs and get the most expensive entries."""
+    totals: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    for profile in profiles:
+        for name, seconds in getattr(profile, attr).items():
+            totals[name] = totals.get(name, 0.0) + seconds
+            counts[name] = counts.get(name, 0) + 1
+    ranked = sorted(totals, key=lambda name: (-totals[name], name))[:top]
+    return [(name, totals[name], counts[name]) for name in ranked]
+
+
+def load_profiles(
+    profiles_dir: Path,
+    session: Optional[str] = None,
+    package: Optional[str] = None
+) -> Tuple[Optional[str], List[TranslationUnitProfile]]:
+    """Load the profiles of one profiling build.
+
+    Args:
+        profiles_dir: Directory BuildDataCollector saves profiles to, one subdirectory per session
+        session: Session to load. Defaults to the latest one
+        package: Only consider builds of this top-level package
+
+    Returns:
+        Tuple of (session, profiles). The session is None if nothing matched.
+    """
+    if session:
+        candidates = [profiles_dir / session] if (profiles_dir / session).is_dir() else []
+    else:
+        candidates = sorted(
+            (d for d in profiles_dir.glob("*") if d.is_dir()),
+            key=lambda d: d.stat().st_mtime,
+            reverse=True
+        )
+    for session_dir in candidates:
+        profiles = []
+        for path in sorted(session_dir.glob("*/*.profile.json")):
+            try:
+                with open(path) as f:
+                    profile = TranslationUnitProfile.from_json(json.load(f))
+            except (OSError, json.JSONDecodeError, TypeError) as e:
+                logger.debug("Skipping unreadable profile %s: %s", path, e)
+                continue
+            if package and profile.root != package:
+                break
+            profiles.append(profile)
+        else:
+            if profiles:
+                return session_dir.name, profiles
+    return None, []
+
+
+def summarize_profiles(session: str, profiles: List[TranslationUnitProfile], top: int = 20) -> ProfileSummary:
+    """Aggregate the profiles of a build."""
+    return ProfileSummary(
+        session=session,
+        translation_units=len(profiles),
+        total=sum(p.total for p in profiles),
+        headers=_top(profiles, "headers", top),
+        templates=_top(profiles, "templates", top),
+        frontend=sorted(profiles, key=lambda p: -p.frontend)[:top],
+        backend=sorted(profiles, key=lambda p: -p.backend)[:top],
+        compilers=sorted({p.compiler for p in profiles}),
+    )
@@ -0,0 +1,268 @@
+"""
+Content-addressed cache backends, including a shared HTTP cache and its server.
+
+Protocol (all keys are cache digests, ``[A-Za-z0-9._-]+``):
+
+    GET  /cas/<key>        -> 200 with the blob, or 404
+    HEAD /cas/<key>        -> 200 or 404
+    PUT  /cas/<key>        -> 201 (body is the blob)
+    POST /cas/contains     -> {"keys": [...]} in, {"present": [...]} out
+
+A server started with a token answers 401 to requests without an
+``Authorization: Bearer <token>`` header. Without one, anyone who can reach
+the server can store objects that clients then link, so it must only listen
+on trusted networks.
+"""
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterable, Optional, Set
+import hmac
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import urllib.error
+import urllib.request
+
+logger = logging.getLogger("build")
+
+_KEY_PATTERN = re.compile(r"^[A-Za-z0-9._-]+$")
+
+
+def _check_key(key: str) -> str:
+    if not _KEY_PATTERN.match(key) or key.startswith("."):
+        raise ValueError(f"Invalid cache key: {key}")
+    return key
+
+
+class CacheBackend(ABC):
+    """Stores blobs by key."""
+
+    @abstractmethod
+    def contains(self, keys: Iterable[str]) -> Set[str]:
+        """Get which of the keys are stored, in as few round trips as possible."""
+
+    @abstractmethod
+    def get(self, key: str, dest: Path) -> bool:
+        """Download a blob to dest.
+
+        Returns:
+            True if the blob existed
+        """
+
+    @abstractmethod
+    def put(self, key: str, src: Path) -> None:
+        """Store a file under key."""
+
+
+class LocalBackend(CacheBackend):
+    """Blobs stored as files in a directory."""
+
+    def __init__(self, root: Path):
+        """Initialize local backend.
+
+        Args:
+            root: Directory holding one file per key
+        """
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        """Get the file storing a key."""
+        return self.root / _check_key(key)
+
+    def contains(self, keys: Iterable[str]) -> Set[str]:
+        return {key for key in keys if self.path(key).exists()}
+
+    def get(self, key: str, dest: Path) -> bool:
+        try:
+            shutil.copyfile(self.path(key), dest)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def put(self, key: str, src: Path) -> None:
+        path = self.path(key)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, path)
+
+
+class HttpBackend(CacheBackend):
+    """Blobs stored on a remote cache server (see ``clyde cache serve``)."""
+
+    def __init__(self, url: str, timeout: float = 30, token: Optional[str] = None):
+        """Initialize HTTP backend.
+
+        Args:
+            url: Server base URL, e.g. http://cache.local:8765
+            timeout: Seconds to wait for each request
+            token: Shared token the server was started with, if any
+        """
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.token = token
+
+    def _request(self, method: str, path: str, data: Optional[bytes] = None, headers: Optional[dict] = None):
+        headers = dict(headers or {})
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(
+            f"{self.url}{path}", data=data, method=method, headers=headers
+        )
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def contains(self, keys: Iterable[str]) -> Set[str]:
+        keys = [_check_key(key) for key in keys]
+        if not keys:
+            return set()
+        body = json.dumps({"keys": keys}).encode()
+        with self._request("POST", "/cas/contains", body, {"Content-Type": "application/json"}) as response:
+            return set(json.load(response)["present"])
+
+    def get(self, key: str, dest: Path) -> bool:
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.download")
+        try:
+            with self._request("GET", f"/cas/{_check_key(key)}") as response, open(tmp, "wb") as f:
+                shutil.copyfileobj(response, f)
+        except urllib.error.HTTPError as e:
+            tmp.unlink(missing_ok=True)
+            if e.code == 404:
+                return False
+            raise
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        os.replace(tmp, dest)
+        return True
+
+    def put(self, key: str, src: Path) -> None:
+        with open(src, "rb") as f:
+            data = f.read()
+        with self._request(
+            "PUT", f"/cas/{_check_key(key)}", data, {"Content-Type": "application/octet-stream"}
+        ):
+            pass
+
+
+class _CacheRequestHandler(BaseHTTPRequestHandler):
+    """Serves a LocalBackend over the cache protocol."""
+
+    backend: LocalBackend  # Set by make_cache_server
+    token: Optional[str] = None  # Required of every request if set
+
+    def _authorized(self) -> bool:
+        if not self.token:
+            return True
+        given = self.headers.get("Authorization", "")
+        if hmac.compare_digest(given.encode(), f"Bearer {self.token}".encode()):
+            return True
+        self.send_error(401, "Missing or wrong cache token")
+        return False
+
+    def _key(self) -> Optional[str]:
+        if not self._authorized():
+            return None
+        prefix = "/cas/"
+        if not self.path.startswith(prefix):
+            self.send_error(404)
+            return None
+        key = self.path[len(prefix):]
+        if not _KEY_PATTERN.match(key) or key.startswith("."):
+            self.send_error(400, "Invalid key")
+            return None
+        return key
+
+    def do_HEAD(self) -> None:
+        key = self._key()
+        if key is None:
+            return
+        path = self.backend.path(key)
+        if not path.exists():
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(path.stat().st_size))
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        key = self._key()
+        if key is None:
+            return
+        try:
+            f = open(self.backend.path(key), "rb")
+        except FileNotFoundError:
+            self.send_error(404)
+            return
+        with f:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile)
+
+    def do_PUT(self) -> None:
+        key = self._key()
+        if key is None:
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        path = self.backend.path(key)
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.upload")
+        with open(tmp, "wb") as f:
+            remaining = length
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                f.write(chunk)
+                remaining -= len(chunk)
+        if remaining:
+            tmp.unlink(missing_ok=True)
+            self.send_error(400, "Truncated upload")
+            return
+        os.replace(tmp, path)
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self) -> None:
+        if not self._authorized():
+            return
+        if self.path != "/cas/contains":
+            self.send_error(404)
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            keys = [key for key in request["keys"] if _KEY_PATTERN.match(key) and not key.startswith(".")]
+        except (ValueError, KeyError, TypeError):
+            self.send_error(400, "Expected {\"keys\": [...]}")
+            return
+        body = json.dumps({"present": sorted(self.backend.contains(keys))}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_cache_server(
+    directory: Path,
+    host: str = "localhost",
+    port: int = 8765,
+    token: Optional[str] = None
+) -> ThreadingHTTPServer:
+    """Create an HTTP cache server storing blobs in a directory.
+
+    Call ``serve_forever()`` on the result to start serving. Port 0 picks a free port.
+    With a token, only clients sending it can read or store anything.
+    """
+    handler = type(
+        "CacheRequestHandler", (_CacheRequestHandler,), {"backend": LocalBackend(directory), "token": token}
+    )
+    return ThreadingHTTPServer((host, port), handler)
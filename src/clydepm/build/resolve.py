@@ -0,0 +1,103 @@
+"""
+Version solving for a build's dependency graph.
+
+Local packages take part in the solve with their one version, so conflicting
+requirements from anywhere in the graph are reconciled (or reported) before
+anything is installed. Remote packages come from the lockfile when their
+locked version is considered, and from the registry otherwise.
+"""
+from typing import Callable, Dict, List, Optional
+import logging
+
+from ..core.lockfile import Lockfile
+from ..core.package import Package, load_package
+from ..core.version.solver import DependencyProvider
+from ..core.version.version import Version
+
+logger = logging.getLogger("build")
+
+
+class GraphProvider(DependencyProvider):
+    """Serves a build's packages to the version solver."""
+
+    def __init__(
+        self,
+        root: Package,
+        lockfile: Optional[Lockfile],
+        get_versions: Optional[Callable[[str, Optional[str]], List[Version]]] = None,
+        get_package: Optional[Callable[[str, Optional[str], str], Package]] = None
+    ):
+        """Initialize provider.
+
+        Args:
+            root: Package being built
+            lockfile: Lockfile whose versions and requirements can be used
+                without asking the registry
+            get_versions: Gets the versions of a dependency in the registry,
+                given its name and the organization it is looked up in. Without
+                it only locked versions are offered.
+            get_package: Gets a dependency version from the registry, given its
+                name, organization and version, to read its requirements
+        """
+        self.lockfile = lockfile
+        self.get_versions = get_versions
+        self.get_package = get_package
+        self.local: Dict[str, Package] = {}
+        # Organization each plain-named remote package is looked up in: that of
+        # the first package declaring it (None for the configured default)
+        self.organizations: Dict[str, Optional[str]] = {}
+        self._collect(root.name, root)
+
+    def _collect(self, name: str, package: Package) -> None:
+        if name in self.local:
+            return
+        self.local[name] = package
+        for dep_name, spec in package.get_dependencies().items():
+            if spec.startswith("local:"):
+                self._collect(dep_name, load_package((package.path / spec[6:]).resolve()))
+            else:
+                self.organizations.setdefault(dep_name, package.organization)
+
+    def _organization(self, package: str) -> Optional[str]:
+        """Get the organization a remote package was looked up in."""
+        if package.startswith("@"):
+            return package.split("/")[0][1:]
+        return self.organizations.get(package)
+
+    def versions(self, package: str) -> List[Version]:
+        if package in self.local:
+            return [Version.parse(self.local[package].version)]
+        if self.get_versions is None:
+            locked = self.lockfile.get(package) if self.lockfile else None
+            return [Version.parse(locked.version)] if locked else []
+        return self.get_versions(package, self.organizations.get(package))
+
+    def dependencies(self, package: str, version: Version) -> Dict[str, str]:
+        if package in self.local:
+            requires = {}
+            for dep_name, spec in self.local[package].get_dependencies().items():
+                if spec.startswith("local:"):
+                    # Local packages have exactly the version on disk
+                    spec = f"={self.local[dep_name].version}"
+                requires[dep_name] = spec
+            return requires
+
+        locked = self.lockfile.get(package) if self.lockfile else None
+        if locked and locked.version == str(version):
+            requires = locked.requires
+        elif self.get_package is None:
+            return {}
+        else:
+            # The registry has no index of dependencies; read the package itself
+            requires = self.get_package(package, self.organizations.get(package), str(version)).get_dependencies()
+
+        remote = {}
+        organization = self._organization(package)
+        for dep_name, spec in requires.items():
+            if spec.startswith("local:"):
+                logger.debug(f"Ignoring local dependency {dep_name} of {package} {version}")
+                continue
+            # Its plain-named dependencies live where it does
+            self.organizations.setdefault(dep_name, organization)
+            remote[dep_name] = spec
+        return remote
@@ -0,0 +1,91 @@
+"""
+Dependency graph scheduler for building packages concurrently.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Set
+import logging
+
+logger = logging.getLogger("build")
+
+
+class PackageScheduler:
+    """Builds packages in dependency order, running independent ones concurrently.
+
+    A package is dispatched as soon as every package it depends on has been
+    built, so two subtrees that share nothing build side by side.
+    """
+
+    def __init__(self, max_parallel: int = 1):
+        """Initialize scheduler.
+
+        Args:
+            max_parallel: Maximum number of packages building at once
+        """
+        self.max_parallel = max(1, max_parallel)
+
+    def run(
+        self,
+        graph: Dict[str, Set[str]],
+        build: Callable[[str], Optional[str]],
+        order: Optional[List[str]] = None
+    ) -> Optional[str]:
+        """Build every package in the graph.
+
+        Args:
+            graph: Maps each package name to the names it depends on. Names that
+                are not keys of the graph are treated as already built.
+            build: Builds one package, returning an error message or None
+            order: Preferred dispatch order (e.g. a topological order). Defaults
+                to sorted names.
+
+        Returns:
+            Error message of the first failed package in ``order``, None if all succeeded
+        """
+        order = [name for name in (order or sorted(graph)) if name in graph]
+        order.extend(sorted(name for name in graph if name not in order))
+        remaining = {
+            name: {dep for dep in deps if dep in graph and dep != name}
+            for name, deps in graph.items()
+        }
+        pending = list(order)
+        running: Dict[Future, str] = {}
+        errors: Dict[str, str] = {}
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_parallel,
+            thread_name_prefix="clyde-package"
+        ) as executor:
+            while pending or running:
+                # Dispatch every ready package while we have capacity, unless something failed
+                if not errors:
+                    for name in list(pending):
+                        if len(running) >= self.max_parallel:
+                            break
+                        if not remaining[name]:
+                            pending.remove(name)
+                            logger.debug(f"Scheduling package build: {name}")
+                            running[executor.submit(build, name)] = name
+
+                if not running:
+                    if pending and not errors:
+                        # Should be impossible for an acyclic graph
+                        return f"Unable to schedule packages: {', '.join(pending)}"
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        error = future.result()
+                    except Exception as e:
+                        error = str(e)
+                    if error:
+                        errors[name] = error
+                        continue
+                    for deps in remaining.values():
+                        deps.discard(name)
+
+        for name in order:
+            if name in errors:
+                return errors[name]
+        return None
@@ -0,0 +1,88 @@
+"""
+Build timeline recording and Chrome trace-event export.
+
+The exported JSON loads in chrome://tracing and https://ui.perfetto.dev, with
+one row per thread, so parallel compiles and dependency builds show up side
+by side.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence
+import json
+import os
+import threading
+import time
+
+
+@dataclass
+class Span:
+    """A timed piece of work on one thread."""
+    name: str
+    category: str  # package, resolve, fetch, compile, link or hook
+    start: float
+    end: float
+    thread: str
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+class TraceRecorder:
+    """Collects spans from any thread."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str, **args: Any) -> Iterator[Dict[str, Any]]:
+        """Time the body of a with block.
+
+        Yields:
+            The span's args, which the body may add to
+        """
+        start = time.time()
+        try:
+            yield args
+        finally:
+            span = Span(name, category, start, time.time(), threading.current_thread().name, args)
+            with self._lock:
+                self.spans.append(span)
+
+    def clear(self) -> None:
+        """Drop recorded spans."""
+        with self._lock:
+            self.spans.clear()
+
+
+def chrome_trace(spans: Sequence[Span]) -> Dict[str, Any]:
+    """Convert spans to the Chrome trace-event format.
+
+    Timestamps are microseconds since the first span started. Threads are
+    numbered in order of first appearance and named with metadata events.
+    """
+    origin = min((span.start for span in spans), default=0.0)
+    pid = os.getpid()
+    threads: Dict[str, int] = {}
+    events: List[Dict[str, Any]] = []
+    for span in sorted(spans, key=lambda span: (span.start, -span.end)):
+        tid = threads.setdefault(span.thread, len(threads) + 1)
+        events.append({
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": round((span.start - origin) * 1e6),
+            "dur": round((span.end - span.start) * 1e6),
+            "pid": pid,
+            "tid": tid,
+            "args": {key: str(value) if isinstance(value, Path) else value for key, value in span.args.items()},
+        })
+    for name, tid in threads.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+    events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "clyde build"}})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(spans: Sequence[Span], path: Path) -> None:
+    """Write spans as a Chrome trace-event JSON file."""
+    with open(path, "w") as f:
+        json.dump(chrome_trace(spans), f)
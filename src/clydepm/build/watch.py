@@ -0,0 +1,453 @@
+"""
+Filesystem watching for watch mode and the build daemon.
+"""
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from ..core.package import Package, load_package
+
+logger = logging.getLogger(__name__)
+
+FileState = Optional[Tuple[int, int, int]]
+
+# Directories whose contents never affect a build
+IGNORED_DIRS = {"build"}
+
+
+def _ignored_dir(name: str) -> bool:
+    # Build output and VCS metadata change on every build
+    return name.startswith(".") or name in IGNORED_DIRS
+
+
+def _file_state(path: Path) -> FileState:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class PollingWatcher:
+    """Watches files and directory trees by polling their stat information.
+
+    Calls ``callback`` from the watcher thread with the set of paths that were
+    created, modified or deleted since the last poll.
+    """
+
+    def __init__(self, callback: Callable[[Set[Path]], None], interval: float = 0.5):
+        """Initialize watcher.
+
+        Args:
+            callback: Called with changed paths
+            interval: Seconds between polls
+        """
+        self.callback = callback
+        self.interval = interval
+        self._roots: Set[Path] = set()
+        self._states: Dict[Path, FileState] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _scan(self, root: Path) -> Dict[Path, FileState]:
+        """Get the state of a watched file, or of every file below a directory."""
+        if not root.is_dir():
+            return {root: _file_state(root)}
+        states = {}
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not _ignored_dir(d)]
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                states[path] = _file_state(path)
+        return states
+
+    def watch(self, paths: Iterable[Path]) -> None:
+        """Start watching files or directory trees (recursively)."""
+        with self._lock:
+            for path in paths:
+                path = Path(path).absolute()
+                if path not in self._roots:
+                    self._roots.add(path)
+                    self._states.update(self._scan(path))
+
+    def unwatch_all(self) -> None:
+        """Stop watching everything."""
+        with self._lock:
+            self._roots.clear()
+            self._states.clear()
+
+    def poll(self) -> Set[Path]:
+        """Check watched paths once, returning those that changed."""
+        with self._lock:
+            current: Dict[Path, FileState] = {}
+            for root in self._roots:
+                current.update(self._scan(root))
+            changed = {
+                path for path in current.keys() | self._states.keys()
+                if current.get(path) != self._states.get(path)
+            }
+            self._states = current
+        return changed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                changed = self.poll()
+                if changed:
+                    logger.debug("Detected changes: %s", sorted(map(str, changed)))
+                    self.callback(changed)
+            except Exception as e:
+                logger.warning("File watcher error: %s", e)
+
+    def start(self) -> None:
+        """Start polling in a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="clyde-watch", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+_EVENT = struct.Struct("iIII")
+
+
+def _load_libc() -> Optional[ctypes.CDLL]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class InotifyWatcher:
+    """Watches files and directory trees with Linux inotify.
+
+    Same interface as PollingWatcher. Files are watched through their parent
+    directory, so editors that save by renaming a new file into place are seen.
+    Directories are watched recursively, including ones created later.
+    """
+
+    def __init__(self, callback: Callable[[Set[Path]], None]):
+        """Initialize watcher.
+
+        Args:
+            callback: Called with changed paths
+
+        Raises:
+            OSError: If inotify is unavailable
+        """
+        self._libc = _load_libc()
+        if self._libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.callback = callback
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._lock = threading.Lock()
+        self._dirs: Dict[int, Path] = {}  # watch descriptor -> directory
+        self._watched: Dict[Path, int] = {}
+        self._tree_roots: Set[Path] = set()  # Directories watched recursively
+        self._file_roots: Set[Path] = set()  # Files (or not yet existing paths)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _add_watch(self, directory: Path) -> None:
+        """Watch one directory. Must be called with the lock held.
+
+        Watching a directory again is cheap (inotify returns the same watch),
+        and picks up a directory that was replaced before its removal was read.
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return  # Vanished meanwhile
+            raise OSError(err, f"inotify_add_watch({directory}): {os.strerror(err)}")
+        old = self._watched.get(directory)
+        if old is not None and old != wd:
+            self._dirs.pop(old, None)  # Its IN_IGNORED is then skipped
+        self._dirs[wd] = directory
+        self._watched[directory] = wd
+
+    def _add_tree(self, root: Path) -> None:
+        """Watch a directory and everything below it. Must be called with the lock held."""
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not _ignored_dir(d)]
+            self._add_watch(Path(dirpath))
+
+    def watch(self, paths: Iterable[Path]) -> None:
+        """Start watching files or directory trees (recursively).
+
+        Paths that don't exist yet are picked up once created.
+        """
+        with self._lock:
+            for path in paths:
+                path = Path(path).absolute()
+                if path.is_dir():
+                    self._tree_roots.add(path)
+                    self._add_tree(path)
+                else:
+                    self._file_roots.add(path)
+                    if path.parent.is_dir():
+                        self._add_watch(path.parent)
+
+    def unwatch_all(self) -> None:
+        """Stop watching everything."""
+        with self._lock:
+            for wd in list(self._dirs):
+                self._libc.inotify_rm_watch(self._fd, wd)
+            self._dirs.clear()
+            self._watched.clear()
+            self._tree_roots.clear()
+            self._file_roots.clear()
+
+    def _in_tree(self, path: Path) -> bool:
+        return any(root == path or root in path.parents for root in self._tree_roots)
+
+    def _read_events(self) -> Set[Path]:
+        """Read pending events, returning changed watched paths."""
+        changed: Set[Path] = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        with self._lock:
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+
+                if mask & IN_Q_OVERFLOW:
+                    # Events were lost; treat everything as changed
+                    changed.update(self._tree_roots | self._file_roots)
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._dirs[wd]
+                    self._watched.pop(directory, None)
+                    continue
+
+                path = directory / os.fsdecode(name) if name else directory
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    if path in self._file_roots:
+                        # A watched directory that didn't exist yet
+                        self._file_roots.discard(path)
+                        self._tree_roots.add(path)
+                    if self._in_tree(path) and not _ignored_dir(path.name):
+                        self._add_tree(path)
+                        changed.add(path)
+                    continue
+                # Hidden names are mostly editor swap and backup files
+                if path in self._file_roots or (self._in_tree(path) and not path.name.startswith(".")):
+                    changed.add(path)
+        return changed
+
+    def poll(self) -> Set[Path]:
+        """Return changes that happened since the last poll, without blocking."""
+        return self._read_events()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ready, _, _ = select.select([self._fd], [], [], 0.2)
+                if not ready:
+                    continue
+                changed = self._read_events()
+                if changed:
+                    logger.debug("Detected changes: %s", sorted(map(str, changed)))
+                    self.callback(changed)
+            except Exception as e:
+                logger.warning("File watcher error: %s", e)
+
+    def start(self) -> None:
+        """Start watching in a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="clyde-watch", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching and release the inotify descriptor."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(callback: Callable[[Set[Path]], None], poll_interval: float = 0.5):
+    """Create the best available watcher: inotify on Linux, polling elsewhere."""
+    try:
+        return InotifyWatcher(callback)
+    except OSError as e:
+        logger.debug("Falling back to polling file watcher: %s", e)
+        return PollingWatcher(callback, interval=poll_interval)
+
+
+class ChangeQueue:
+    """Collects changes from a watcher and hands them out in debounced batches."""
+
+    def __init__(self):
+        self._changes: Set[Path] = set()
+        self._last_change = 0.0
+        self._cond = threading.Condition()
+
+    def __call__(self, changed: Set[Path]) -> None:
+        """Record changes (use as the watcher callback)."""
+        with self._cond:
+            self._changes.update(changed)
+            self._last_change = time.monotonic()
+            self._cond.notify_all()
+
+    def wait(self, debounce: float = 0.2, timeout: Optional[float] = None) -> Set[Path]:
+        """Wait for changes, then until none arrived for ``debounce`` seconds.
+
+        Editors and ``git checkout`` touch many files in a burst; this turns
+        the burst into one rebuild.
+
+        Args:
+            debounce: Quiet period ending a burst
+            timeout: Give up after this many seconds without any change
+
+        Returns:
+            All paths changed in the burst, empty on timeout
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._changes, timeout):
+                return set()
+            while True:
+                quiet = time.monotonic() - self._last_change
+                if quiet >= debounce:
+                    break
+                self._cond.wait(debounce - quiet)
+            changes, self._changes = self._changes, set()
+            return changes
+
+
+def package_watch_paths(package: Package, dependencies: Iterable[Package] = ()) -> List[Path]:
+    """Get the paths whose changes affect a build of a package.
+
+    Covers package.yml, src/, include/ and private_include/ of the package and
+    of every dependency, plus the package's installed deps/ directory.
+    """
+    paths = [package.path / "deps"]
+    for pkg in [package, *dependencies]:
+        paths.append(pkg.path / "package.yml")
+        for name in ("src", "include", "private_include"):
+            paths.append(pkg.path / name)
+    # Keep order stable and drop duplicates (shared dependencies)
+    seen: Set[Path] = set()
+    unique = []
+    for path in paths:
+        path = path.absolute()
+        if path not in seen:
+            seen.add(path)
+            unique.append(path)
+    return unique
+
+
+def watch_and_build(
+    builder,
+    path: Path,
+    on_result: Callable[[object, Set[Path]], None],
+    traits: Optional[Dict[str, str]] = None,
+    verbose: bool = False,
+    stop: Optional[threading.Event] = None,
+    debounce: float = 0.2
+) -> None:
+    """Build a package, then rebuild it whenever its inputs change.
+
+    Rebuilds go through the same warm Builder, so only translation units whose
+    source or headers changed recompile and only packages whose objects or
+    dependency archives changed relink.
+
+    Args:
+        builder: Builder to build with
+        path: Package directory
+        on_result: Called with each BuildResult and the changes that triggered it
+            (empty for the initial build)
+        traits: Optional build traits
+        verbose: Whether to show verbose output
+        stop: Set to end watching. Otherwise runs until interrupted.
+        debounce: Quiet period ending a burst of changes
+    """
+    stop = stop or threading.Event()
+    queue = ChangeQueue()
+    watcher = create_watcher(queue)
+    if builder.graph_cache is None:
+        builder.graph_cache = {}
+
+    def load() -> Package:
+        package = load_package(path)
+        try:
+            _, packages = builder._dependency_graph(package)
+            dependencies = list(packages.values())
+        except ValueError:
+            dependencies = []  # The build reports it
+        watcher.unwatch_all()
+        watcher.watch(package_watch_paths(package, dependencies))
+        return package
+
+    package = load()
+    watcher.start()
+    try:
+        on_result(builder.build(package, traits, verbose), set())
+        while not stop.is_set():
+            changed = queue.wait(debounce, timeout=0.5)
+            if not changed:
+                continue
+            if any(p.name == "package.yml" for p in changed) or any(p.name == "deps" for p in changed):
+                builder.graph_cache.clear()
+                try:
+                    package = load()
+                except Exception as e:
+                    logger.error("Failed to reload %s: %s", path, e)
+                    continue
+            on_result(builder.build(package, traits, verbose), changed)
+    finally:
+        watcher.stop()
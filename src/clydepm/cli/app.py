@@ -13,6 +13,7 @@ from .commands.auth import auth
 from .commands.publish import publish
 from .commands.cache import app as cache_app
 from .commands.inspect import app as inspect_app
+from .commands.daemon import app as daemon_app
 from .commands.package import package_cmd
 
 # Set up logging
@@ -46,6 +47,7 @@ app.command()(publish)
 # Add subcommands
 app.add_typer(cache_app, name="cache")
 app.add_typer(inspect_app, name="inspect", help="Build inspection tools")
+app.add_typer(daemon_app, name="daemon")
 
 # Add package command group
 app.add_typer(package_cmd, name="package", help="Package management commands")
@@ -9,6 +9,7 @@ from .search import search
 from .publish import publish
 from .cache import app as cache
 from .inspect import app as inspect
+from .daemon import app as daemon
 __all__ = [
     "init",
     "build",
@@ -18,4 +19,5 @@ __all__ = [
     "publish",
     "cache",
     "inspect",
+    "daemon",
 ]
@@ -15,6 +15,9 @@ from rich.logging import RichHandler
 
 from ...core.package import Package
 from ...build.builder import Builder
+from ...build.emit import EmitFormat, emit
+from ...build.daemon import DaemonClient, DaemonUnavailable
+from ...build.watch import watch_and_build
 
 # Create console for rich output
 console = Console()
@@ -40,6 +43,50 @@ def build(
         count=True,
         help="Verbosity level (-v for basic output, -vv for full debug output)",
     ),
+    jobs: str = typer.Option(
+        "1",
+        "--jobs", "-j",
+        help="Maximum number of compiler processes at once, or 'auto' for one per CPU",
+    ),
+    max_parallel_packages: Optional[int] = typer.Option(
+        None,
+        "--max-parallel-packages",
+        min=1,
+        help="Maximum number of dependencies built concurrently (defaults to --jobs)",
+    ),
+    emit_formats: Optional[List[EmitFormat]] = typer.Option(
+        None,
+        "--emit",
+        help="Write build.ninja and/or compile_commands.json for the whole dependency graph instead of building",
+        case_sensitive=False,
+    ),
+    use_daemon: bool = typer.Option(
+        False,
+        "--daemon",
+        help="Build in the background daemon (see 'clyde daemon start'), falling back to a local build",
+    ),
+    watch: bool = typer.Option(
+        False,
+        "--watch", "-w",
+        help="Rebuild whenever sources, headers or package.yml of the package or its dependencies change",
+    ),
+    trace: Optional[Path] = typer.Option(
+        None,
+        "--trace",
+        help="Write a timeline of the build to this file (Chrome trace format; open in chrome://tracing or ui.perfetto.dev)",
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Recompile everything with compiler timing reports (-ftime-trace/-ftime-report); see 'clyde inspect profile'",
+    ),
+    frozen: bool = typer.Option(
+        False,
+        "--frozen",
+        help="Install dependencies exactly as locked in clyde.lock, without looking up versions, and fail if it is out of date",
+    ),
 ) -> None:
     """Build a package."""
     try:
@@ -71,8 +118,42 @@ def build(
                 
         # Create package and builder
         package = Package(path)
-        builder = Builder()
+        builder = Builder(jobs=jobs, max_parallel_packages=max_parallel_packages, profile=profile, frozen=frozen)
+        if trace:
+            builder.collector.enable_trace()
         
+        if emit_formats:
+            written = emit(builder, package, emit_formats, trait_dict)
+            for fmt, written_path in written.items():
+                rprint(f"[green]✓[/green] Wrote {fmt.value}: {written_path}")
+            return
+            
+        if watch:
+            def report(result, changed):
+                if changed:
+                    names = sorted(p.name for p in changed)
+                    shown = ", ".join(names[:5]) + (f" and {len(names) - 5} more" if len(names) > 5 else "")
+                    rprint(f"[blue]↻[/blue] Changed: {shown}")
+                if not result.success:
+                    rprint(f"[red]✗[/red] Build failed")
+                    if result.error:
+                        console.print(result.error)
+                elif result.up_to_date:
+                    rprint(f"[green]✓[/green] {package.name} is up to date")
+                else:
+                    rprint(f"[green]✓[/green] Built {package.name}")
+                if trace:
+                    # Each rebuild replaces the previous timeline
+                    builder.collector.write_trace(trace)
+                    builder.collector.trace.clear()
+                rprint("[dim]Watching for changes (Ctrl+C to stop)...[/dim]")
+                
+            try:
+                watch_and_build(builder, path, report, trait_dict, verbose > 0)
+            except KeyboardInterrupt:
+                pass
+            return
+            
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -85,12 +166,29 @@ def build(
                 total=None
             )
             
-            result = builder.build(package, trait_dict, verbose > 0)
+            result = None
+            if use_daemon and (trace or profile or frozen):
+                build_logger.warning("--trace, --profile and --frozen need a local build; not using the build daemon")
+            elif use_daemon:
+                try:
+                    result = DaemonClient().build(path, trait_dict, verbose > 0)
+                except DaemonUnavailable:
+                    build_logger.warning("Build daemon is not running, building locally")
+            if result is None:
+                result = builder.build(package, trait_dict, verbose > 0)
+                if trace:
+                    builder.collector.write_trace(trace)
+                    rprint(f"[green]✓[/green] Wrote build trace: {trace}")
+                if profile and result.success:
+                    rprint("[green]✓[/green] Saved compiler profiles; run 'clyde inspect profile' to see where compile time went")
             
             if result.success:
                 progress.update(task, completed=True)
                 if verbose == 0:  # Only show success message in non-verbose mode
-                    rprint(f"[green]✓[/green] Built {package.name} {package.version}")
+                    if result.up_to_date:
+                        rprint(f"[green]✓[/green] {package.name} {package.version} is up to date")
+                    else:
+                        rprint(f"[green]✓[/green] Built {package.name} {package.version}")
                     
                     # Show artifacts
                     if result.artifacts:
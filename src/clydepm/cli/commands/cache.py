@@ -2,6 +2,7 @@
 Cache management commands for Clydepm.
 """
 from pathlib import Path
+import re
 import sys
 import logging
 from typing import Optional
@@ -14,6 +15,8 @@ from rich.table import Table
 
 from ...core.package import Package
 from ...build.cache import BuildCache
+from ...build.materialize import MaterializeStrategy
+from ...build.remote import make_cache_server
 
 # Create console for rich output
 console = Console()
@@ -21,6 +24,39 @@ logger = logging.getLogger(__name__)
 
 app = typer.Typer(name="cache", help="Manage the build cache.")
 
+_SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+_AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def _parse_size(value: str) -> Optional[int]:
+    """Parse a size such as 500M or 10G into bytes ("none" for unbounded)."""
+    if value.lower() == "none":
+        return None
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", value, re.IGNORECASE)
+    if not match:
+        raise typer.BadParameter(f"Invalid size: {value} (e.g. 500M, 10G)")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def _parse_age(value: str) -> Optional[float]:
+    """Parse an age such as 12h or 30d into seconds ("none" to keep forever)."""
+    if value.lower() == "none":
+        return None
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*", value)
+    if not match:
+        raise typer.BadParameter(f"Invalid age: {value} (e.g. 12h, 30d)")
+    return float(match.group(1)) * _AGE_UNITS[match.group(2) or "d"]
+
+
+def _format_size(size_bytes: float) -> str:
+    """Format a byte count for display."""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size_bytes < 1024:
+            return f"{size_bytes:.1f} {unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.1f} TB"
+
+
 @app.command()
 def clean(
     clean_all: bool = typer.Option(
@@ -87,20 +123,17 @@ def list_cache(
         artifact_count = 0
         total_size = 0
         
-        # Helper to format size
-        def format_size(size_bytes):
-            for unit in ['B', 'KB', 'MB', 'GB']:
-                if size_bytes < 1024:
-                    return f"{size_bytes:.1f} {unit}"
-                size_bytes /= 1024
-            return f"{size_bytes:.1f} TB"
+        format_size = _format_size
         
         # List final artifacts
         for artifact in cache.artifacts_dir.glob("*"):
             if package and not artifact.name.startswith(f"{package}-"):
                 continue
                 
-            size = artifact.stat().st_size
+            if artifact.is_dir():
+                size = sum(f.stat().st_size for f in artifact.iterdir())
+            else:
+                size = artifact.stat().st_size
             total_size += size
             artifact_count += 1
             
@@ -138,5 +171,150 @@ def list_cache(
         rprint(f"[red]Error:[/red] {str(e)}")
         sys.exit(1)
 
+@app.command()
+def config(
+    materialize: Optional[MaterializeStrategy] = typer.Option(
+        None,
+        "--materialize",
+        help="How cached files are placed in build directories: auto (reflink, then hardlink, then copy), reflink, hardlink or copy",
+        case_sensitive=False,
+    ),
+    max_size: Optional[str] = typer.Option(
+        None,
+        "--max-size",
+        help="Evict least recently used entries beyond this size, e.g. 10G ('none' for unbounded)",
+    ),
+    max_age: Optional[str] = typer.Option(
+        None,
+        "--max-age",
+        help="Evict entries unused for this long, e.g. 30d or 12h ('none' to keep forever)",
+    ),
+    remote: Optional[str] = typer.Option(
+        None,
+        "--remote",
+        help="Shared cache server URL, e.g. http://cache.local:8765 ('none' to disable)",
+    ),
+) -> None:
+    """Show or change cache settings."""
+    try:
+        cache = BuildCache()
+        settings = cache.settings
+        
+        changed = False
+        if materialize is not None:
+            settings.materialize = materialize.value
+            changed = True
+        if max_size is not None:
+            settings.max_size = _parse_size(max_size)
+            changed = True
+        if max_age is not None:
+            settings.max_age = _parse_age(max_age)
+            changed = True
+        if remote is not None:
+            settings.remote_url = None if remote.lower() == "none" else remote
+            changed = True
+        if changed:
+            settings.validate()
+            settings.save(cache.cache_dir)
+            rprint("[green]✓[/green] Cache settings updated")
+            
+        table = Table(show_header=True, header_style="bold")
+        table.add_column("Setting")
+        table.add_column("Value")
+        table.add_row("materialize", settings.materialize)
+        table.add_row("max-size", _format_size(settings.max_size) if settings.max_size is not None else "unbounded")
+        table.add_row("max-age", f"{settings.max_age / 86400:g}d" if settings.max_age is not None else "forever")
+        table.add_row("remote", settings.remote_url or "none")
+        console.print(table)
+        
+    except Exception as e:
+        rprint(f"[red]Error:[/red] {str(e)}")
+        sys.exit(1)
+
+@app.command()
+def gc(
+    max_size: Optional[str] = typer.Option(
+        None,
+        "--max-size",
+        help="Shrink the cache to this size, e.g. 10G (defaults to the configured max size)",
+    ),
+    max_age: Optional[str] = typer.Option(
+        None,
+        "--max-age",
+        help="Remove entries unused for this long, e.g. 30d (defaults to the configured max age)",
+    ),
+    dry_run: bool = typer.Option(
+        False,
+        "--dry-run",
+        help="Only show what would be removed",
+    ),
+) -> None:
+    """Evict least recently used cache entries."""
+    try:
+        cache = BuildCache()
+        size_limit = _parse_size(max_size) if max_size else None
+        age_limit = _parse_age(max_age) if max_age else None
+        if (
+            size_limit is None and age_limit is None
+            and cache.settings.max_size is None and cache.settings.max_age is None
+        ):
+            rprint("[yellow]No limits given or configured; nothing to do.[/yellow] "
+                   "Use --max-size/--max-age or 'clyde cache config'.")
+            return
+            
+        result = cache.gc(max_size=size_limit, max_age=age_limit, dry_run=dry_run)
+        
+        verb = "Would remove" if dry_run else "Removed"
+        rprint(f"[green]✓[/green] {verb} {result.removed} entries ({_format_size(result.freed)}), "
+               f"{result.remaining} entries ({_format_size(result.remaining_size)}) kept")
+        
+    except Exception as e:
+        rprint(f"[red]Error:[/red] {str(e)}")
+        sys.exit(1)
+
+@app.command()
+def serve(
+    host: str = typer.Option(
+        "localhost",
+        "--host",
+        help="Address to listen on. Without --token anyone who can reach it can store "
+             "objects that builds will link, so only listen on trusted networks.",
+    ),
+    port: int = typer.Option(8765, "--port", "-p", help="Port to listen on"),
+    directory: Optional[Path] = typer.Option(
+        None,
+        "--dir",
+        help="Directory to store shared entries in. Defaults to ~/.clydepm/remote-cache",
+    ),
+    token: Optional[str] = typer.Option(
+        None,
+        "--token",
+        envvar="CLYDE_CACHE_TOKEN",
+        help="Shared token clients must send (they read it from CLYDE_CACHE_TOKEN)",
+    ),
+) -> None:
+    """Serve a shared build cache over HTTP for other machines' builds.
+    
+    Without a token, reads and writes are unauthenticated.
+    """
+    directory = directory or Path.home() / ".clydepm" / "remote-cache"
+    try:
+        server = make_cache_server(directory, host, port, token)
+    except OSError as e:
+        rprint(f"[red]Error:[/red] Cannot listen on {host}:{port}: {e}")
+        sys.exit(1)
+    address, bound_port = server.server_address[:2]
+    rprint(f"Serving build cache from {directory} on http://{address}:{bound_port}")
+    if not token:
+        rprint("[yellow]Warning:[/yellow] anyone who can reach this server can store objects; "
+               "use --token unless the network is trusted")
+    rprint(f"Point builds at it with: clyde cache config --remote http://{address}:{bound_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
 # Add list as an alias for ls
 app.command(name="ls")(list_cache)
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Build daemon commands for Clydepm.
+"""
+from pathlib import Path
+from typing import Optional
+import subprocess
+import sys
+import time
+
+import typer
+from rich import print as rprint
+from rich.console import Console
+from rich.table import Table
+
+from ...build.daemon import BuildDaemon, DaemonClient, DaemonUnavailable, get_socket_path
+
+# Create console for rich output
+console = Console()
+
+app = typer.Typer(name="daemon", help="Manage the background build daemon.")
+
+
+@app.command()
+def start(
+    jobs: str = typer.Option(
+        "1",
+        "--jobs", "-j",
+        help="Maximum number of compiler processes at once, or 'auto' for one per CPU",
+    ),
+    foreground: bool = typer.Option(
+        False,
+        "--foreground",
+        help="Run in the foreground instead of detaching",
+    ),
+) -> None:
+    """Start the build daemon."""
+    socket_path = get_socket_path()
+    client = DaemonClient(socket_path, timeout=5)
+    try:
+        status = client.status()
+        rprint(f"[yellow]Build daemon already running[/yellow] (pid {status['pid']})")
+        return
+    except DaemonUnavailable:
+        pass
+
+    if foreground:
+        try:
+            BuildDaemon(socket_path, jobs=jobs).serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    # Detach from the terminal; logs go to ~/.clydepm/build.log
+    log_dir = Path.home() / ".clydepm"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    subprocess.Popen(
+        [sys.executable, "-m", "clydepm.build.daemon", str(socket_path), jobs],
+        cwd=log_dir,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+    # Wait for it to come up
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            status = client.status()
+            rprint(f"[green]✓[/green] Build daemon started (pid {status['pid']})")
+            return
+        except DaemonUnavailable:
+            time.sleep(0.1)
+    rprint("[red]Error:[/red] Build daemon did not start; see ~/.clydepm/build.log")
+    sys.exit(1)
+
+
+@app.command()
+def stop() -> None:
+    """Stop the build daemon."""
+    try:
+        DaemonClient(timeout=5).stop()
+        rprint("[green]✓[/green] Build daemon stopped")
+    except DaemonUnavailable:
+        rprint("Build daemon is not running")
+
+
+@app.command()
+def status() -> None:
+    """Show build daemon status."""
+    try:
+        info = DaemonClient(timeout=5).status()
+    except DaemonUnavailable:
+        rprint("Build daemon is not running")
+        raise typer.Exit(1)
+
+    table = Table("Property", "Value")
+    table.add_row("PID", str(info["pid"]))
+    table.add_row("Socket", str(get_socket_path()))
+    table.add_row("Uptime", f"{info['uptime']:.0f}s")
+    table.add_row("Builds served", str(info["builds"]))
+    table.add_row("Cached packages", str(info["packages"]))
+    console.print(table)
@@ -10,14 +10,17 @@ import signal
 import atexit
 from enum import Enum
 import time
+import json
 
 import typer
 from rich import print as rprint
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.table import Table
 
 from ...core.package import Package
 from ...core.dependency.resolver import DependencyResolver
+from ...build.collector import BuildDataCollector
 
 # Create console for rich output
 console = Console()
@@ -238,10 +241,141 @@ def graph(
         raise typer.Exit(1)
 
 
+def critical_path(
+    package: Optional[str] = typer.Option(
+        None,
+        "--package", "-p",
+        help="Analyze the latest build of this top-level package (defaults to the latest build of any)"
+    ),
+    session: Optional[str] = typer.Option(
+        None,
+        "--session",
+        help="Analyze a specific build session"
+    ),
+    as_json: bool = typer.Option(
+        False,
+        "--json",
+        help="Print the report as JSON"
+    ),
+    build_data: Path = typer.Option(
+        Path.home() / ".clydepm" / "build_data",
+        "--build-data",
+        help="Directory builds record their data in"
+    ),
+) -> None:
+    """Show which chain of dependency builds bounds a build's wall time."""
+    try:
+        report = BuildDataCollector(build_data).critical_path(session, package)
+    except ValueError as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(1)
+    if report is None:
+        console.print("[yellow]No recorded builds found.[/yellow] Run 'clyde build' first.")
+        raise typer.Exit(1)
+        
+    if as_json:
+        print(json.dumps(report.to_json(), indent=2))
+        return
+        
+    table = Table(show_header=True, header_style="bold")
+    table.add_column("Package")
+    table.add_column("Own work", justify="right")
+    table.add_column("Compile", justify="right")
+    table.add_column("Link", justify="right")
+    table.add_column("Earliest start", justify="right")
+    table.add_column("Slack", justify="right")
+    for entry in report.packages:
+        style = "bold red" if entry.critical else None
+        table.add_row(
+            entry.name + (" *" if entry.critical else ""),
+            f"{entry.duration:.2f}s",
+            f"{entry.compile_time:.2f}s",
+            f"{entry.link_time:.2f}s",
+            f"{entry.earliest_start:.2f}s",
+            f"{entry.slack:.2f}s",
+            style=style,
+        )
+    console.print(table)
+    console.print(f"Critical path (*): {' -> '.join(report.path)} ({report.length:.2f}s)")
+    console.print(
+        f"Total work {report.total_work:.2f}s; building packages in parallel can at best "
+        f"be {report.speedup:.2f}x faster than one at a time"
+    )
+
+
+def profile(
+    package: Optional[str] = typer.Option(
+        None,
+        "--package", "-p",
+        help="Show the latest profiled build of this top-level package (defaults to the latest of any)"
+    ),
+    session: Optional[str] = typer.Option(
+        None,
+        "--session",
+        help="Show a specific build session"
+    ),
+    top: int = typer.Option(
+        10,
+        "--top", "-n",
+        min=1,
+        help="Number of headers, templates and translation units to show"
+    ),
+    as_json: bool = typer.Option(
+        False,
+        "--json",
+        help="Print the summary as JSON"
+    ),
+    build_data: Path = typer.Option(
+        Path.home() / ".clydepm" / "build_data",
+        "--build-data",
+        help="Directory builds record their data in"
+    ),
+) -> None:
+    """Show which headers, templates and sources cost the most compile time."""
+    summary = BuildDataCollector(build_data).profile_summary(session, package, top)
+    if summary is None:
+        console.print("[yellow]No profiled builds found.[/yellow] Run 'clyde build --profile' first.")
+        raise typer.Exit(1)
+        
+    if as_json:
+        print(json.dumps(summary.to_json(), indent=2))
+        return
+        
+    console.print(
+        f"{summary.translation_units} translation units, {summary.total:.2f}s of compile time "
+        f"(session {summary.session})"
+    )
+    if summary.headers:
+        table = Table("Header", "Parse time", "Included by", title="Top headers by total parse time")
+        for header, seconds, count in summary.headers:
+            table.add_row(header, f"{seconds:.3f}s", f"{count} TUs")
+        console.print(table)
+    else:
+        console.print("[dim]Per-header times need Clang's -ftime-trace; GCC only reports phases.[/dim]")
+    if summary.templates:
+        table = Table("Template", "Instantiation time", "Instantiated in", title="Top templates")
+        for name, seconds, count in summary.templates:
+            table.add_row(name, f"{seconds:.3f}s", f"{count} TUs")
+        console.print(table)
+    for title, units in (("frontend", summary.frontend), ("backend", summary.backend)):
+        table = Table("Package", "Source", "Frontend", "Backend", "Total", title=f"Top translation units by {title} time")
+        for unit in units:
+            table.add_row(
+                unit.package or "",
+                unit.source,
+                f"{unit.frontend:.3f}s",
+                f"{unit.backend:.3f}s",
+                f"{unit.total:.3f}s",
+            )
+        console.print(table)
+
+
 # Create Typer app for inspect commands
 app = typer.Typer(help="Build inspection tools")
 
 # Register commands directly on the inspect app
 app.command()(analyze)
 app.command()(serve)
-app.command()(graph) 
\ No newline at end of file
+app.command()(graph)
+app.command(name="critical-path")(critical_path)
+app.command()(profile) 
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Package manifest loading.
+
+Manifests are parsed with libyaml when PyYAML was built with it, and every
+validated manifest is cached in marshal form under the digest of its
+contents. Loading a manifest seen before is a file read, a hash and an
+unmarshal, skipping both YAML parsing and pydantic validation.
+"""
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import logging
+import marshal
+import os
+import threading
+
+import yaml
+
+from .schema import CompilerFlags, PackageConfig, UnityConfig
+
+logger = logging.getLogger(__name__)
+
+# The C loader is an order of magnitude faster, but PyYAML may be built without it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Bump when PackageConfig changes so stale cache entries are ignored
+MANIFEST_CACHE_VERSION = 1
+
+# Nested models that model_construct() leaves as plain dicts
+_NESTED_MODELS = {"cflags": CompilerFlags, "unity": UnityConfig}
+
+
+def get_manifest_cache_dir() -> Path:
+    """Get the default manifest cache directory (~/.clydepm/manifests)."""
+    return Path(os.environ.get("CLYDE_MANIFEST_CACHE", Path.home() / ".clydepm" / "manifests"))
+
+
+class ManifestLoader:
+    """Loads and validates package manifests, caching the results."""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """Initialize loader.
+
+        Args:
+            cache_dir: Directory for cached manifests. Defaults to get_manifest_cache_dir()
+        """
+        self.cache_dir = cache_dir or get_manifest_cache_dir()
+
+    def load(self, path: Path) -> Tuple[Dict[str, Any], PackageConfig]:
+        """Load a manifest.
+
+        Args:
+            path: package.yml file
+
+        Returns:
+            Tuple of (raw configuration, validated configuration)
+
+        Raises:
+            OSError: If the file can't be read
+            pydantic.ValidationError: If the manifest is invalid
+        """
+        content = path.read_bytes()
+        key = hashlib.sha256(content).hexdigest()
+        cached = self._read(key)
+        if cached is not None:
+            config, validated = cached
+            return config, self._construct(validated)
+
+        config = yaml.load(content, Loader=YamlLoader)
+        validated = PackageConfig.model_validate(config)
+        self._write(key, config, validated.model_dump())
+        return config, validated
+
+    def _entry(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.marshal"
+
+    def _read(self, key: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        try:
+            with open(self._entry(key), "rb") as f:
+                version, config, validated = marshal.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            logger.debug("Ignoring unreadable manifest cache entry %s: %s", key, e)
+            return None
+        if version != MANIFEST_CACHE_VERSION:
+            return None
+        return config, validated
+
+    def _write(self, key: str, config: Dict[str, Any], validated: Dict[str, Any]) -> None:
+        entry = self._entry(key)
+        try:
+            data = marshal.dumps((MANIFEST_CACHE_VERSION, config, validated))
+        except ValueError:
+            # YAML types marshal can't store, such as dates; parse it every time
+            return
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            temp = entry.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            temp.write_bytes(data)
+            os.replace(temp, entry)
+        except OSError as e:
+            logger.debug("Could not cache manifest %s: %s", key, e)
+
+    @staticmethod
+    def _construct(validated: Dict[str, Any]) -> PackageConfig:
+        """Rebuild a PackageConfig from data that already passed validation."""
+        for name, model in _NESTED_MODELS.items():
+            if validated.get(name) is not None:
+                validated[name] = model.model_construct(**validated[name])
+        return PackageConfig.model_construct(**validated)
+
+
+def load_manifest(path: Path) -> Tuple[Dict[str, Any], PackageConfig]:
+    """Load a manifest using the default cache (see ManifestLoader.load())."""
+    return ManifestLoader().load(path)
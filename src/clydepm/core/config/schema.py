@@ -11,6 +11,13 @@ class CompilerFlags(BaseModel):
     
     model_config = ConfigDict(extra="forbid")
 
+class UnityConfig(BaseModel):
+    """Unity (jumbo) build configuration."""
+    batch_size: int = Field(default=8, ge=1)  # Sources per generated translation unit
+    exclude: List[str] = Field(default_factory=list)  # Globs of sources compiled on their own
+    
+    model_config = ConfigDict(extra="forbid")
+
 class PackageConfig(BaseModel):
     """Package configuration schema."""
     name: str = Field(pattern=r'^(?:@[a-zA-Z0-9_-]+/)?[a-zA-Z0-9_-]+$')
@@ -23,6 +30,8 @@ class PackageConfig(BaseModel):
     dev_requires: Dict[str, str] = Field(default_factory=dict)
     traits: Dict[str, str] = Field(default_factory=dict)
     variants: Dict[str, Dict[str, Union[str, Dict[str, str]]]] = Field(default_factory=dict)
+    pch: Optional[str] = None  # Header to precompile, relative to the package root
+    unity: Optional[UnityConfig] = None
     
     model_config = ConfigDict(extra="forbid")
 
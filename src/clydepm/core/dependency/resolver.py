@@ -10,7 +10,7 @@ import tempfile
 import logging
 import time
 
-from ..package import Package
+from ..package import Package, load_package
 from ..version import Version, VersionRange, VersionResolver
 
 # Configure logging
@@ -115,7 +115,7 @@ class DependencyResolver:
                 
                 if dep_path.exists() and (dep_path / "package.yml").exists():
                     try:
-                        dep_pkg = Package(dep_path)
+                        dep_pkg = load_package(dep_path)
                         # For local dependencies, we use the name from the requires section
                         # since the actual package name might be different
                         logger.debug(f"Successfully loaded local package {dep_name}")
@@ -169,7 +169,7 @@ class DependencyResolver:
                 if dep_path.exists() and pkg_yml.exists():
                     try:
                         logger.debug(f"Found package.yml, attempting to load package")
-                        dep_pkg = Package(dep_path)
+                        dep_pkg = load_package(dep_path)
                         # Validate package name matches its path
                         self._validate_package_name(dep_pkg, dep_path)
                         # Use the full package name for comparison
@@ -298,7 +298,25 @@ class DependencyResolver:
             
         logger.debug(f"Final build order: {[pkg.name for pkg in order]}")
         return order
-        
+
+    def get_build_graph(self) -> Dict[str, Set[str]]:
+        """Get the direct dependencies of every package, for parallel scheduling.
+
+        Returns:
+            Dictionary mapping each node name to the node names it depends on
+
+        Raises:
+            ValueError: If circular dependencies found
+        """
+        cycles = self.detect_cycles()
+        if cycles:
+            cycle_str = " -> ".join(cycles[0])
+            error_msg = f"Circular dependency detected: {cycle_str}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+
+        return {name: set(node.dependencies) for name, node in self.nodes.items()}
+
     def export_graph(self, output_path: Optional[Path] = None) -> Dict:
         """Export dependency graph as JSON.
         
@@ -0,0 +1,116 @@
+"""
+Dependency lockfile (clyde.lock).
+
+Records the exact version, source tarball and content digest every remote
+dependency resolved to, so later installs can fetch exactly that without
+asking the registry which versions exist.
+"""
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+import hashlib
+import json
+import os
+import threading
+
+from .version.ranges import VersionRange
+from .version.version import Version
+
+LOCKFILE_NAME = "clyde.lock"
+LOCKFILE_VERSION = 1
+
+# Build outputs and nested installs that don't belong to a package's sources
+_UNHASHED_DIRS = {".build", "deps", ".git"}
+
+
+def tree_digest(path: Path) -> str:
+    """Hash a package's source tree: every file's relative path and content."""
+    hasher = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d not in _UNHASHED_DIRS)
+        for name in sorted(files):
+            file_path = Path(root) / name
+            hasher.update(file_path.relative_to(path).as_posix().encode() + b"\0")
+            hasher.update(hashlib.sha256(file_path.read_bytes()).digest())
+    return "sha256:" + hasher.hexdigest()
+
+
+def satisfies(version: str, spec: str) -> bool:
+    """Check whether a version meets a dependency spec such as "^1.2.0"."""
+    try:
+        return VersionRange.parse(spec).matches(Version.parse(version))
+    except ValueError:
+        return False
+
+
+@dataclass
+class LockedPackage:
+    """A dependency as it was resolved."""
+    version: str
+    source: str  # Tarball URL
+    digest: str  # tree_digest() of the unpacked sources
+    requires: Dict[str, str] = field(default_factory=dict)  # The package's own dependencies
+
+
+class Lockfile:
+    """The resolved dependencies of a package, saved beside its package.yml."""
+
+    def __init__(self, path: Path, packages: Optional[Dict[str, LockedPackage]] = None):
+        """Initialize lockfile.
+
+        Args:
+            path: clyde.lock file
+            packages: Locked packages by dependency name
+        """
+        self.path = path
+        self.packages: Dict[str, LockedPackage] = packages or {}
+        self.changed = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, package_dir: Path) -> "Lockfile":
+        """Load a package's lockfile, or start an empty one if it has none.
+
+        Raises:
+            ValueError: If the lockfile can't be read
+        """
+        path = package_dir / LOCKFILE_NAME
+        if not path.exists():
+            return cls(path)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") != LOCKFILE_VERSION:
+                raise ValueError(f"unsupported lockfile version {data.get('version')}")
+            packages = {name: LockedPackage(**entry) for name, entry in data["packages"].items()}
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid {path}: {e}")
+        return cls(path, packages)
+
+    def get(self, name: str) -> Optional[LockedPackage]:
+        """Get a locked dependency."""
+        with self._lock:
+            return self.packages.get(name)
+
+    def lock(self, name: str, package: LockedPackage) -> None:
+        """Record how a dependency was resolved."""
+        with self._lock:
+            if self.packages.get(name) != package:
+                self.packages[name] = package
+                self.changed = True
+
+    def save(self) -> None:
+        """Write the lockfile if anything changed since it was loaded."""
+        with self._lock:
+            if not self.changed:
+                return
+            data = {
+                "version": LOCKFILE_VERSION,
+                "packages": {name: asdict(self.packages[name]) for name in sorted(self.packages)},
+            }
+            temp = self.path.with_suffix(".lock.tmp")
+            with open(temp, "w") as f:
+                json.dump(data, f, indent=2)
+                f.write("\n")
+            os.replace(temp, self.path)
+            self.changed = False
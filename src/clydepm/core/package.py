@@ -7,10 +7,13 @@ from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 import hashlib
 import json
+import os
+import threading
 import yaml
 from pydantic import BaseModel, Field, ValidationError
 from .version.version import Version
-from .config.schema import PackageConfig
+from .config.schema import PackageConfig, UnityConfig
+from .config.loader import load_manifest
 
 
 class PackageType(str, Enum):
@@ -84,12 +87,11 @@ class Package:
     ):
         self.path = Path(path)
         self.form = form
-        self._config = self._load_config()
         self._traits = {}  # Initialize traits dictionary
         
-        # Validate config using schema
+        # Load config, validated against the schema
         try:
-            self._validated_config = PackageConfig(**self._config)
+            self._config, self._validated_config = self._load_config()
         except ValidationError as e:
             raise ValueError(f"Invalid package.yml configuration:\n{e}")
         
@@ -104,9 +106,10 @@ class Package:
             self.package_type = package_type
             
         self.build_metadata: Optional[BuildMetadata] = None
+        self._closure: Optional[DependencyClosure] = None
         
-    def _load_config(self) -> Dict:
-        """Load package configuration from yaml file."""
+    def _load_config(self) -> Tuple[Dict, PackageConfig]:
+        """Load and validate package configuration from yaml file."""
         config_file = self.path / "package.yml"
         if not config_file.exists():
             config_file = self.path / "package.yaml"
@@ -116,8 +119,7 @@ class Package:
                 f"No package.yml or package.yaml found in {self.path}"
             )
             
-        with open(config_file) as f:
-            return yaml.safe_load(f)
+        return load_manifest(config_file)
             
     def save_config(self) -> None:
         """Save package configuration to yaml file."""
@@ -183,50 +185,58 @@ class Package:
     
     def get_local_dependencies(self) -> List["Package"]:
         """Get all local dependencies."""
-        packages = []
-        
-        # Get dependencies from config
-        deps = self.get_dependencies()
-        for name, spec in deps.items():
-            if isinstance(spec, str):
-                if spec.startswith("local:"):
-                    # Handle local dependency with path
-                    local_path = spec[6:]  # Remove "local:" prefix
-                    dep_path = (self.path / local_path).resolve()
-                    if dep_path.exists() and (dep_path / "package.yml").exists():
-                        packages.append(Package(dep_path))
-                    else:
-                        raise ValueError(f"Local dependency {name} not found at {dep_path}")
-                    
-        return packages
+        return [load_package(path) for path in self._local_dependency_paths()]
         
     def get_remote_dependencies(self) -> List["Package"]:
         """Get all remote dependencies."""
-        packages = []
-        
-        # Get dependencies from config
-        deps = self.get_dependencies()
-        for name, spec in deps.items():
-            if isinstance(spec, str):
-                if not spec.startswith("local:"):
-                    # This is a remote dependency, should be in deps/
-                    dep_path = self.path / "deps" / name
-                    if dep_path.exists() and (dep_path / "package.yml").exists():
-                        packages.append(Package(dep_path))
-                    
-        return packages
+        return [load_package(path) for path in self._remote_dependency_paths()]
+
+    def _local_dependency_paths(self) -> List[Path]:
+        """Get the directories of local dependencies."""
+        paths = []
+        for name, spec in self.get_dependencies().items():
+            if isinstance(spec, str) and spec.startswith("local:"):
+                # Handle local dependency with path
+                local_path = spec[6:]  # Remove "local:" prefix
+                dep_path = (self.path / local_path).resolve()
+                if dep_path.exists() and (dep_path / "package.yml").exists():
+                    paths.append(dep_path)
+                else:
+                    raise ValueError(f"Local dependency {name} not found at {dep_path}")
+        return paths
+
+    def _remote_dependency_paths(self) -> List[Path]:
+        """Get the directories of installed remote dependencies."""
+        paths = []
+        for name, spec in self.get_dependencies().items():
+            if isinstance(spec, str) and not spec.startswith("local:"):
+                # This is a remote dependency, should be in deps/
+                dep_path = self.path / "deps" / name
+                if dep_path.exists() and (dep_path / "package.yml").exists():
+                    paths.append(dep_path)
+        return paths
+
+    def dependency_closure(self, refresh: bool = False) -> "DependencyClosure":
+        """Get all transitive dependencies, loading them on first use.
+        
+        Args:
+            refresh: Load the dependencies again, e.g. after installing some
+            
+        Returns:
+            The package's dependency closure
+        """
+        if self._closure is None or refresh:
+            self._closure = DependencyClosure(self)
+        return self._closure
 
     def get_all_dependencies(self) -> List["Package"]:
-        """Get all dependencies (both local and remote)."""
-        deps = []
-        deps.extend(self.get_local_dependencies())
-        deps.extend(self.get_remote_dependencies())
-        return deps
+        """Get all direct dependencies (both local and remote)."""
+        return self.dependency_closure().dependencies(self)
         
     def get_all_dependency_includes(self) -> List[Path]:
-        """Get include paths from all dependencies."""
+        """Get include paths from all transitive dependencies, each listed once."""
         includes = []
-        for dep in self.get_all_dependencies():
+        for dep in self.dependency_closure().packages:
             # Only add the public include directory
             dep_include = dep.path / "include"
             if dep_include.exists():
@@ -235,19 +245,19 @@ class Package:
                 pkg_include = dep_include / dep.name
                 if pkg_include.exists():
                     includes.append(pkg_include)
-            # Recursively get includes from nested dependencies
-            includes.extend(dep.get_all_dependency_includes())
         return includes
         
     def get_all_dependency_libs(self) -> Tuple[List[Path], List[str]]:
-        """Get library paths and flags from all dependencies.
+        """Get library paths and flags from all transitive dependencies.
+        
+        Each library is listed once, before the libraries it depends on.
         
         Returns:
             Tuple of (library paths, linker flags)
         """
         libs = []
         ldflags = []
-        for dep in self.get_all_dependencies():
+        for dep in self.dependency_closure().packages:
             if dep.package_type == PackageType.LIBRARY:
                 # Add the library from its build directory
                 lib_path = dep.get_build_dir()
@@ -255,10 +265,6 @@ class Package:
                     libs.append(lib_path)
                     # Add -l flag for this library
                     ldflags.append(f"-l{dep.name}")
-            # Recursively get libraries from nested dependencies
-            dep_libs, dep_flags = dep.get_all_dependency_libs()
-            libs.extend(dep_libs)
-            ldflags.extend(dep_flags)
         return libs, ldflags
     
     def get_source_files(self) -> List[Path]:
@@ -280,18 +286,34 @@ class Package:
                 
         return sources  # Return the collected source files
     
+    def get_pch(self) -> Optional[Path]:
+        """Get the header to precompile for every source, if the package declares one."""
+        if not self._validated_config.pch:
+            return None
+        return self.path / self._validated_config.pch
+        
+    def get_unity_config(self) -> Optional[UnityConfig]:
+        """Get the unity build configuration, if the package opts in."""
+        return self._validated_config.unity
+        
+    @property
+    def language(self) -> str:
+        """Get the package language as a GCC language name ("c" or "c++")."""
+        return "c" if self._validated_config.language == "c" else "c++"
+    
     def create_build_metadata(self, compiler_info: CompilerInfo) -> BuildMetadata:
         """Create build metadata for binary packages."""
         # Get all include paths
         includes = self._get_includes()
         includes.extend(self.get_all_dependency_includes())
+        dep_libs, dep_flags = self.get_all_dependency_libs()
         
         return BuildMetadata(
             compiler=compiler_info,
             cflags=self._get_cflags(),
-            ldflags=self._get_ldflags(),  # Add ldflags
+            ldflags=self._get_ldflags() + dep_flags,
             includes=includes,
-            libs=self._get_libs(),
+            libs=self._get_libs() + dep_libs,
             traits=self._get_traits()
         )
     
@@ -316,7 +338,7 @@ class Package:
         return cflags
 
     def _get_ldflags(self) -> List[str]:
-        """Get linker flags for the package."""
+        """Get the package's own linker flags."""
         ldflags = []
         
         # Get global ldflags
@@ -332,10 +354,6 @@ class Package:
                     ldflags.extend(variant_config["ldflags"]["gcc"].split())
                 if "g++" in variant_config and "ldflags" in variant_config["ldflags"]:
                     ldflags.extend(variant_config["ldflags"]["g++"].split())
-        
-        # Add dependency ldflags
-        _, dep_flags = self.get_all_dependency_libs()
-        ldflags.extend(dep_flags)
                 
         return ldflags
     
@@ -357,15 +375,12 @@ class Package:
         return includes
     
     def _get_libs(self) -> List[Path]:
-        """Get library paths for the package."""
+        """Get the package's own library paths."""
         libs = []
         # Add own lib directory
         lib_dir = self.path / "lib"
         if lib_dir.exists():
             libs.append(lib_dir)
-        # Add dependency library paths
-        dep_libs, _ = self.get_all_dependency_libs()
-        libs.extend(dep_libs)
         return libs
     
     def _get_traits(self) -> Dict[str, str]:
@@ -514,4 +529,113 @@ class Package:
                 f"Header {header.name} should be in include/{self.package_name}/"
             )
             
-        return warnings 
\ No newline at end of file
+        return warnings 
+
+class DependencyClosure:
+    """All transitive dependencies of a package, each loaded once.
+    
+    A package reached along several paths (a diamond) is loaded and listed
+    once. Packages are ordered so every package comes before the packages it
+    depends on, with siblings in declaration order, which is the order static
+    libraries have to be linked in.
+    """
+    def __init__(self, root: Package):
+        """Load the dependencies of a package.
+        
+        Args:
+            root: Package whose dependencies to load
+            
+        Raises:
+            ValueError: If a local dependency is missing or the dependencies form a cycle
+        """
+        self.root = root
+        self._loaded: Dict[Path, Package] = {root.path.resolve(): root}
+        self._direct: Dict[Path, List[Package]] = {}
+        order: List[Package] = []
+        self._visit(root, set(), order)
+        # Postorder lists dependencies first; the root ends up first once reversed
+        order.reverse()
+        self.packages: List[Package] = order[1:]
+        
+    def _load(self, path: Path) -> Package:
+        key = path.resolve()
+        if key not in self._loaded:
+            self._loaded[key] = load_package(key)
+        return self._loaded[key]
+        
+    def _visit(self, package: Package, visiting: Set[Path], order: List[Package]) -> None:
+        key = package.path.resolve()
+        if key in visiting:
+            raise ValueError(f"Dependency cycle through {package.name}")
+        if key in self._direct:
+            return
+        visiting.add(key)
+        paths = package._local_dependency_paths() + package._remote_dependency_paths()
+        deps = self._direct[key] = [self._load(path) for path in paths]
+        # Visit in reverse so siblings keep declaration order once reversed
+        for dep in reversed(deps):
+            self._visit(dep, visiting, order)
+        visiting.discard(key)
+        order.append(package)
+        
+    def dependencies(self, package: Package) -> List[Package]:
+        """Get the direct dependencies of a package in the closure."""
+        return list(self._direct[package.path.resolve()])
+
+
+class PackageRegistry:
+    """Process-wide cache of parsed packages, keyed by resolved path.
+    
+    A package is parsed once and the same instance is handed out until its
+    package.yml changes, which is checked with a stat per lookup.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Path, Tuple[Tuple[int, int, int, int], Package]] = {}
+        
+    @staticmethod
+    def _state(path: Path) -> Tuple[int, int, int, int]:
+        try:
+            st = os.stat(path / "package.yml")
+        except FileNotFoundError:
+            st = os.stat(path / "package.yaml")
+        return st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino
+        
+    def get(self, path: Path) -> Package:
+        """Get the package in a directory, parsing it only if it changed.
+        
+        Raises:
+            FileNotFoundError: If the directory has no package.yml
+            ValueError: If the package.yml is invalid
+        """
+        key = Path(path).resolve()
+        try:
+            state = self._state(key)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No package.yml or package.yaml found in {path}")
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == state:
+            return entry[1]
+        
+        package = Package(key)
+        with self._lock:
+            self._entries[key] = (state, package)
+        return package
+        
+    def clear(self) -> None:
+        """Forget all packages."""
+        with self._lock:
+            self._entries.clear()
+            
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+registry = PackageRegistry()
+
+
+def load_package(path: Path) -> Package:
+    """Get the package in a directory, shared with everyone else loading it."""
+    return registry.get(path)
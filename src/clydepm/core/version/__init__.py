@@ -5,11 +5,15 @@ Version handling for Clyde package manager.
 from .version import Version
 from .ranges import VersionRange, Constraint, Operator
 from .resolver import VersionResolver
+from .solver import DependencyProvider, SolveFailure, Solver
 
 __all__ = [
     'Version',
     'VersionRange',
     'Constraint',
     'Operator',
-    'VersionResolver'
+    'VersionResolver',
+    'DependencyProvider',
+    'SolveFailure',
+    'Solver'
 ] 
\ No newline at end of file
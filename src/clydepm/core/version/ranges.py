@@ -5,10 +5,13 @@ Implements version constraint parsing and matching.
 from dataclasses import dataclass
 from enum import Enum
 from typing import List, Optional, Tuple
+import logging
 import re
 
 from .version import Version
 
+logger = logging.getLogger(__name__)
+
 class Operator(Enum):
     """Version comparison operators."""
     EQ = "="  # Exactly equal
@@ -138,12 +141,12 @@ class Constraint:
         Returns:
             bool: True if the version matches the constraint
         """
-        print(f"Constraint.matches: {self.operator} {self.version} vs {version} (allow_prerelease={allow_prerelease})")
+        logger.debug("Constraint.matches: %s %s vs %s (allow_prerelease=%s)", self.operator, self.version, version, allow_prerelease)
 
         # For exact matches, compare everything including prerelease
         if self.operator == Operator.EQ:
             result = version == self.version
-            print(f"  Exact match: {result}")
+            logger.debug("  Exact match: %s", result)
             return result
 
         # For range matches, first check if base version matches
@@ -153,23 +156,23 @@ class Constraint:
         # Check if base version matches the constraint
         matches = self._check_compatibility(version, base_version, base_constraint)
         if not matches:
-            print(f"  Base version matches: False")
+            logger.debug("  Base version matches: False")
             return False
 
-        print(f"  Base version matches: True")
+        logger.debug("  Base version matches: True")
 
         # If version is a prerelease, it can only match if:
         # 1. The constraint has a prerelease OR allow_prerelease is True
         # 2. The base version matches
         if version.prerelease:
             has_matching_prerelease = self.version.prerelease is not None
-            print(f"  Has matching prerelease: {has_matching_prerelease}")
+            logger.debug("  Has matching prerelease: %s", has_matching_prerelease)
             if not (has_matching_prerelease or allow_prerelease):
                 return False
 
             # For range operators, check if version satisfies the constraint
             result = self._check_prerelease_compatibility(version)
-            print(f"  Final result: {result}")
+            logger.debug("  Final result: %s", result)
             return result
 
         return True
@@ -217,12 +220,12 @@ class VersionRange:
         Returns:
             True if version matches range
         """
-        print(f"\nVersionRange.matches: {version}")
-        print(f"  Constraints: {[f'{c.operator} {c.version}' for c in self.constraints]}")
+        logger.debug("VersionRange.matches: %s", version)
+        logger.debug("  Constraints: %s", self.constraints)
 
         # If version is a prerelease, check if any constraint has a prerelease
         if version.prerelease:
-            print("  Version is prerelease")
+            logger.debug("  Version is prerelease")
             has_prerelease = any(c.version.prerelease is not None for c in self.constraints)
             if not has_prerelease:
                 return False
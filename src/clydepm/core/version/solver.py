@@ -0,0 +1,424 @@
+"""
+Dependency version solving for Clyde package manager.
+
+A conflict-driven solver in the style of PubGrub
+(https://github.com/dart-lang/pub/blob/master/doc/solver.md). It picks one
+version of every package in the graph so that every ``requires`` range is
+met. When a choice leads to a conflict, the solver works out the root cause,
+records it as a new incompatibility so the same dead end is never explored
+again, and backjumps straight to the decision responsible. If no solution
+exists, the chain of incompatibilities that proved it becomes the error
+message.
+
+Versions are finite sets here (what the registry has), so terms are plain
+sets of versions rather than ranges.
+"""
+from dataclasses import dataclass
+from enum import Enum, auto
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import logging
+
+from .version import Version
+from .ranges import VersionRange
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyProvider:
+    """Where the solver gets packages from."""
+
+    def versions(self, package: str) -> List[Version]:
+        """Get the available versions of a package."""
+        raise NotImplementedError
+
+    def dependencies(self, package: str, version: Version) -> Dict[str, str]:
+        """Get the dependencies of a package version as version range specs."""
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class Term:
+    """A statement about a package: its version is in ``versions``, or, if
+    ``absent`` is set, it may also not be selected at all."""
+    package: str
+    versions: FrozenSet[Version]
+    absent: bool
+
+    @property
+    def positive(self) -> bool:
+        """Whether the term requires the package to be selected."""
+        return not self.absent
+
+    def intersect(self, other: "Term") -> "Term":
+        return Term(self.package, self.versions & other.versions, self.absent and other.absent)
+
+    def negate(self, domain: FrozenSet[Version]) -> "Term":
+        return Term(self.package, domain - self.versions, not self.absent)
+
+    def satisfies(self, other: "Term") -> bool:
+        """Whether this term being true makes the other true."""
+        return self.versions <= other.versions and (other.absent or not self.absent)
+
+    def disjoint(self, other: "Term") -> bool:
+        """Whether this term and the other can't both be true."""
+        return not (self.versions & other.versions) and not (self.absent and other.absent)
+
+    @property
+    def empty(self) -> bool:
+        return not self.versions and not self.absent
+
+
+class Incompatibility:
+    """A set of terms that can't all be true at once."""
+
+    def __init__(
+        self,
+        terms: Iterable[Term],
+        reason: Optional[str] = None,
+        causes: Tuple["Incompatibility", ...] = ()
+    ):
+        """Initialize incompatibility.
+
+        Args:
+            terms: Terms, merged per package
+            reason: Why it holds, for incompatibilities given to the solver
+            causes: The two incompatibilities it was derived from, for learned ones
+        """
+        self.terms: Dict[str, Term] = {}
+        for term in terms:
+            existing = self.terms.get(term.package)
+            self.terms[term.package] = existing.intersect(term) if existing else term
+        self.reason = reason
+        self.causes = causes
+
+
+class SolveFailure(ValueError):
+    """No set of versions satisfies every requirement."""
+
+    def __init__(self, incompatibility: Incompatibility, explanation: str):
+        super().__init__(explanation)
+        self.incompatibility = incompatibility
+
+
+@dataclass
+class _Assignment:
+    term: Term
+    level: int
+    index: int
+    cause: Optional[Incompatibility]  # None for decisions
+
+
+class _Relation(Enum):
+    SATISFIED = auto()
+    CONTRADICTED = auto()
+    INCONCLUSIVE = auto()
+    ALMOST_SATISFIED = auto()
+
+
+class Solver:
+    """Finds one version of every package needed by a root package."""
+
+    def __init__(self, provider: DependencyProvider, preferred: Optional[Dict[str, Version]] = None):
+        """Initialize solver.
+
+        Args:
+            provider: Source of versions and dependencies
+            preferred: Versions to pick when allowed (e.g. from a lockfile).
+                Otherwise the highest allowed version is picked.
+        """
+        self.provider = provider
+        self.preferred = preferred or {}
+        self._domains: Dict[str, FrozenSet[Version]] = {}
+        self._dependencies: Dict[Tuple[str, Version], Dict[str, str]] = {}
+        self._incompatibilities: Dict[str, List[Incompatibility]] = {}
+        self._assignments: List[_Assignment] = []
+        self._positive: Dict[str, Term] = {}  # Accumulated term per package
+        self._decisions: Dict[str, Version] = {}
+        self._root = ""
+
+    def solve(self, root: str) -> Dict[str, Version]:
+        """Solve the dependencies of a package.
+
+        Args:
+            root: Package to solve for; the provider must have exactly one version of it
+
+        Returns:
+            Selected version of every package in the graph, root included
+
+        Raises:
+            SolveFailure: If the requirements conflict, explaining why
+        """
+        self._root = root
+        self._add(Incompatibility([Term(root, frozenset(), True)], reason=f"{root} is being built"))
+        package: Optional[str] = root
+        while package is not None:
+            self._propagate(package)
+            package = self._decide()
+        logger.debug("Solved %d packages with %d incompatibilities",
+                     len(self._decisions), sum(len(i) for i in self._incompatibilities.values()))
+        return dict(self._decisions)
+
+    def _domain(self, package: str) -> FrozenSet[Version]:
+        if package not in self._domains:
+            self._domains[package] = frozenset(self.provider.versions(package))
+        return self._domains[package]
+
+    def _add(self, incompatibility: Incompatibility) -> None:
+        for package in incompatibility.terms:
+            self._incompatibilities.setdefault(package, []).append(incompatibility)
+
+    # Partial solution
+
+    def _term(self, package: str) -> Term:
+        term = self._positive.get(package)
+        return term if term is not None else Term(package, self._domain(package), True)
+
+    def _assign(self, term: Term, cause: Optional[Incompatibility]) -> None:
+        self._assignments.append(_Assignment(term, len(self._decisions), len(self._assignments), cause))
+        self._positive[term.package] = self._term(term.package).intersect(term)
+
+    def _backtrack(self, level: int) -> None:
+        """Undo every decision after the given level and everything derived from them."""
+        self._assignments = [a for a in self._assignments if a.level <= level]
+        self._positive = {}
+        self._decisions = {}
+        for assignment in self._assignments:
+            term = assignment.term
+            self._positive[term.package] = self._term(term.package).intersect(term)
+            if assignment.cause is None:
+                self._decisions[term.package] = next(iter(term.versions))
+
+    def _satisfier(self, term: Term) -> _Assignment:
+        """Find the earliest assignment after which the term is satisfied."""
+        accumulated = Term(term.package, self._domain(term.package), True)
+        for assignment in self._assignments:
+            if assignment.term.package != term.package:
+                continue
+            accumulated = accumulated.intersect(assignment.term)
+            if accumulated.satisfies(term):
+                return assignment
+        raise AssertionError(f"{term} is not satisfied")
+
+    def _relation(self, incompatibility: Incompatibility) -> Tuple[_Relation, Optional[Term]]:
+        unsatisfied = None
+        for term in incompatibility.terms.values():
+            current = self._term(term.package)
+            if current.satisfies(term):
+                continue
+            if current.disjoint(term):
+                return _Relation.CONTRADICTED, None
+            if unsatisfied is not None:
+                return _Relation.INCONCLUSIVE, None
+            unsatisfied = term
+        if unsatisfied is None:
+            return _Relation.SATISFIED, None
+        return _Relation.ALMOST_SATISFIED, unsatisfied
+
+    # Solving
+
+    def _propagate(self, package: str) -> None:
+        """Derive everything the incompatibilities imply after a package changed."""
+        changed = {package}
+        while changed:
+            current = changed.pop()
+            for incompatibility in reversed(list(self._incompatibilities.get(current, []))):
+                relation, term = self._relation(incompatibility)
+                if relation == _Relation.SATISFIED:
+                    cause = self._resolve_conflict(incompatibility)
+                    relation, term = self._relation(cause)
+                    self._assign(term.negate(self._domain(term.package)), cause)
+                    changed = {term.package}
+                    break
+                if relation == _Relation.ALMOST_SATISFIED:
+                    self._assign(term.negate(self._domain(term.package)), incompatibility)
+                    changed.add(term.package)
+
+    def _resolve_conflict(self, incompatibility: Incompatibility) -> Incompatibility:
+        """Find the root cause of a conflict and backjump to where it can be avoided.
+
+        Returns:
+            The root cause, which is almost satisfied after backjumping
+
+        Raises:
+            SolveFailure: If the root cause rules out the root package itself
+        """
+        learned = False
+        while not self._is_failure(incompatibility):
+            recent_term: Optional[Term] = None
+            recent: Optional[_Assignment] = None
+            difference: Optional[Term] = None
+            previous_level = 1
+            for term in incompatibility.terms.values():
+                satisfier = self._satisfier(term)
+                if recent is None:
+                    recent_term, recent = term, satisfier
+                elif recent.index < satisfier.index:
+                    previous_level = max(previous_level, recent.level)
+                    recent_term, recent = term, satisfier
+                    difference = None
+                else:
+                    previous_level = max(previous_level, satisfier.level)
+                if recent_term is term:
+                    # The part of the satisfier the term doesn't need
+                    domain = self._domain(term.package)
+                    difference = recent.term.intersect(term.negate(domain))
+                    if difference.empty:
+                        difference = None
+                    else:
+                        previous_level = max(previous_level, self._satisfier(difference.negate(domain)).level)
+
+            if recent.cause is None or previous_level < recent.level:
+                self._backtrack(previous_level)
+                if learned:
+                    self._add(incompatibility)
+                return incompatibility
+
+            # Replace the satisfier with what caused it
+            terms = [t for t in incompatibility.terms.values() if t.package != recent_term.package]
+            terms += [t for t in recent.cause.terms.values() if t.package != recent.term.package]
+            if difference is not None:
+                terms.append(difference.negate(self._domain(difference.package)))
+            incompatibility = self._derive(terms, (incompatibility, recent.cause))
+            learned = True
+        raise SolveFailure(incompatibility, self._explain(incompatibility))
+
+    def _derive(self, terms: List[Term], causes: Tuple[Incompatibility, Incompatibility]) -> Incompatibility:
+        incompatibility = Incompatibility(terms, causes=causes)
+        # Terms any assignment satisfies add nothing, and neither does the
+        # root being selected, since it always is
+        for package, term in list(incompatibility.terms.items()):
+            if term.absent and term.versions == self._domain(package):
+                del incompatibility.terms[package]
+        root = incompatibility.terms.get(self._root)
+        if root is not None and root.positive and len(incompatibility.terms) > 1:
+            del incompatibility.terms[self._root]
+        return incompatibility
+
+    def _is_failure(self, incompatibility: Incompatibility) -> bool:
+        terms = list(incompatibility.terms.values())
+        return not terms or (len(terms) == 1 and terms[0].package == self._root and terms[0].positive)
+
+    def _decide(self) -> Optional[str]:
+        """Pick a version for a package that must be selected but isn't yet.
+
+        Returns:
+            The package decided on (or ruled out), or None once all are decided
+        """
+        undecided = [
+            term for package, term in self._positive.items()
+            if term.positive and package not in self._decisions
+        ]
+        if not undecided:
+            return None
+        # Packages with the fewest choices first: conflicts surface sooner
+        term = min(undecided, key=lambda t: (len(t.versions), t.package))
+        package = term.package
+        if not term.versions:
+            self._add(Incompatibility([term], reason=f"no versions of {package} are available"))
+            return package
+
+        preferred = self.preferred.get(package)
+        version = preferred if preferred in term.versions else max(term.versions)
+        conflict = False
+        for incompatibility in self._dependency_incompatibilities(package, version):
+            self._add(incompatibility)
+            conflict = conflict or all(
+                t.package == package or self._term(t.package).satisfies(t)
+                for t in incompatibility.terms.values()
+            )
+        if not conflict:
+            self._decisions[package] = version
+            self._assign(Term(package, frozenset([version]), False), None)
+        return package
+
+    def _dependency_incompatibilities(self, package: str, version: Version) -> List[Incompatibility]:
+        key = (package, version)
+        if key not in self._dependencies:
+            self._dependencies[key] = self.provider.dependencies(package, version)
+        depender = Term(package, frozenset([version]), False)
+        incompatibilities = []
+        for dependency, spec in self._dependencies[key].items():
+            if dependency == package:
+                continue
+            domain = self._domain(dependency)
+            version_range = VersionRange.parse(spec)
+            allowed = frozenset(v for v in domain if version_range.matches(v))
+            reason = f"{self._describe_package(package, version)} depends on {dependency} {spec}"
+            if not allowed:
+                # Nothing to choose from: the version itself is ruled out
+                incompatibilities.append(Incompatibility(
+                    [depender], reason=f"{reason}, which matches no versions"
+                ))
+                continue
+            incompatibilities.append(Incompatibility(
+                [depender, Term(dependency, domain - allowed, True)], reason=reason
+            ))
+        return incompatibilities
+
+    # Explanations
+
+    def _explain(self, incompatibility: Incompatibility) -> str:
+        """Describe how a failure was derived, one step per line."""
+        lines: List[str] = []
+        seen: Set[int] = set()
+
+        def walk(current: Incompatibility) -> None:
+            if not current.causes or id(current) in seen:
+                return
+            seen.add(id(current))
+            left, right = current.causes
+            walk(left)
+            walk(right)
+            lines.append(f"Because {self._describe(left)} and {self._describe(right)}, {self._describe(current)}.")
+
+        walk(incompatibility)
+        if not lines:
+            lines.append(f"{self._describe(incompatibility)}.")
+        return "\n".join(lines)
+
+    def _describe(self, incompatibility: Incompatibility) -> str:
+        if incompatibility.reason:
+            return incompatibility.reason
+        terms = list(incompatibility.terms.values())
+        if self._is_failure(incompatibility):
+            return f"version solving for {self._root} failed"
+        if len(terms) == 1:
+            term = terms[0]
+            if term.positive:
+                return f"{self._describe_term(term)} can't be used"
+            return f"{self._describe_term(term.negate(self._domain(term.package)))} is required"
+        positive = [t for t in terms if t.positive]
+        negative = [t for t in terms if not t.positive]
+        if len(positive) == 1 and len(negative) == 1:
+            required = negative[0].negate(self._domain(negative[0].package))
+            return f"{self._describe_term(positive[0])} depends on {self._describe_term(required)}"
+        if not negative:
+            return " is incompatible with ".join(self._describe_term(t) for t in positive)
+        described = [self._describe_term(t) for t in positive]
+        described += [f"not {self._describe_term(t.negate(self._domain(t.package)))}" for t in negative]
+        return f"{', '.join(described)} can't all hold"
+
+    def _describe_package(self, package: str, version: Version) -> str:
+        return package if package == self._root else f"{package} {version}"
+
+    def _describe_term(self, term: Term) -> str:
+        """Describe the versions a positive term allows, as a range when they are contiguous."""
+        package = term.package
+        if package == self._root:
+            return package
+        domain = sorted(self._domain(package))
+        if not term.versions:
+            return f"{package} (no available version)"
+        if term.versions == set(domain):
+            return package
+        if len(term.versions) == 1:
+            return f"{package} {next(iter(term.versions))}"
+        indices = [i for i, v in enumerate(domain) if v in term.versions]
+        first, last = indices[0], indices[-1]
+        if last - first + 1 == len(indices):
+            if last == len(domain) - 1:
+                return f"{package} >={domain[first]}"
+            if first == 0:
+                return f"{package} <={domain[last]}"
+            return f"{package} >={domain[first]} <={domain[last]}"
+        return f"{package} {{{', '.join(str(v) for v in sorted(term.versions))}}}"
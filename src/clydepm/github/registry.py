@@ -2,7 +2,7 @@
 GitHub-based package registry implementation.
 """
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 import json
 import tempfile
 import shutil
@@ -53,135 +53,166 @@ class GitHubRegistry:
             ValueError: If package or version not found
         """
         try:
-            # First try to find a release
-            releases_url = f"https://api.github.com/repos/{self.organization}/{name}/releases"
-            response = self.session.get(releases_url)
+            version, tarball_url = self.find_tarball(name, version)
+            return self.download(name, version, tarball_url)
+        except Exception as e:
+            logger.error("Failed to get package: %s", e)
+            raise ValueError(f"Failed to get package {name}@{version}: {e}")
             
-            selected_release = None
-            tarball_url = None
+    def find_tarball(self, name: str, version: str = "latest") -> Tuple[str, str]:
+        """Find the source tarball of a package version.
+        
+        Args:
+            name: Package name
+            version: Package version or "latest"
             
-            if response.status_code == 200:
-                releases = response.json()
-                if releases:
-                    if version == "latest":
-                        # Get latest release
-                        selected_release = releases[0]
-                        version = selected_release["tag_name"].lstrip("v")
-                        console.print(f"✓ Found matching tag: [green]{version}[/green]")
-                        logger.debug(f"Using latest release: {version}")
-                        tarball_url = selected_release["tarball_url"]
-                    else:
-                        # Find specific version
-                        for release in releases:
-                            if release["tag_name"].lstrip("v") == version:
-                                selected_release = release
-                                tarball_url = release["tarball_url"]
-                                break
-                        if not selected_release:
-                            logger.debug("[dim]No matching release found, checking tags...[/dim]")
+        Returns:
+            Tuple of (version, tarball URL)
+            
+        Raises:
+            ValueError: If package or version not found
+        """
+        # First try to find a release
+        releases_url = f"https://api.github.com/repos/{self.organization}/{name}/releases"
+        response = self.session.get(releases_url)
+        
+        selected_release = None
+        tarball_url = None
+        
+        if response.status_code == 200:
+            releases = response.json()
+            if releases:
+                if version == "latest":
+                    # Get latest release
+                    selected_release = releases[0]
+                    version = selected_release["tag_name"].lstrip("v")
+                    console.print(f"✓ Found matching tag: [green]{version}[/green]")
+                    logger.debug(f"Using latest release: {version}")
+                    tarball_url = selected_release["tarball_url"]
+                else:
+                    # Find specific version
+                    for release in releases:
+                        if release["tag_name"].lstrip("v") == version:
+                            selected_release = release
+                            tarball_url = release["tarball_url"]
+                            break
+                    if not selected_release:
+                        logger.debug("[dim]No matching release found, checking tags...[/dim]")
 
-            # If no release found, try tags
-            if not selected_release:
-                tags_url = f"https://api.github.com/repos/{self.organization}/{name}/tags"
-                response = self.session.get(tags_url)
-                
-                if response.status_code != 200:
-                    raise ValueError(f"Failed to get versions for {name}: {response.text}")
-                    
-                tags = response.json()
+        # If no release found, try tags
+        if not selected_release:
+            tags_url = f"https://api.github.com/repos/{self.organization}/{name}/tags"
+            response = self.session.get(tags_url)
+            
+            if response.status_code != 200:
+                raise ValueError(f"Failed to get versions for {name}: {response.text}")
                 
-                if tags:
-                    tag_names = [t['name'] for t in tags]
-                    logger.debug(f"Available tags: {', '.join(tag_names)}")
-                    if version == "latest":
-                        # Use first tag (most recent)
-                        tag = tags[0]
-                        version = tag["name"].lstrip("v")
-                        console.print(f"✓ Found matching tag: [green]{version}[/green]")
-                        logger.debug(f"Using latest tag: {version}")
-                        tarball_url = f"https://api.github.com/repos/{self.organization}/{name}/tarball/{tag['name']}"
-                    else:
-                        # Find matching tag
-                        for tag in tags:
-                            if tag["name"].lstrip("v") == version:
-                                console.print(f"✓ Found matching tag: [green]{tag['name']}[/green]")
-                                logger.debug(f"Found matching tag: {tag['name']}")
-                                tarball_url = f"https://api.github.com/repos/{self.organization}/{name}/tarball/{tag['name']}"
-                                break
-                        else:
-                            raise ValueError(f"Version {version} not found in tags")
-                elif version == "latest":
-                    # No tags, fall back to main branch
-                    logger.debug("[dim]No tags found, using main branch[/dim]")
-                    tarball_url = f"https://api.github.com/repos/{self.organization}/{name}/tarball/main"
-                    version = "main"
+            tags = response.json()
+            
+            if tags:
+                tag_names = [t['name'] for t in tags]
+                logger.debug(f"Available tags: {', '.join(tag_names)}")
+                if version == "latest":
+                    # Use first tag (most recent)
+                    tag = tags[0]
+                    version = tag["name"].lstrip("v")
+                    console.print(f"✓ Found matching tag: [green]{version}[/green]")
+                    logger.debug(f"Using latest tag: {version}")
+                    tarball_url = f"https://api.github.com/repos/{self.organization}/{name}/tarball/{tag['name']}"
                 else:
-                    raise ValueError(f"No versions found for package {name}")
+                    # Find matching tag
+                    for tag in tags:
+                        if tag["name"].lstrip("v") == version:
+                            console.print(f"✓ Found matching tag: [green]{tag['name']}[/green]")
+                            logger.debug(f"Found matching tag: {tag['name']}")
+                            tarball_url = f"https://api.github.com/repos/{self.organization}/{name}/tarball/{tag['name']}"
+                            break
+                    else:
+                        raise ValueError(f"Version {version} not found in tags")
+            elif version == "latest":
+                # No tags, fall back to main branch
+                logger.debug("[dim]No tags found, using main branch[/dim]")
+                tarball_url = f"https://api.github.com/repos/{self.organization}/{name}/tarball/main"
+                version = "main"
+            else:
+                raise ValueError(f"No versions found for package {name}")
 
-            if not tarball_url:
-                raise ValueError(f"Could not find version {version} for package {name}")
+        if not tarball_url:
+            raise ValueError(f"Could not find version {version} for package {name}")
+        return version, tarball_url
+        
+    def download(self, name: str, version: str, tarball_url: str) -> Package:
+        """Download and unpack a package version, unless already downloaded.
+        
+        Args:
+            name: Package name
+            version: Package version
+            tarball_url: Source tarball, as found by find_tarball()
             
-            # Create package directory under ~/.clydepm/sources
-            sources_dir = Path.home() / ".clydepm" / "sources" / self.organization / name / version
-            sources_dir.mkdir(parents=True, exist_ok=True)
+        Returns:
+            Package instance in ~/.clydepm/sources
             
-            # Download source code if not already downloaded
-            package_yml = sources_dir / "package.yml"
-            if not package_yml.exists():
-                logger.debug(f"Downloading source from: {tarball_url}")
-                response = self.session.get(tarball_url)
+        Raises:
+            ValueError: If the tarball can't be downloaded or isn't a package
+        """
+        # Create package directory under ~/.clydepm/sources
+        sources_dir = Path.home() / ".clydepm" / "sources" / self.organization / name / version
+        sources_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Download source code if not already downloaded
+        package_yml = sources_dir / "package.yml"
+        if not package_yml.exists():
+            logger.debug(f"Downloading source from: {tarball_url}")
+            response = self.session.get(tarball_url)
+            
+            if response.status_code != 200:
+                raise ValueError(f"Failed to download source code for {name}@{version}")
                 
-                if response.status_code != 200:
-                    raise ValueError(f"Failed to download source code for {name}@{version}")
-                    
-                # Extract archive
-                with tarfile.open(fileobj=io.BytesIO(response.content), mode="r:gz") as tar:
-                    # Get the root directory name from the archive
-                    root_dir = tar.getnames()[0]
-                    logger.debug(f"Extracting from tarball root: {root_dir}")
-                    
-                    # First find and extract package.yml
-                    package_yml_locations = [
-                        "package.yml",
-                        f"{name}/package.yml",
-                        "src/package.yml",
-                        f"src/{name}/package.yml"
-                    ]
-                    
-                    package_yml_found = False
-                    for member in tar.getmembers():
-                        for location in package_yml_locations:
-                            full_path = f"{root_dir}/{location}"
-                            if member.name == full_path:
-                                logger.debug(f"Found package.yml at {location} in tarball")
-                                # Extract package.yml to root of sources dir
-                                member.name = "package.yml"
-                                tar.extract(member, sources_dir)
-                                package_yml_found = True
-                                break
-                        if package_yml_found:
+            # Extract archive
+            with tarfile.open(fileobj=io.BytesIO(response.content), mode="r:gz") as tar:
+                # Get the root directory name from the archive
+                root_dir = tar.getnames()[0]
+                logger.debug(f"Extracting from tarball root: {root_dir}")
+                
+                # First find and extract package.yml
+                package_yml_locations = [
+                    "package.yml",
+                    f"{name}/package.yml",
+                    "src/package.yml",
+                    f"src/{name}/package.yml"
+                ]
+                
+                package_yml_found = False
+                for member in tar.getmembers():
+                    for location in package_yml_locations:
+                        full_path = f"{root_dir}/{location}"
+                        if member.name == full_path:
+                            logger.debug(f"Found package.yml at {location} in tarball")
+                            # Extract package.yml to root of sources dir
+                            member.name = "package.yml"
+                            tar.extract(member, sources_dir)
+                            package_yml_found = True
                             break
-                            
-                    if not package_yml_found:
-                        raise ValueError(
-                            f"No package.yml found in {version} of {self.organization}/{name}. "
-                            "This version may not be properly packaged for Clyde. "
-                            "Make sure package.yml is included in releases/tags."
-                        )
-                    
-                    # Now extract everything else
-                    for member in tar.getmembers():
-                        if member.name == f"{root_dir}/package.yml":
-                            continue
-                        # Remove root directory from path
-                        member.name = member.name.replace(f"{root_dir}/", "", 1)
-                        tar.extract(member, sources_dir)
-                    
-            # Create package instance from sources directory
-            return Package(sources_dir)
-        except Exception as e:
-            logger.error("Failed to get package: %s", e)
-            raise ValueError(f"Failed to get package {name}@{version}: {e}")
+                    if package_yml_found:
+                        break
+                        
+                if not package_yml_found:
+                    raise ValueError(
+                        f"No package.yml found in {version} of {self.organization}/{name}. "
+                        "This version may not be properly packaged for Clyde. "
+                        "Make sure package.yml is included in releases/tags."
+                    )
+                
+                # Now extract everything else
+                for member in tar.getmembers():
+                    if member.name == f"{root_dir}/package.yml":
+                        continue
+                    # Remove root directory from path
+                    member.name = member.name.replace(f"{root_dir}/", "", 1)
+                    tar.extract(member, sources_dir)
+                
+        # Create package instance from sources directory
+        return Package(sources_dir)
 
     def create_repo(self, package_name: str, private: bool = False) -> Repository.Repository:
         """Create a new GitHub repository for the package.
@@ -184,4 +184,48 @@ class DependencyGraph(BaseModel):
     """Dependency graph data."""
     nodes: List[DependencyGraphNode]
     edges: List[DependencyGraphEdge]
-    warnings: List[DependencyWarning] 
\ No newline at end of file
+    warnings: List[DependencyWarning]
+
+class CriticalPathPackage(BaseModel):
+    """A package's place in the schedule of a build, in seconds."""
+    name: str
+    duration: float  # Own work: compiling and linking once dependencies were built
+    compile_time: float
+    link_time: float
+    earliest_start: float  # With unlimited parallelism
+    earliest_finish: float
+    slack: float  # How much longer it could take without delaying the build
+    critical: bool
+
+class CriticalPath(BaseModel):
+    """Critical path through the package DAG of a build."""
+    path: List[str]  # Dependencies first
+    length: float
+    total_work: float
+    speedup: float  # Best possible speedup of building packages in parallel
+    packages: List[CriticalPathPackage]
+
+class ProfiledTime(BaseModel):
+    """Compile time spent on a header or template across a build."""
+    name: str
+    time: float  # Seconds, summed over translation units
+    count: int  # Translation units it was parsed or instantiated in
+
+class ProfiledTranslationUnit(BaseModel):
+    """Compile time of one translation unit, in seconds."""
+    package: Optional[str] = None
+    source: str
+    frontend: float
+    backend: float
+    total: float
+
+class CompileProfile(BaseModel):
+    """Where a profiled build spent its compile time."""
+    session: str
+    translation_units: int
+    total: float
+    headers: List[ProfiledTime]  # Empty unless compiled with Clang
+    templates: List[ProfiledTime]
+    frontend: List[ProfiledTranslationUnit]
+    backend: List[ProfiledTranslationUnit]
+    compilers: List[str]
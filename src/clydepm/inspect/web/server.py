@@ -1,14 +1,17 @@
 """
 FastAPI server for the build inspector web interface.
 """
-from fastapi import FastAPI, HTTPException, APIRouter
+from fastapi import FastAPI, HTTPException, APIRouter, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timezone
+from collections import OrderedDict
+import hashlib
 import json
-import glob
 import os
 import uuid
 
@@ -30,7 +33,13 @@ from .models import (
     SourceFile,
     SourceTree,
     DependencyGraph,
+    CriticalPath,
+    CompileProfile,
 )
+from ...build.critical_path import compute_critical_path, load_session
+from ...build.history import BuildHistory
+from ...build.events import EventBus, EventListener
+from ...build.profile import load_profiles, summarize_profiles
 
 app = FastAPI(
     title="Clyde Build Inspector",
@@ -55,6 +64,17 @@ app.add_middleware(
 # Build data directory
 BUILD_DATA_DIR = Path.home() / ".clydepm" / "build_data"
 
+_histories: Dict[Path, BuildHistory] = {}
+
+def get_history() -> BuildHistory:
+    """Get the build history in BUILD_DATA_DIR, importing any old per-build JSON files once."""
+    history = _histories.get(BUILD_DATA_DIR)
+    if history is None:
+        history = BuildHistory(BUILD_DATA_DIR / "history.db")
+        history.migrate(BUILD_DATA_DIR)
+        _histories[BUILD_DATA_DIR] = history
+    return history
+
 def parse_package_identifier(name: str) -> PackageIdentifier:
     """Parse a package name into a PackageIdentifier."""
     if name.startswith("@"):
@@ -105,7 +125,7 @@ def generate_build_metrics(build_data: dict) -> BuildMetrics:
     for step in steps:
         if "timing" in step:
             start = datetime.fromisoformat(step["timing"]["start"])
-            if "end" in step["timing"]:
+            if step["timing"].get("end"):
                 end = datetime.fromisoformat(step["timing"]["end"])
                 total_time += (end - start).total_seconds()
         if step.get("cache_hit"):
@@ -160,31 +180,14 @@ async def get_graph_settings() -> Dict:
 async def get_all_packages() -> List[Package]:
     """Get all packages."""
     try:
-        packages = {}  # Dict[str, Package]
-        
-        # Scan build files to find packages
-        build_files = glob.glob(str(BUILD_DATA_DIR / "build_*.json"))
-        for file in build_files:
-            with open(file) as f:
-                data = json.load(f)
-                pkg_name = data["package"]["name"]
-                pkg_version = data["package"]["version"]
-                
-                if pkg_name not in packages:
-                    pkg_id = parse_package_identifier(pkg_name)
-                    packages[pkg_name] = Package(
-                        identifier=pkg_id,
-                        current_version=pkg_version,
-                        available_versions=[pkg_version]
-                    )
-                else:
-                    if pkg_version not in packages[pkg_name].available_versions:
-                        packages[pkg_name].available_versions.append(pkg_version)
-                        # Update current version if newer
-                        if pkg_version > packages[pkg_name].current_version:
-                            packages[pkg_name].current_version = pkg_version
-                            
-        return list(packages.values())
+        return [
+            Package(
+                identifier=parse_package_identifier(name),
+                current_version=versions[-1],  # Most recently built
+                available_versions=versions
+            )
+            for name, versions in get_history().packages()
+        ]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -192,22 +195,14 @@ async def get_all_packages() -> List[Package]:
 async def get_package_details(package_name: str) -> Package:
     """Get package details."""
     try:
-        # Find all builds for this package
-        builds = await get_package_builds(package_name)
-        if not builds:
+        versions = dict(get_history().packages()).get(package_name)
+        if not versions:
             raise HTTPException(status_code=404, detail=f"Package {package_name} not found")
             
-        # Get the latest build
-        latest = builds[0]
-        pkg_id = latest.package
-        
-        # Collect all versions
-        versions = sorted(set(build.version for build in builds))
-        
         return Package(
-            identifier=pkg_id,
-            current_version=latest.version,
-            available_versions=versions
+            identifier=parse_package_identifier(package_name),
+            current_version=versions[-1],  # Most recently built
+            available_versions=sorted(versions)
         )
     except HTTPException:
         raise
@@ -218,14 +213,10 @@ async def get_package_details(package_name: str) -> Package:
 async def get_dependency_graph(build_id: str) -> DependencyGraph:
     """Get the dependency graph data for a specific build."""
     try:
-        # Find the build file
-        build_file = BUILD_DATA_DIR / f"build_{build_id}.json"
-        if not build_file.exists():
+        build_data = get_history().get(int(build_id)) if build_id.isdigit() else None
+        if build_data is None:
             raise HTTPException(status_code=404, detail=f"Build {build_id} not found")
             
-        with open(build_file) as f:
-            build_data = json.load(f)
-            
         nodes: List[DependencyGraphNode] = []
         edges: List[DependencyGraphEdge] = []
         warnings: List[DependencyWarning] = []
@@ -321,108 +312,162 @@ async def get_dependency_graph(build_id: str) -> DependencyGraph:
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def build_model(data: dict) -> BuildData:
+    """Convert a build from the build history to the response model."""
+    build = BuildData(
+        id=str(data["id"]),
+        package=parse_package_identifier(data["package"]["name"]),
+        version=data["package"]["version"],
+        timestamp=datetime.fromisoformat(data["timing"]["start"]),
+        status=BuildStatus.SUCCESS if data["success"] else BuildStatus.FAILURE,
+        compiler_info=data["compiler"],
+        include_paths=data.get("include_paths", []),
+        library_paths=data.get("library_paths", []),
+        metrics=generate_build_metrics(data),
+        error=data.get("error")
+    )
+    
+    # Add compilation steps
+    for step in data["compilation_steps"]:
+        build.compilation_steps.append(CompilationStep(
+            source_file=step["source"],
+            object_file=step["object"],
+            command=step["command"],
+            include_paths=step["include_paths"],
+            start_time=datetime.fromisoformat(step["timing"]["start"]),
+            end_time=(datetime.fromisoformat(step["timing"]["end"])
+                    if step["timing"]["end"] else None),
+            success=step["success"],
+            error=step.get("error")
+        ))
+    
+    # Add resolved dependencies
+    for dep_name, dep_version in data.get("dependencies", {}).items():
+        dep_id = parse_package_identifier(dep_name)
+        build.resolved_dependencies.append(ResolvedDependency(
+            package=dep_id,
+            version=dep_version,
+            type="runtime",  # TODO: Detect dev dependencies
+            source_tree=generate_source_tree(dep_name, data)
+        ))
+    return build
+
+# Serialized /api/builds pages by request, with the history generation they were built at
+_page_cache: "OrderedDict[Tuple[Path, str], Tuple[int, bytes, Optional[int]]]" = OrderedDict()
+PAGE_CACHE_SIZE = 64
+DEFAULT_PAGE_SIZE = 100
+
+def query_builds(
+    package: Optional[str] = None,
+    status: Optional[BuildStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> List[BuildData]:
+    """Query the build history, newest first.
+    
+    Args:
+        package: Only builds of this package
+        status: Only builds with this status. The history only has finished builds.
+        since: Only builds started at or after this time
+        until: Only builds started before this time
+        cursor: ID of the last build of the previous page
+        limit: Maximum number of builds
+    """
+    if status == BuildStatus.IN_PROGRESS:
+        return []
+    if cursor is not None and not cursor.isdigit():
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+    builds = get_history().builds(
+        package=package,
+        since=since.timestamp() if since else None,
+        until=until.timestamp() if until else None,
+        success=None if status is None else status == BuildStatus.SUCCESS,
+        before=int(cursor) if cursor else None,
+        limit=limit
+    )
+    return [build_model(data) for data in builds]
+
+def builds_page(request: Request, limit: int, **query) -> Response:
+    """Respond with a page of query_builds() results.
+    
+    The body is a JSON list of builds. If there may be more, the ``Link``
+    header has the URL of the next page and ``X-Next-Cursor`` its cursor.
+    Builds are only ever appended to the history, so a page is cached until
+    the next build is recorded, and clients polling with ``If-None-Match``
+    get 304 Not Modified without the history being queried at all.
+    """
+    generation = get_history().generation()
+    key = (BUILD_DATA_DIR, f"{request.url.path}?{sorted(request.query_params.multi_items())}")
+    etag = '"' + hashlib.sha1(f"{generation}:{key}".encode()).hexdigest() + '"'
+    if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+        
+    cached = _page_cache.get(key)
+    if cached is not None and cached[0] == generation:
+        _page_cache.move_to_end(key)
+        _, body, next_cursor = cached
+    else:
+        builds = query_builds(limit=limit, **query)
+        body = json.dumps(jsonable_encoder(builds)).encode()
+        next_cursor = int(builds[-1].id) if len(builds) == limit else None
+        _page_cache[key] = (generation, body, next_cursor)
+        if len(_page_cache) > PAGE_CACHE_SIZE:
+            _page_cache.popitem(last=False)
+            
+    headers = {"ETag": etag}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api/builds", response_model=List[BuildData])
-async def get_all_builds() -> List[BuildData]:
-    """Get all build data."""
+async def get_all_builds(
+    request: Request,
+    package: Optional[str] = None,
+    status: Optional[BuildStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=1000)
+) -> Response:
+    """Get a page of builds, newest first, optionally filtered."""
     try:
-        build_files = glob.glob(str(BUILD_DATA_DIR / "build_*.json"))
-        builds = []
-        
-        for file in build_files:
-            with open(file) as f:
-                data = json.load(f)
-                
-                # Get build ID from filename (e.g., "build_1234567890.json" -> "1234567890")
-                build_id = Path(file).stem.split('_', 1)[1]
-                
-                # Parse timestamps
-                start_time = datetime.fromisoformat(data["timing"]["start"])
-                end_time = (datetime.fromisoformat(data["timing"]["end"])
-                           if "end" in data["timing"] else None)
-                
-                # Determine build status
-                if "end" not in data["timing"]:
-                    status = BuildStatus.IN_PROGRESS
-                else:
-                    status = (BuildStatus.SUCCESS 
-                             if all(step["success"] for step in data["compilation_steps"])
-                             else BuildStatus.FAILURE)
-                
-                # Create build data
-                build = BuildData(
-                    id=build_id,  # Use consistent ID from filename
-                    package=parse_package_identifier(data["package"]["name"]),
-                    version=data["package"]["version"],
-                    timestamp=start_time,
-                    status=status,
-                    compiler_info=data["compiler"],
-                    include_paths=data.get("include_paths", []),
-                    library_paths=data.get("library_paths", []),
-                    metrics=generate_build_metrics(data),
-                    error=data.get("error")  # Get error from build data
-                )
-                
-                # Add compilation steps
-                for step in data["compilation_steps"]:
-                    build.compilation_steps.append(CompilationStep(
-                        source_file=step["source"],
-                        object_file=step["object"],
-                        command=step["command"].split() if step["command"] else [],
-                        include_paths=step["include_paths"],
-                        start_time=datetime.fromisoformat(step["timing"]["start"]),
-                        end_time=(datetime.fromisoformat(step["timing"]["end"])
-                                if "end" in step["timing"] else None),
-                        success=step["success"],
-                        error=step.get("error")
-                    ))
-                
-                # Add resolved dependencies
-                for dep_name, dep_version in data.get("dependencies", {}).items():
-                    dep_id = parse_package_identifier(dep_name)
-                    build.resolved_dependencies.append(ResolvedDependency(
-                        package=dep_id,
-                        version=dep_version,
-                        type="runtime",  # TODO: Detect dev dependencies
-                        source_tree=generate_source_tree(dep_name, data)
-                    ))
-                
-                builds.append(build)
-                
-        return sorted(builds, key=lambda x: x.timestamp, reverse=True)
+        return builds_page(
+            request, limit, package=package, status=status, since=since, until=until, cursor=cursor
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/builds/{package_name}", response_model=List[BuildData])
-async def get_package_builds(package_name: str) -> List[BuildData]:
-    """Get all builds for a specific package."""
+async def get_package_builds(
+    request: Request,
+    package_name: str,
+    status: Optional[BuildStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=1000)
+) -> Response:
+    """Get a page of builds of a specific package, newest first."""
     try:
-        all_builds = await get_all_builds()
-        package_builds = [
-            build for build in all_builds
-            if build.package and build.package.name == package_name
-        ]
-        
-        if not package_builds:
+        response = builds_page(
+            request, limit, package=package_name, status=status, since=since, until=until, cursor=cursor
+        )
+        # Only an empty first page needs to know whether the package was ever built,
+        # so conditional requests still never touch the history
+        if (
+            response.status_code == 200 and cursor is None and response.body == b"[]"
+            and not get_history().builds(package=package_name, limit=1, steps=False)
+        ):
             raise HTTPException(
                 status_code=404,
                 detail=f"No builds found for package {package_name}"
             )
-            
-        # Convert each build to match the response model
-        return [BuildData(
-            id=build.id,
-            package=build.package,
-            version=build.version,
-            timestamp=build.timestamp,
-            status=build.status,
-            compiler_info=build.compiler_info,
-            resolved_dependencies=build.resolved_dependencies,
-            compilation_steps=build.compilation_steps,
-            include_paths=build.include_paths,
-            library_paths=build.library_paths,
-            metrics=build.metrics,
-            error=build.error
-        ) for build in package_builds]
+        return response
     except HTTPException:
         raise
     except Exception as e:
@@ -433,23 +478,23 @@ async def get_package_builds(package_name: str) -> List[BuildData]:
         )
 
 @app.get("/api/builds/{package_name}/latest", response_model=BuildData)
-async def get_latest_package_build(package_name: str) -> BuildData:
+async def get_latest_package_build(request: Request, package_name: str) -> Response:
     """Get the latest build for a specific package."""
     try:
-        # Get all builds for the package
-        builds = await get_package_builds(package_name)
-        
+        response = builds_page(request, 1, package=package_name)
+        if response.status_code == 304:
+            return response
+        builds = json.loads(response.body)
         if not builds:
             raise HTTPException(
                 status_code=404,
                 detail=f"No builds found for package {package_name}"
             )
-            
-        # Sort by timestamp and get the latest
-        latest_build = max(builds, key=lambda b: b.timestamp)
-        
-        # Convert to response model
-        return latest_build
+        return Response(
+            content=json.dumps(builds[0]).encode(),
+            media_type="application/json",
+            headers={"ETag": response.headers["ETag"]}
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -459,6 +504,81 @@ async def get_latest_package_build(package_name: str) -> BuildData:
             detail=f"Failed to get latest build for package {package_name}: {str(e)}"
         )
 
+@app.get("/api/critical-path/{package_name}", response_model=CriticalPath)
+async def get_critical_path(package_name: str, session: Optional[str] = None) -> CriticalPath:
+    """Get the critical path of the latest (or a given) build session of a package."""
+    timings = load_session(get_history(), session, package_name)
+    if not timings:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No builds found for package {package_name}"
+        )
+    try:
+        return CriticalPath(**compute_critical_path(timings).to_json())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@app.get("/api/profile/{package_name}", response_model=CompileProfile)
+async def get_compile_profile(package_name: str, session: Optional[str] = None, top: int = 20) -> CompileProfile:
+    """Get the top headers, templates and translation units of a profiled build of a package."""
+    session, profiles = load_profiles(BUILD_DATA_DIR / "profiles", session, package_name)
+    if not profiles:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No profiled builds found for package {package_name}"
+        )
+    return CompileProfile(**summarize_profiles(session, profiles, max(top, 1)).to_json())
+
+# Live build events, received from builders once the first client subscribes
+event_bus = EventBus()
+_event_listener: Optional[EventListener] = None
+
+def start_event_listener() -> None:
+    """Start receiving build events, unless already receiving."""
+    global _event_listener
+    if _event_listener is None:
+        listener = EventListener(event_bus)
+        try:
+            listener.start()
+        except OSError as e:
+            raise HTTPException(status_code=503, detail=f"Build events unavailable: {e}")
+        _event_listener = listener
+
+@app.get("/api/events")
+async def stream_events(request: Request, keepalive: float = 15.0) -> StreamingResponse:
+    """Stream live build events as Server-Sent Events.
+    
+    Each hook stage of running builds (pre_build, pre_compile, post_compile,
+    pre_link, post_link, post_build, ...) and each failure ("error") is sent
+    as an event of that type with a JSON payload. Every client has a bounded
+    buffer; a client too slow to keep up gets a "dropped" event with the number
+    of events it missed.
+    """
+    start_event_listener()
+    subscription = event_bus.subscribe()
+    
+    async def events():
+        reported = 0
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=keepalive)
+                if subscription.dropped > reported:
+                    yield f"event: dropped\ndata: {json.dumps({'count': subscription.dropped - reported})}\n\n"
+                    reported = subscription.dropped
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
+            
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Serve frontend in production
 frontend_path = Path(__file__).parent / "frontend" / "dist"
 if frontend_path.exists():
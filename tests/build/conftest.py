@@ -0,0 +1,48 @@
+"""Shared fixtures for build tests."""
+from pathlib import Path
+from typing import Dict, Optional
+
+import pytest
+
+
+@pytest.fixture
+def make_package():
+    """Factory writing a package to build.
+
+    The returned function takes:
+        root: Package directory, created along with its src/ directory
+        name: Package name
+        kind: Package type
+        sources: Files to write under src/, by name
+        requires: Dependency specs by dependency name
+        language: "c" or "cpp"
+        files: Other files to write, by path relative to root
+        config: Extra package.yml lines
+
+    and returns root.
+    """
+    def make(
+        root: Path,
+        name: str = "lib",
+        kind: str = "library",
+        sources: Optional[Dict[str, str]] = None,
+        requires: Optional[Dict[str, str]] = None,
+        language: str = "c",
+        files: Optional[Dict[str, str]] = None,
+        config: str = ""
+    ) -> Path:
+        (root / "src").mkdir(parents=True)
+        lines = [f"name: {name}", "version: 1.0.0", f"type: {kind}", f"language: {language}", "sources:", "  - src/"]
+        if requires:
+            lines.append("requires:")
+            lines.extend(f'  {dep}: "{spec}"' for dep, spec in requires.items())
+        (root / "package.yml").write_text("\n".join(lines) + "\n" + config)
+        contents = {f"src/{source}": text for source, text in (sources or {}).items()}
+        contents.update(files or {})
+        for relative, text in contents.items():
+            path = root / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+        return root
+
+    return make
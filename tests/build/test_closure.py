@@ -0,0 +1,91 @@
+"""Tests for transitive dependency traversal."""
+from pathlib import Path
+
+import pytest
+
+from clydepm.core.package import Package, load_package, registry
+
+
+def _package(make_package, root: Path, name: str, requires: tuple = ()) -> Path:
+    path = make_package(root / name, name, requires={dep: f"local:../{dep}" for dep in requires})
+    (path / "include" / name).mkdir(parents=True)
+    (path / ".build").mkdir()
+    return path
+
+
+def test_diamond_is_loaded_once(tmp_path, monkeypatch, make_package):
+    """Test app -> (left, right) -> base: base is loaded and listed once, last."""
+    _package(make_package, tmp_path, "base")
+    _package(make_package, tmp_path, "left", ["base"])
+    _package(make_package, tmp_path, "right", ["base"])
+    app = Package(_package(make_package, tmp_path, "app", ["left", "right"]))
+
+    loads = []
+    load_config = Package._load_config
+    monkeypatch.setattr(Package, "_load_config", lambda self: loads.append(self.path.name) or load_config(self))
+
+    assert [dep.name for dep in app.dependency_closure().packages] == ["left", "right", "base"]
+    assert sorted(loads) == ["base", "left", "right"]
+
+    metadata = app.create_build_metadata(None)
+    dep_includes = metadata.includes[2:]
+    assert [p.relative_to(tmp_path).as_posix() for p in dep_includes] == [
+        "left/include", "left/include/left",
+        "right/include", "right/include/right",
+        "base/include", "base/include/base",
+    ]
+    assert metadata.ldflags == ["-lleft", "-lright", "-lbase"]
+    assert len(metadata.libs) == 3
+
+    # The closure is shared until it is refreshed, and unchanged packages are
+    # not parsed again when it is
+    assert [dep.name for dep in app.get_all_dependencies()] == ["left", "right"]
+    app.dependency_closure(refresh=True)
+    assert len(loads) == 3
+
+
+def test_wide_graph_is_linear(tmp_path, monkeypatch, make_package):
+    """Test that a layered graph with many paths loads each package once."""
+    layers = [["l0a", "l0b"]]
+    _package(make_package, tmp_path, "l0a")
+    _package(make_package, tmp_path, "l0b")
+    for i in range(1, 12):
+        layers.append([f"l{i}a", f"l{i}b"])
+        for name in layers[-1]:
+            _package(make_package, tmp_path, name, layers[-2])
+    app = Package(_package(make_package, tmp_path, "app", layers[-1]))
+
+    loads = []
+    load_config = Package._load_config
+    monkeypatch.setattr(Package, "_load_config", lambda self: loads.append(self.path.name) or load_config(self))
+
+    _, ldflags = app.get_all_dependency_libs()
+    assert len(ldflags) == len(set(ldflags)) == 24
+    assert len(loads) == 24
+    # Every library is linked before the libraries it depends on
+    assert ldflags.index("-ll11a") < ldflags.index("-ll10b") < ldflags.index("-ll0a")
+
+
+def test_cycle_is_reported(tmp_path, make_package):
+    """Test that a dependency cycle raises instead of recursing forever."""
+    _package(make_package, tmp_path, "a", ["b"])
+    _package(make_package, tmp_path, "b", ["a"])
+    with pytest.raises(ValueError, match="cycle"):
+        Package(tmp_path / "a").dependency_closure()
+
+
+def test_registry_reloads_changed_packages(tmp_path, make_package):
+    """Test that a package is shared until its package.yml changes."""
+    path = _package(make_package, tmp_path, "lib")
+    package = load_package(path)
+    assert load_package(tmp_path / "." / "lib") is package
+
+    (path / "package.yml").write_text((path / "package.yml").read_text().replace("1.0.0", "1.1.0"))
+    reloaded = load_package(path)
+    assert reloaded is not package
+    assert reloaded.version == "1.1.0"
+
+    registry.clear()
+    assert load_package(path) is not reloaded
+    with pytest.raises(FileNotFoundError):
+        load_package(tmp_path)
@@ -125,7 +125,7 @@ def test_dependencies_built(collector, mock_context):
     }
 
 def test_build_end(collector, mock_context, temp_output_dir):
-    """Test build end hook saves data to file."""
+    """Test build end hook saves data to the build history."""
     collector.current_build = BuildData(
         package_name="test",
         package_version="1.0.0",
@@ -134,17 +134,16 @@ def test_build_end(collector, mock_context, temp_output_dir):
     )
     collector._on_build_end(mock_context)
     
-    # Check that a file was created
-    files = list(temp_output_dir.glob("build_test_*.json"))
-    assert len(files) == 1
+    # Check that a build was recorded
+    builds = collector.history.builds(package="test")
+    assert len(builds) == 1
     
-    # Check file contents
-    with open(files[0]) as f:
-        data = json.load(f)
-        assert data["package"]["name"] == "test"
-        assert data["package"]["version"] == "1.0.0"
-        assert data["success"]
-        assert data["timing"]["end"] is not None
+    # Check its contents
+    data = builds[0]
+    assert data["package"]["name"] == "test"
+    assert data["package"]["version"] == "1.0.0"
+    assert data["success"]
+    assert data["timing"]["end"] is not None
 
 def test_full_build_flow(collector, mock_context, temp_output_dir):
     """Test complete build flow with all hooks."""
@@ -169,13 +168,12 @@ def test_full_build_flow(collector, mock_context, temp_output_dir):
     # End build
     collector._on_build_end(mock_context)
     
-    # Check output file
-    files = list(temp_output_dir.glob("build_test_package_*.json"))
-    assert len(files) == 1
+    # Check the recorded build
+    builds = collector.history.builds(package="test_package")
+    assert len(builds) == 1
     
-    with open(files[0]) as f:
-        data = json.load(f)
-        assert data["package"]["name"] == "test_package"
-        assert len(data["compilation_steps"]) == 2
-        assert data["dependencies"] == {"dep1": "0.1.0", "dep2": "0.2.0"}
-        assert data["success"] 
\ No newline at end of file
+    data = builds[0]
+    assert data["package"]["name"] == "test_package"
+    assert len(data["compilation_steps"]) == 2
+    assert data["dependencies"] == {"dep1": "0.1.0", "dep2": "0.2.0"}
+    assert data["success"] 
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""Tests for the compiler probe cache."""
+import os
+
+from clydepm.build import compiler as compiler_module
+from clydepm.build.compiler import CompilerProbeCache
+
+
+def _fake_compiler(tmp_path, monkeypatch, version="1.2.3"):
+    """Put a fake compiler on PATH and count how often it's run."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir(exist_ok=True)
+    script = bin_dir / "fakecc"
+    script.write_text(
+        "#!/bin/sh\n"
+        f'if [ "$1" = "--version" ]; then echo "fakecc (Fake) {version}"; '
+        'else echo "x86_64-fake-linux"; fi\n'
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    calls = []
+    real_run = compiler_module.subprocess.run
+
+    def counting_run(cmd, *args, **kwargs):
+        calls.append(cmd)
+        return real_run(cmd, *args, **kwargs)
+
+    monkeypatch.setattr(compiler_module.subprocess, "run", counting_run)
+    return script, calls
+
+
+def test_probe_is_cached_across_instances(tmp_path, monkeypatch):
+    """Test that a warm cache spawns no probe processes."""
+    _, calls = _fake_compiler(tmp_path, monkeypatch)
+
+    info = CompilerProbeCache(tmp_path / "compilers.json").probe("fakecc")
+    assert (info.version, info.target) == ("1.2.3", "x86_64-fake-linux")
+    assert len(calls) == 2
+
+    warm = CompilerProbeCache(tmp_path / "compilers.json")
+    assert warm.probe("fakecc") == info
+    assert warm.probe("fakecc") == info
+    assert len(calls) == 2
+
+
+def test_changed_binary_is_reprobed(tmp_path, monkeypatch):
+    """Test that replacing the compiler invalidates its entry."""
+    script, calls = _fake_compiler(tmp_path, monkeypatch)
+    CompilerProbeCache(tmp_path / "compilers.json").probe("fakecc")
+
+    _fake_compiler(tmp_path, monkeypatch, version="2.0.0")
+    os.utime(script, ns=(0, 0))
+
+    info = CompilerProbeCache(tmp_path / "compilers.json").probe("fakecc")
+    assert info.version == "2.0.0"
+
+
+def test_missing_compiler_is_unknown(tmp_path):
+    """Test that a compiler not on PATH reports unknown without caching."""
+    cache = CompilerProbeCache(tmp_path / "compilers.json")
+    info = cache.probe("definitely-not-a-compiler")
+    assert info.version == "unknown"
+    assert not (tmp_path / "compilers.json").exists()
@@ -0,0 +1,66 @@
+"""Tests for critical path analysis."""
+from pathlib import Path
+
+import pytest
+
+from clydepm.build.builder import Builder
+from clydepm.build.critical_path import PackageTiming, compute_critical_path
+from clydepm.core.package import Package
+
+
+def test_critical_path_of_diamond():
+    """Test path, slack and speedup on app -> (slow, fast) -> base."""
+    report = compute_critical_path({
+        "base": PackageTiming("base", 1.0),
+        "slow": PackageTiming("slow", 4.0, ["base"]),
+        "fast": PackageTiming("fast", 1.0, ["base"]),
+        "app": PackageTiming("app", 2.0, ["slow", "fast", "prebuilt"]),
+    })
+
+    assert report.path == ["base", "slow", "app"]
+    assert report.length == pytest.approx(7.0)
+    assert report.total_work == pytest.approx(8.0)
+    assert report.speedup == pytest.approx(8.0 / 7.0)
+
+    packages = {p.name: p for p in report.packages}
+    assert packages["fast"].slack == pytest.approx(3.0)
+    assert packages["fast"].earliest_start == pytest.approx(1.0)
+    assert not packages["fast"].critical
+    for name in report.path:
+        assert packages[name].slack == pytest.approx(0.0)
+        assert packages[name].critical
+
+
+def test_critical_path_rejects_cycles():
+    """Test that a dependency cycle is reported."""
+    with pytest.raises(ValueError, match="cycle"):
+        compute_critical_path({
+            "a": PackageTiming("a", 1.0, ["b"]),
+            "b": PackageTiming("b", 1.0, ["a"]),
+        })
+
+
+def test_collector_records_sessions(tmp_path, make_package):
+    """Test the critical path of a real build of an app and its library."""
+    make_package(tmp_path / "lib", sources={"lib.c": "int f(void) { return 0; }\n"})
+    app = make_package(
+        tmp_path / "app", "app", "application",
+        sources={"main.c": "int f(void);\nint main(void) { return f(); }\n"},
+        requires={"lib": "local:../lib"},
+    )
+
+    builder = Builder(cache_dir=tmp_path / "cache")
+    assert builder.build(Package(app)).success
+
+    builds = builder.collector.history.builds(steps=False)
+    assert {data["package"]["name"] for data in builds} == {"app", "lib"}
+    assert len({data["session"] for data in builds}) == 1
+    assert {data["root"] for data in builds} == {"app"}
+    for data in builds:
+        assert data["phases"]["own"] > 0
+        assert data["phases"]["link"] > 0
+
+    report = builder.collector.critical_path(package="app")
+    assert report.path == ["lib", "app"]
+    assert report.speedup == pytest.approx(1.0)
+    assert builder.collector.critical_path(package="lib") is None
@@ -0,0 +1,146 @@
+"""Tests for the build daemon and file watcher."""
+import stat
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from clydepm.build.daemon import BuildDaemon, DaemonClient, DaemonUnavailable
+from clydepm.build.watch import PollingWatcher
+from clydepm.core.package import Package
+from clydepm.core.version.version import Version
+
+
+_SOURCES = {"lib.c": "int f(void) { return 1; }\n"}
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    """A daemon serving on a socket in the test directory."""
+    daemon = BuildDaemon(tmp_path / "d.sock", cache_dir=tmp_path / "cache", poll_interval=60)
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    client = DaemonClient(tmp_path / "d.sock", timeout=30)
+    for _ in range(100):
+        try:
+            client.status()
+            break
+        except DaemonUnavailable:
+            time.sleep(0.05)
+    yield daemon, client
+    client.stop()
+    thread.join(timeout=10)
+    assert not (tmp_path / "d.sock").exists()
+
+
+def test_daemon_builds_and_keeps_packages_warm(daemon, tmp_path, make_package):
+    """Test that repeated builds reuse the daemon's package and builder."""
+    server, client = daemon
+    root = make_package(tmp_path / "lib", sources=_SOURCES)
+    # Only the owner may connect
+    assert stat.S_IMODE((tmp_path / "d.sock").stat().st_mode) & 0o077 == 0
+
+    first = client.build(root)
+    assert first.success, first.error
+    assert first.artifacts["output"].exists()
+
+    second = client.build(root)
+    assert second.success and second.up_to_date
+    assert client.status()["builds"] == 2
+    assert client.status()["packages"] == 1
+
+    # Editing package.yml drops cached packages and graphs
+    (root / "package.yml").write_text((root / "package.yml").read_text() + "cflags:\n  gcc: -O2\n")
+    server._on_change(server.watcher.poll())
+    assert client.status()["packages"] == 0
+    assert not server.builder.graph_cache
+
+
+def test_client_reports_missing_daemon(tmp_path):
+    """Test that clients can tell when no daemon is running."""
+    with pytest.raises(DaemonUnavailable):
+        DaemonClient(tmp_path / "missing.sock").status()
+
+
+def test_polling_watcher_reports_changes(tmp_path, make_package):
+    """Test that the watcher reports created, modified and deleted files but ignores build output."""
+    root = make_package(tmp_path / "lib", sources=_SOURCES)
+    watcher = PollingWatcher(lambda changed: None)
+    watcher.watch([root])
+    assert watcher.poll() == set()
+
+    (root / "src" / "lib.c").write_text("int f(void) { return 22; }\n")
+    (root / "src" / "new.c").write_text("int g(void);\n")
+    (root / "package.yml").unlink()
+    (root / ".build").mkdir()
+    (root / ".build" / "lib.o").write_text("")
+
+    assert watcher.poll() == {
+        (root / "src" / "lib.c").absolute(),
+        (root / "src" / "new.c").absolute(),
+        (root / "package.yml").absolute(),
+    }
+
+
+class VersionedRegistry:
+    """Serves zlib 1.0.0, and a 2.0.0 that only compiles with its own package.yml."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        for version in ("1.0.0", "2.0.0"):
+            (root / version / "src").mkdir(parents=True)
+            (root / version / "package.yml").write_text(
+                f"name: zlib\nversion: {version}\nlanguage: c\nsources:\n  - src/\n"
+            )
+            (root / version / "src" / "zlib.c").write_text("int zlib(void) { return 0; }\n")
+        v2 = root / "2.0.0"
+        (v2 / "include").mkdir()
+        (v2 / "include" / "zconf.h").write_text("#define ZLIB_2 1\n")
+        (v2 / "package.yml").write_text((v2 / "package.yml").read_text() + "pch: include/zconf.h\n")
+        (v2 / "src" / "zlib.c").write_text(
+            "#ifndef ZLIB_2\n#error built without the pch of 2.0.0\n#endif\nint zlib(void) { return 0; }\n"
+        )
+
+    def get_versions(self, name):
+        return [Version.parse("1.0.0"), Version.parse("2.0.0")]
+
+    def find_tarball(self, name, version):
+        return version, f"https://example.com/{name}/{version}.tar.gz"
+
+    def download(self, name, version, tarball_url):
+        return Package(self.root / version)
+
+
+def test_daemon_follows_reinstalled_dependencies(daemon, tmp_path, make_package):
+    """Test that changing a requires spec between builds uses and watches the new install."""
+    server, client = daemon
+    registry = VersionedRegistry(tmp_path / "sources")
+    server.builder._get_registry = lambda registries, org: registry
+    root = make_package(tmp_path / "lib", sources=_SOURCES)
+    manifest = root / "package.yml"
+    manifest.write_text(manifest.read_text() + "requires:\n  zlib: ^1.0.0\n")
+
+    first = client.build(root)
+    assert first.success, first.error
+    assert Package(root / "deps" / "zlib").version == "1.0.0"
+
+    manifest.write_text(manifest.read_text().replace("^1.0.0", "^2.0.0"))
+    server._on_change({manifest})
+    second = client.build(root)
+    assert second.success, second.error
+    assert Package(root / "deps" / "zlib").version == "2.0.0"
+
+    # The replaced deps/zlib directory is watched again, so edits to it are seen
+    time.sleep(0.5)  # Let the watcher read the events of the reinstall
+    dep_dir = (root / "deps" / "zlib").absolute()
+    if hasattr(server.watcher, "_watched"):
+        assert server.watcher._watched.get(dep_dir) in server.watcher._dirs
+    server._get_package(root)
+    dep_manifest = dep_dir / "package.yml"
+    dep_manifest.write_text(dep_manifest.read_text() + "\n")
+    for _ in range(100):
+        if client.status()["packages"] == 0:
+            break
+        time.sleep(0.05)
+    assert client.status()["packages"] == 0
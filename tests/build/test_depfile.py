@@ -0,0 +1,69 @@
+"""Tests for header dependency tracking in the builder."""
+from pathlib import Path
+
+from clydepm.build.builder import Builder
+from clydepm.build.depfile import DependencyDatabase, parse_depfile
+from clydepm.build.hooks import BuildStage
+from clydepm.core.package import Package
+
+
+# Only a.c includes a.h
+_SOURCES = {
+    "a.h": "#define A_VALUE 1\n",
+    "a.c": '#include "a.h"\nint a(void) { return A_VALUE; }\n',
+    "b.c": "int b(void) { return 2; }\n",
+}
+
+
+def _build(package: Package, cache_dir: Path) -> dict:
+    """Build with a fresh builder, returning {source name: cache hit}."""
+    builder = Builder(cache_dir=cache_dir)
+    hits = {}
+    builder.add_hook(
+        BuildStage.POST_COMPILE,
+        lambda context: hits.__setitem__(context.source_file.name, context.cache_hit)
+    )
+    result = builder.build(package)
+    assert result.success, result.error
+    return hits
+
+
+def test_parse_depfile(tmp_path):
+    """Test parsing continuations, escaped spaces and relative paths."""
+    depfile = tmp_path / "a.d"
+    depfile.write_text(
+        "a.o: ../src/a.c ../src/a.h \\\n"
+        "  /usr/include/my\\ dir/b.h ../src/a.h\n"
+        "../src/a.h:\n"
+    )
+
+    assert parse_depfile(depfile) == [
+        Path(tmp_path.parent / "src" / "a.c"),
+        Path(tmp_path.parent / "src" / "a.h"),
+        Path("/usr/include/my dir/b.h"),
+    ]
+
+
+def test_dependency_database_round_trip(tmp_path):
+    """Test that recorded headers survive a reload."""
+    db = DependencyDatabase(tmp_path / "deps.json")
+    assert db.get(Path("/src/a.c")) is None
+
+    db.update(Path("/src/a.c"), [Path("/src/a.h")])
+    db.save()
+
+    assert DependencyDatabase(tmp_path / "deps.json").get(Path("/src/a.c")) == [Path("/src/a.h")]
+
+
+def test_header_edit_recompiles_only_dependents(tmp_path, make_package):
+    """Test that editing a header invalidates exactly the sources including it."""
+    root = make_package(tmp_path / "headers", "headers", sources=_SOURCES)
+    package = Package(root)
+    cache_dir = tmp_path / "cache"
+
+    assert _build(package, cache_dir) == {"a.c": False, "b.c": False}
+    assert _build(package, cache_dir) == {"a.c": True, "b.c": True}
+
+    (root / "src" / "a.h").write_text("#define A_VALUE 42\n")
+    assert _build(package, cache_dir) == {"a.c": False, "b.c": True}
+    assert _build(package, cache_dir) == {"a.c": True, "b.c": True}
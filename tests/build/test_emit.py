@@ -0,0 +1,72 @@
+"""Tests for emitting ninja files and compilation databases."""
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from clydepm.build.builder import Builder
+from clydepm.build.emit import EmitFormat, emit, plan_build
+from clydepm.core.package import Package
+
+
+@pytest.fixture
+def app(tmp_path, make_package):
+    """An application depending on one local library."""
+    make_package(tmp_path / "liba", "liba", sources={"liba.c": "int a(void) { return 0; }\n"})
+    app_dir = make_package(
+        tmp_path / "app", "app", "application",
+        sources={"app.c": "int a(void);\nint main(void) { return a(); }\n"},
+        requires={"liba": "local:../liba"},
+    )
+    return Package(app_dir)
+
+
+def test_plan_orders_dependencies_first(app, tmp_path):
+    """Test that the plan covers the whole graph in build order."""
+    plans = plan_build(Builder(cache_dir=tmp_path / "cache"), app)
+
+    assert [plan.package.name for plan in plans] == ["liba", "app"]
+    assert plans[0].link.archive and not plans[1].link.archive
+    assert plans[0].link.output in plans[1].link.inputs
+
+
+def test_planned_commands_build_the_package(app, tmp_path):
+    """Test that running the planned commands in order produces a working program."""
+    plans = plan_build(Builder(cache_dir=tmp_path / "cache"), app)
+
+    for plan in plans:
+        for step in plan.compiles:
+            subprocess.run(step.command, cwd=step.directory, check=True)
+        subprocess.run(plan.link.command, cwd=plan.link.directory, check=True)
+
+    assert subprocess.run([str(plans[-1].link.output)]).returncode == 0
+
+
+def test_emit_writes_both_formats(app, tmp_path):
+    """Test the files written by --emit."""
+    written = emit(
+        Builder(cache_dir=tmp_path / "cache"), app,
+        [EmitFormat.NINJA, EmitFormat.COMPILE_COMMANDS],
+    )
+
+    database = json.loads(written[EmitFormat.COMPILE_COMMANDS].read_text())
+    assert sorted(Path(entry["file"]).name for entry in database) == ["app.c", "liba.c"]
+    assert all("-MMD" in entry["arguments"] for entry in database)
+
+    ninja = written[EmitFormat.NINJA].read_text()
+    assert written[EmitFormat.NINJA] == app.get_build_dir() / "build.ninja"
+    assert "rule compile" in ninja and "deps = gcc" in ninja
+    assert f"default {app.get_build_dir() / 'app'}" in ninja
+    assert not (app.get_build_dir() / "app").exists()
+
+
+@pytest.mark.skipif(shutil.which("ninja") is None, reason="ninja not installed")
+def test_ninja_builds_the_package(app, tmp_path):
+    """Test that ninja can run the emitted file."""
+    written = emit(Builder(cache_dir=tmp_path / "cache"), app, [EmitFormat.NINJA])
+
+    subprocess.run(["ninja", "-f", str(written[EmitFormat.NINJA])], check=True)
+
+    assert (app.get_build_dir() / "app").exists()
@@ -0,0 +1,92 @@
+"""Tests for live build events."""
+import asyncio
+import socket
+import stat
+
+from clydepm.build.builder import Builder
+from clydepm.build.events import EventBus, EventListener, EventPublisher
+from clydepm.core.package import Package
+
+
+def test_slow_subscriber_drops_oldest_events():
+    """Test that a full subscriber buffer drops its oldest events instead of blocking."""
+    async def run():
+        bus = EventBus(buffer_size=3)
+        subscription = bus.subscribe()
+        for i in range(5):
+            bus.publish({"n": i})
+        assert subscription.dropped == 2
+        assert [(await subscription.get(0.1))["n"] for _ in range(3)] == [2, 3, 4]
+        assert await subscription.get(0.01) is None
+        subscription.close()
+        bus.publish({"n": 5})
+        assert not subscription.events
+
+    asyncio.run(run())
+
+
+def test_publisher_without_listener(tmp_path):
+    """Test that publishing with nobody listening is silently skipped."""
+    publisher = EventPublisher(tmp_path / "events.sock")
+    publisher.publish({"type": "pre_build"})
+    publisher.publish({"type": "post_build"})
+    assert publisher.dropped == 0
+    publisher.close()
+
+
+def test_builder_streams_hook_events(tmp_path, monkeypatch, make_package):
+    """Test that a build's hook stages and failures reach subscribers."""
+    socket_path = tmp_path / "events.sock"
+    monkeypatch.setenv("CLYDE_EVENTS_SOCKET", str(socket_path))
+    make_package(tmp_path / "lib", sources={"lib.c": "int f(void) { return 0; }\n"})
+    app = make_package(
+        tmp_path / "app", "app", "application",
+        sources={"main.c": "int f(void);\nint main(void) { return f(); }\n"},
+        requires={"lib": "local:../lib"},
+    )
+
+    async def drain(subscription):
+        events = []
+        while (event := await subscription.get(0.5)) is not None:
+            events.append(event)
+        return events
+
+    async def run():
+        # Left behind by a listener that died
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        stale.bind(str(socket_path))
+        stale.close()
+        bus = EventBus()
+        listener = EventListener(bus, socket_path)
+        listener.start()
+        # Only the owner may send events
+        assert stat.S_IMODE(socket_path.stat().st_mode) & 0o077 == 0
+        subscription = bus.subscribe()
+        try:
+            builder = Builder(cache_dir=tmp_path / "cache")
+            assert (await asyncio.to_thread(builder.build, Package(app))).success
+            events = await drain(subscription)
+
+            (app / "src" / "main.c").write_text("int main(void) { return missing(); }\n")
+            assert not (await asyncio.to_thread(builder.build, Package(app))).success
+            failed = await drain(subscription)
+        finally:
+            subscription.close()
+            listener.stop()
+        return builder, events, failed
+
+    builder, events, failed = asyncio.run(run())
+    stages = [(e["type"], e["package"]) for e in events]
+    for package in ("app", "lib"):
+        for stage in ("pre_build", "pre_compile", "post_compile", "pre_link", "post_link", "post_build"):
+            assert (stage, package) in stages
+    assert stages.index(("post_build", "lib")) < stages.index(("pre_compile", "app"))
+    compiled = [e for e in events if e["type"] == "post_compile"]
+    assert {e["source"].rsplit("/", 1)[-1] for e in compiled} == {"lib.c", "main.c"}
+
+    errors = [e for e in failed if e["type"] == "error"]
+    assert [e["package"] for e in errors] == ["app"]
+    assert "missing" in errors[0]["error"]
+    # Failures now reach the collector too
+    assert [b["package"]["name"] for b in builder.collector.history.builds(success=False)] == ["app"]
+    assert not socket_path.exists()
@@ -0,0 +1,91 @@
+"""Tests for the stat-validated file digest index."""
+import os
+import time
+
+from clydepm.build import filestate
+from clydepm.build.filestate import FileStateIndex, hash_file
+
+
+def _age(path, seconds=60):
+    """Backdate a file's mtime out of the racy window."""
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def _count_reads(monkeypatch):
+    reads = []
+
+    def counting_hash(path):
+        reads.append(path)
+        return hash_file(path)
+
+    monkeypatch.setattr(filestate, "hash_file", counting_hash)
+    return reads
+
+
+def test_unchanged_file_is_not_reread(tmp_path, monkeypatch):
+    """Test that a persisted entry with a matching stat skips hashing."""
+    source = tmp_path / "a.c"
+    source.write_text("int a;\n")
+    _age(source)
+    reads = _count_reads(monkeypatch)
+
+    index = FileStateIndex(tmp_path / "state.json")
+    digest = index.digest(source)
+    assert index.digest(source) == digest
+    index.flush()
+    assert len(reads) == 1
+
+    assert FileStateIndex(tmp_path / "state.json").digest(source) == digest
+    assert len(reads) == 1
+
+
+def test_changed_file_is_rehashed(tmp_path):
+    """Test that a stat change forces a new digest after flush."""
+    source = tmp_path / "a.c"
+    source.write_text("int a;\n")
+    _age(source, 120)
+    index = FileStateIndex(tmp_path / "state.json")
+    before = index.digest(source)
+    index.flush()
+
+    source.write_text("int b;\n")
+    _age(source)
+
+    assert index.digest(source) != before
+    assert index.digest(source) == hash_file(source)
+
+
+def test_racy_entries_are_not_persisted(tmp_path, monkeypatch):
+    """Test that freshly modified files are rehashed by the next run."""
+    source = tmp_path / "a.c"
+    source.write_text("int a;\n")
+    reads = _count_reads(monkeypatch)
+
+    index = FileStateIndex(tmp_path / "state.json")
+    index.digest(source)
+    index.flush()
+    FileStateIndex(tmp_path / "state.json").digest(source)
+
+    assert len(reads) == 2
+
+
+def test_deleted_files_are_dropped(tmp_path):
+    """Test that flushing forgets files that no longer exist."""
+    kept, deleted, changed = (tmp_path / name for name in ("a.c", "b.c", "c.c"))
+    for path in (kept, deleted, changed):
+        path.write_text(f"int {path.stem};\n")
+        _age(path)
+    index = FileStateIndex(tmp_path / "state.json")
+    for path in (kept, deleted, changed):
+        index.digest(path)
+    index.flush()
+
+    deleted.unlink()
+    changed.write_text("int d;\n")
+    _age(changed)
+    index = FileStateIndex(tmp_path / "state.json")
+    index.digest(changed)
+    index.flush()
+
+    assert set(FileStateIndex(tmp_path / "state.json")._entries) == {str(kept), str(changed)}
@@ -0,0 +1,69 @@
+"""Tests for build cache eviction."""
+import time
+
+from clydepm.build.cache import BuildCache, CacheSettings
+
+
+def _add_object(cache: BuildCache, name: str, size: int, last_used: float) -> None:
+    """Add a fake cached object last used at the given time."""
+    (cache.objects_dir / f"{name}.o").write_bytes(b"x" * size)
+    cache.access._pending[f"objects/{name}.o"] = last_used
+
+
+def test_gc_evicts_least_recently_used_first(tmp_path):
+    """Test that size-bounded gc removes the oldest entries until under the limit."""
+    cache = BuildCache(tmp_path)
+    now = time.time()
+    _add_object(cache, "old", 100, now - 300)
+    _add_object(cache, "mid", 100, now - 200)
+    _add_object(cache, "new", 100, now - 100)
+    cache.flush()
+
+    result = cache.gc(max_size=150)
+
+    assert (result.removed, result.freed, result.remaining) == (2, 200, 1)
+    assert [p.name for p in cache.objects_dir.iterdir()] == ["new.o"]
+    assert set(cache.access.times()) == {"objects/new.o"}
+
+
+def test_gc_removes_expired_entries(tmp_path):
+    """Test that age-bounded gc removes only entries unused for too long."""
+    cache = BuildCache(tmp_path, CacheSettings(max_age=3600))
+    now = time.time()
+    _add_object(cache, "stale", 10, now - 7200)
+    _add_object(cache, "fresh", 10, now - 60)
+
+    dry = cache.gc(dry_run=True)
+    assert dry.removed == 1 and (cache.objects_dir / "stale.o").exists()
+
+    cache.gc()
+    assert not (cache.objects_dir / "stale.o").exists()
+    assert (cache.objects_dir / "fresh.o").exists()
+
+
+def test_cache_hit_refreshes_access_time(tmp_path):
+    """Test that using an entry protects it from eviction."""
+    cache = BuildCache(tmp_path)
+    now = time.time()
+    _add_object(cache, "a", 100, now - 300)
+    _add_object(cache, "b", 100, now - 200)
+    cache.flush()
+
+    cache._touch(cache.objects_dir / "a.o")
+    cache.flush()
+    cache.gc(max_size=100)
+
+    assert [p.name for p in cache.objects_dir.iterdir()] == ["a.o"]
+
+
+def test_background_gc_is_throttled(tmp_path):
+    """Test that opportunistic gc only runs with limits set, at most once per interval."""
+    assert BuildCache(tmp_path).maybe_gc_in_background() is None
+
+    cache = BuildCache(tmp_path, CacheSettings(max_size=0))
+    _add_object(cache, "a", 10, time.time())
+    thread = cache.maybe_gc_in_background()
+    thread.join()
+
+    assert not (cache.objects_dir / "a.o").exists()
+    assert cache.maybe_gc_in_background() is None
@@ -0,0 +1,122 @@
+"""Tests for the build history store."""
+import json
+import sqlite3
+import time
+
+from clydepm.build.collector import BuildData, BuildDataCollector, CompilationStep
+from clydepm.build.history import BuildHistory
+
+
+def _build(name: str, start: float, session: str = "s1", **kwargs) -> dict:
+    build = BuildData(
+        package_name=name,
+        package_version="1.0.0",
+        start_time=start,
+        compiler_info={"name": "gcc", "version": "12", "target": "x86_64"},
+        session=session,
+        root="app",
+        end_time=start + 1.0,
+        success=True,
+        **kwargs
+    )
+    build.compilation_steps.append(CompilationStep(
+        source_file=f"{name}.c",
+        object_file=f"{name}.o",
+        command=["gcc", "-c", f"{name}.c"],
+        include_paths=["include"],
+        start_time=start,
+        end_time=start + 0.5,
+        success=True,
+        cache_hit=True
+    ))
+    return build.to_json()
+
+
+def test_query_builds(tmp_path):
+    """Test that builds round-trip and can be filtered by package, time and session."""
+    history = BuildHistory(tmp_path / "history.db")
+    now = time.time()
+    history.add(_build("lib", now - 100, dependencies={"zlib": "1.2.0"}))
+    history.add(_build("app", now - 50))
+    history.add(_build("lib", now, session="s2"))
+
+    builds = history.builds()
+    assert [(b["package"]["name"], b["session"]) for b in builds] == [("lib", "s2"), ("app", "s1"), ("lib", "s1")]
+
+    oldest = builds[-1]
+    assert oldest["dependencies"] == {"zlib": "1.2.0"}
+    assert oldest["compilation_steps"][0]["command"] == ["gcc", "-c", "lib.c"]
+    assert oldest["compilation_steps"][0]["cache_hit"]
+    assert oldest["timing"]["duration"] == 1.0
+    assert history.get(oldest["id"]) == oldest
+
+    assert len(history.builds(package="lib")) == 2
+    assert [b["session"] for b in history.builds(package="lib", since=now - 60)] == ["s2"]
+    assert [b["package"]["name"] for b in history.builds(until=now - 60)] == ["lib"]
+    assert len(history.builds(session="s1")) == 2
+    assert history.builds(limit=1, steps=False)[0]["compilation_steps"] == []
+    assert history.latest_session("app") == "s2"
+    assert history.packages() == [("app", ["1.0.0"]), ("lib", ["1.0.0"])]
+
+
+def test_migrates_json_build_files(tmp_path):
+    """Test that per-build JSON files are imported once and archived."""
+    build_data = tmp_path / "build_data"
+    build_data.mkdir()
+    (build_data / "build_lib_1700000000.json").write_text(json.dumps(_build("lib", 1700000000.0)))
+    (build_data / "build_broken_1700000001.json").write_text("{")
+
+    collector = BuildDataCollector(build_data)
+    builds = collector.history.builds()
+    assert [b["package"]["name"] for b in builds] == ["lib"]
+    assert (build_data / "migrated" / "build_lib_1700000000.json").exists()
+    assert not (build_data / "build_lib_1700000000.json").exists()
+    # Unreadable files stay where they are
+    assert (build_data / "build_broken_1700000001.json").exists()
+
+    # Opening the history again imports nothing twice
+    assert BuildHistory(build_data / "history.db").migrate(build_data) == 0
+    assert len(BuildDataCollector(build_data).history.builds()) == 1
+
+
+def test_pages_and_generation(tmp_path):
+    """Test keyset pagination, status filtering and change detection."""
+    history = BuildHistory(tmp_path / "history.db")
+    assert history.generation() == 0
+    now = time.time()
+    for i in range(5):
+        data = _build(f"pkg{i}", now + i)
+        data["success"] = i != 2
+        history.add(data)
+    generation = history.generation()
+
+    pages = []
+    before = None
+    while True:
+        page = history.builds(before=before, limit=2, steps=False)
+        pages.append([b["package"]["name"] for b in page])
+        if len(page) < 2:
+            break
+        before = page[-1]["id"]
+    assert pages == [["pkg4", "pkg3"], ["pkg2", "pkg1"], ["pkg0"]]
+
+    assert [b["package"]["name"] for b in history.builds(success=False)] == ["pkg2"]
+    assert len(history.builds(success=True, before=history.builds(limit=1)[0]["id"])) == 3
+
+    history.add(_build("late", now - 10))
+    assert history.generation() != generation
+
+
+def test_full_page_fits_old_sqlite_variable_limit(tmp_path):
+    """Test that a 1000-build page loads under SQLite's pre-3.32 limit of 999 parameters."""
+    history = BuildHistory(tmp_path / "history.db")
+    history._db.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    now = time.time()
+    for i in range(1000):
+        history.add(_build(f"pkg{i}", now + i, dependencies={"zlib": "1.2.0"}))
+
+    builds = history.builds(limit=1000)
+
+    assert len(builds) == 1000
+    assert all(b["dependencies"] == {"zlib": "1.2.0"} for b in builds)
+    assert all(len(b["compilation_steps"]) == 1 for b in builds)
@@ -0,0 +1,63 @@
+"""Tests for skipping up-to-date link steps."""
+from pathlib import Path
+
+from clydepm.build.builder import Builder
+from clydepm.build.hooks import BuildStage
+from clydepm.core.package import Package
+
+
+def _build(package: Package, cache_dir: Path):
+    """Build with a fresh builder, returning the result and the names of linked outputs."""
+    builder = Builder(cache_dir=cache_dir)
+    linked = []
+    builder.add_hook(BuildStage.PRE_LINK, lambda context: linked.append(context.output_file.name))
+    result = builder.build(package)
+    assert result.success, result.error
+    return result, linked
+
+
+def test_unchanged_library_is_not_rearchived(tmp_path, make_package):
+    """Test that a no-op rebuild skips ar and reports up to date."""
+    root = make_package(tmp_path / "lib", "lib", sources={"lib.c": "int f(void) { return 1; }\n"})
+    package = Package(root)
+
+    result, linked = _build(package, tmp_path / "cache")
+    assert not result.up_to_date and linked == ["liblib.a"]
+
+    result, linked = _build(package, tmp_path / "cache")
+    assert result.up_to_date and linked == []
+
+    (root / "src" / "lib.c").write_text("int f(void) { return 2; }\n")
+    result, linked = _build(package, tmp_path / "cache")
+    assert not result.up_to_date and linked == ["liblib.a"]
+
+
+def test_modified_output_is_relinked(tmp_path, make_package):
+    """Test that a tampered output is not trusted."""
+    root = make_package(tmp_path / "lib", "lib", sources={"lib.c": "int f(void) { return 1; }\n"})
+    package = Package(root)
+    _build(package, tmp_path / "cache")
+
+    (package.get_build_dir() / "liblib.a").write_bytes(b"garbage")
+
+    result, linked = _build(package, tmp_path / "cache")
+    assert not result.up_to_date and linked == ["liblib.a"]
+
+
+def test_application_relinks_when_dependency_archive_changes(tmp_path, make_package):
+    """Test that an application relinks when only a dependency changed."""
+    lib_dir = make_package(tmp_path / "liba", "liba", sources={"liba.c": "int a(void) { return 0; }\n"})
+    app_dir = make_package(
+        tmp_path / "app", "app", "application",
+        sources={"app.c": "int a(void);\nint main(void) { return a(); }\n"},
+        requires={"liba": "local:../liba"},
+    )
+    package = Package(app_dir)
+    _build(package, tmp_path / "cache")
+
+    result, linked = _build(package, tmp_path / "cache")
+    assert result.up_to_date and linked == []
+
+    (lib_dir / "src" / "liba.c").write_text("int a(void) { return 1; }\n")
+    result, linked = _build(package, tmp_path / "cache")
+    assert not result.up_to_date and sorted(linked) == ["app", "libliba.a"]
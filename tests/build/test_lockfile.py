@@ -0,0 +1,187 @@
+"""Tests for locked dependency installs."""
+import json
+import shutil
+from pathlib import Path
+
+from clydepm.build.builder import Builder
+from clydepm.core.lockfile import LOCKFILE_NAME, Lockfile, satisfies, tree_digest
+from clydepm.core.package import Package
+from clydepm.core.version.version import Version
+
+
+class FakeRegistry:
+    """Serves zlib sources from a directory per version."""
+
+    def __init__(self, root: Path, versions):
+        self.root = root
+        self.versions = versions
+        self.lookups = 0
+        for version in versions:
+            path = root / version
+            (path / "src").mkdir(parents=True)
+            (path / "package.yml").write_text(
+                f"name: zlib\nversion: {version}\nlanguage: c\nsources:\n  - src/\n"
+            )
+            (path / "src" / "zlib.c").write_text(f"const char *zlib_version = \"{version}\";\n")
+
+    def get_versions(self, name):
+        self.lookups += 1
+        return [Version.parse(v) for v in self.versions]
+
+    def find_tarball(self, name, version):
+        self.lookups += 1
+        return version, f"https://example.com/{name}/{version}.tar.gz"
+
+    def download(self, name, version, tarball_url):
+        return Package(self.root / version)
+
+
+def _builder(tmp_path, registry, frozen=False) -> Builder:
+    builder = Builder(cache_dir=tmp_path / "cache", frozen=frozen)
+    builder._get_registry = lambda registries, org: registry
+    return builder
+
+
+def _install(builder: Builder, app: Package):
+    builder.lockfile = Lockfile.load(app.path)
+    error = builder._ensure_dependencies(app, None)
+    builder.lockfile.save()
+    return error
+
+
+def test_lock_and_frozen_install(tmp_path):
+    """Test that resolved versions are locked and frozen installs use only the lock."""
+    registry = FakeRegistry(tmp_path / "sources", ["1.0.0", "1.2.0", "2.0.0"])
+    app_dir = tmp_path / "app"
+    app_dir.mkdir()
+    (app_dir / "package.yml").write_text(
+        "name: app\nversion: 1.0.0\ntype: application\nlanguage: c\nsources:\n  - src/\n"
+        "requires:\n  zlib: ^1.0.0\n"
+    )
+    app = Package(app_dir)
+
+    assert _install(_builder(tmp_path, registry), app) is None
+    assert Package(app_dir / "deps" / "zlib").version == "1.2.0"
+    locked = json.loads((app_dir / LOCKFILE_NAME).read_text())["packages"]["zlib"]
+    assert locked["version"] == "1.2.0"
+    assert locked["source"] == "https://example.com/zlib/1.2.0.tar.gz"
+    assert locked["digest"] == tree_digest(tmp_path / "sources" / "1.2.0")
+
+    # A frozen install needs no version discovery at all
+    registry.lookups = 0
+    registry.versions.append("1.3.0")
+    shutil.rmtree(app_dir / "deps")
+    assert _install(_builder(tmp_path, registry, frozen=True), app) is None
+    assert Package(app_dir / "deps" / "zlib").version == "1.2.0"
+    assert registry.lookups == 0
+
+    # Sources that changed since locking are rejected
+    shutil.rmtree(app_dir / "deps")
+    (tmp_path / "sources" / "1.2.0" / "src" / "zlib.c").write_text("/* tampered */\n")
+    error = _install(_builder(tmp_path, registry, frozen=True), app)
+    assert "does not match the digest" in error
+    assert not (app_dir / "deps" / "zlib").exists()
+
+
+def test_frozen_requires_lock(tmp_path):
+    """Test that a frozen install fails for dependencies missing from the lock."""
+    registry = FakeRegistry(tmp_path / "sources", ["1.0.0"])
+    app_dir = tmp_path / "app"
+    app_dir.mkdir()
+    (app_dir / "package.yml").write_text(
+        "name: app\nversion: 1.0.0\ntype: application\nlanguage: c\nsources:\n  - src/\n"
+        "requires:\n  zlib: =1.0.0\n"
+    )
+    error = _install(_builder(tmp_path, registry, frozen=True), Package(app_dir))
+    assert "not locked" in error
+    assert not (app_dir / LOCKFILE_NAME).exists()
+
+    assert satisfies("1.4.2", "^1.0.0")
+    assert not satisfies("2.0.0", "^1.0.0")
+    assert not satisfies("1.0.1", "=1.0.0")
+
+
+def test_versions_agree_across_the_graph(tmp_path):
+    """Test that requirements from local packages are solved together."""
+    registry = FakeRegistry(tmp_path / "sources", ["1.0.0", "1.2.0", "2.0.0"])
+    lib_dir = tmp_path / "lib"
+    lib_dir.mkdir()
+    (lib_dir / "package.yml").write_text(
+        "name: lib\nversion: 1.0.0\nlanguage: c\nsources:\n  - src/\nrequires:\n  zlib: =1.0.0\n"
+    )
+    app_dir = tmp_path / "app"
+    app_dir.mkdir()
+    (app_dir / "package.yml").write_text(
+        "name: app\nversion: 1.0.0\ntype: application\nlanguage: c\nsources:\n  - src/\n"
+        "requires:\n  lib: local:../lib\n  zlib: ^1.0.0\n"
+    )
+
+    builder = _builder(tmp_path, registry)
+    assert _install(builder, Package(app_dir)) is None
+    # Not the newest 1.x: lib needs exactly 1.0.0
+    assert Package(app_dir / "deps" / "zlib").version == "1.0.0"
+    assert builder._ensure_dependencies(Package(lib_dir), None) is None
+    assert Package(lib_dir / "deps" / "zlib").version == "1.0.0"
+
+    (app_dir / "package.yml").write_text(
+        (app_dir / "package.yml").read_text().replace("^1.0.0", "^2.0.0")
+    )
+    error = _install(_builder(tmp_path, registry), Package(app_dir))
+    assert "lib 1.0.0 depends on zlib =1.0.0" in error
+    assert "app depends on zlib ^2.0.0" in error
+
+
+class OrgRegistry:
+    """Serves packages of one organization, counting downloads."""
+
+    def __init__(self, root: Path, packages):
+        self.root = root
+        self.packages = packages  # {name: {version: {dependency: spec}}}
+        self.downloads = []
+
+    def get_versions(self, name):
+        return [Version.parse(v) for v in self.packages[name]]
+
+    def find_tarball(self, name, version):
+        return version, f"https://example.com/{name}/{version}.tar.gz"
+
+    def download(self, name, version, tarball_url):
+        self.downloads.append((name, version))
+        path = self.root / name / version
+        (path / "src").mkdir(parents=True, exist_ok=True)
+        requires = "".join(f"  {dep}: {spec}\n" for dep, spec in self.packages[name][version].items())
+        (path / "package.yml").write_text(
+            f"name: {name}\nversion: {version}\nlanguage: c\nsources:\n  - src/\n"
+            + (f"requires:\n{requires}" if requires else "")
+        )
+        return Package(path)
+
+
+def test_dependencies_of_remote_packages_use_their_organization(tmp_path):
+    """Test that plain names are looked up where the package declaring them lives."""
+    registries = {
+        "acme": OrgRegistry(tmp_path / "acme", {"tls": {"1.0.0": {}}}),
+        "other": OrgRegistry(tmp_path / "other", {
+            "net": {"1.0.0": {"tls": "^1.0.0"}},
+            "tls": {"1.0.0": {}, "1.1.0": {}},
+        }),
+    }
+    app_dir = tmp_path / "app"
+    app_dir.mkdir()
+    (app_dir / "package.yml").write_text(
+        "name: \"@acme/app\"\nversion: 1.0.0\ntype: application\nlanguage: c\nsources:\n  - src/\n"
+        "requires:\n  \"@other/net\": ^1.0.0\n"
+    )
+    builder = Builder(cache_dir=tmp_path / "cache")
+    builder._get_registry = lambda cache, org: registries[org]
+
+    assert _install(builder, Package(app_dir)) is None
+    assert str(builder._solution["tls"]) == "1.1.0"
+    # Read while solving, then installed without downloading again
+    assert registries["other"].downloads == [("net", "1.0.0"), ("tls", "1.1.0")]
+
+    net = Package(app_dir / "deps" / "@other/net")
+    assert builder._ensure_dependencies(net, None) is None
+    assert Package(net.path / "deps" / "tls").version == "1.1.0"
+    assert registries["other"].downloads == [("net", "1.0.0"), ("tls", "1.1.0")]
+    assert registries["acme"].downloads == []
@@ -0,0 +1,93 @@
+"""Tests for materializing cached files."""
+import os
+from pathlib import Path
+
+from clydepm.build.builder import Builder
+from clydepm.build.cache import BuildCache, CacheSettings
+from clydepm.build.filestate import hash_file
+from clydepm.build.materialize import MaterializeStrategy, materialize
+from clydepm.core.package import Package
+
+
+def test_copy_makes_independent_file(tmp_path):
+    """Test that copies don't share an inode."""
+    src = tmp_path / "src.o"
+    src.write_bytes(b"object")
+
+    used = materialize(src, tmp_path / "out" / "dest.o", MaterializeStrategy.COPY)
+
+    assert used == MaterializeStrategy.COPY
+    assert (tmp_path / "out" / "dest.o").read_bytes() == b"object"
+    assert os.stat(src).st_ino != os.stat(tmp_path / "out" / "dest.o").st_ino
+
+
+def test_hardlink_is_read_only_and_replaced_not_overwritten(tmp_path):
+    """Test that a hard linked entry is protected and replacing dest leaves it alone."""
+    src = tmp_path / "entry.o"
+    src.write_bytes(b"cached")
+    dest = tmp_path / "dest.o"
+
+    assert materialize(src, dest, MaterializeStrategy.HARDLINK) == MaterializeStrategy.HARDLINK
+    assert os.stat(src).st_ino == os.stat(dest).st_ino
+    assert not os.stat(src).st_mode & 0o222
+
+    other = tmp_path / "other.o"
+    other.write_bytes(b"fresh")
+    materialize(other, dest, MaterializeStrategy.COPY)
+
+    assert dest.read_bytes() == b"fresh"
+    assert src.read_bytes() == b"cached"
+
+
+def test_auto_falls_back_to_a_working_strategy(tmp_path):
+    """Test that auto always produces a file, whatever the filesystem supports."""
+    src = tmp_path / "src.o"
+    src.write_bytes(b"object")
+
+    used = materialize(src, tmp_path / "dest.o")
+
+    assert used in (MaterializeStrategy.REFLINK, MaterializeStrategy.HARDLINK, MaterializeStrategy.COPY)
+    assert (tmp_path / "dest.o").read_bytes() == b"object"
+
+
+def test_settings_round_trip(tmp_path):
+    """Test that cache settings persist in the cache directory."""
+    CacheSettings(materialize="hardlink").save(tmp_path)
+    assert BuildCache(tmp_path).settings.materialize == "hardlink"
+
+
+def test_rebuild_with_hardlinks_keeps_cache_entries_intact(tmp_path, make_package):
+    """Test that recompiling an object restored by hard link doesn't corrupt the cache."""
+    root = make_package(tmp_path / "lib", sources={"lib.c": "int f(void) { return 1; }\n"})
+    package = Package(root)
+    cache_dir = tmp_path / "cache"
+    CacheSettings(materialize="hardlink").save(cache_dir)
+
+    assert Builder(cache_dir=cache_dir).build(package).success
+    assert Builder(cache_dir=cache_dir).build(package).success
+    entries = {entry: hash_file(entry) for entry in (cache_dir / "objects").glob("*.o")}
+    assert len(entries) == 1
+
+    (root / "src" / "lib.c").write_text("int f(void) { return 2; }\n")
+    assert Builder(cache_dir=cache_dir).build(package).success
+
+    assert all(hash_file(entry) == digest for entry, digest in entries.items())
+    assert len(list((cache_dir / "objects").glob("*.o"))) == 2
+
+
+def test_artifact_round_trip(tmp_path, make_package):
+    """Test that cached artifacts are restored from their directory entry."""
+    root = make_package(tmp_path / "lib", sources={"lib.c": "int f(void) { return 1; }\n"})
+    package = Package(root)
+    builder = Builder(cache_dir=tmp_path / "cache")
+    assert builder.build(package).success
+    output = package.get_output_path()
+    metadata = package.create_build_metadata(builder._get_compiler_info())
+
+    builder.cache.cache_artifact(package, metadata)
+    original = output.read_bytes()
+    output.unlink()
+
+    assert builder.cache.get_cached_artifact(package, metadata)
+    assert output.read_bytes() == original
+    assert builder.cache.get_artifact_path(package, metadata).is_dir()
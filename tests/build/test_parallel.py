@@ -0,0 +1,129 @@
+"""Tests for parallel compilation in the builder."""
+import threading
+
+import pytest
+
+from clydepm.build.builder import Builder
+from clydepm.build.hooks import BuildStage
+from clydepm.build.jobs import resolve_jobs
+from clydepm.build.scheduler import PackageScheduler
+from clydepm.core.package import Package
+
+
+def _sources(count: int, broken: tuple = ()) -> dict:
+    """Source files for a C library with `count` files, some of them broken."""
+    return {
+        f"f{i:02d}.c": ("this is not C" if i in broken else f"int f{i}(void) {{ return {i}; }}") + "\n"
+        for i in range(count)
+    }
+
+
+def test_resolve_jobs():
+    """Test job count parsing."""
+    assert resolve_jobs(None) == 1
+    assert resolve_jobs(4) == 4
+    assert resolve_jobs("3") == 3
+    assert resolve_jobs("auto") >= 1
+    with pytest.raises(ValueError):
+        resolve_jobs(0)
+    with pytest.raises(ValueError):
+        resolve_jobs("many")
+
+
+def test_parallel_build_compiles_every_file(tmp_path, make_package):
+    """Test that a parallel build compiles and archives every source."""
+    package = Package(make_package(tmp_path / "many", "many", sources=_sources(8)))
+    builder = Builder(cache_dir=tmp_path / "cache", jobs=4)
+
+    workers = set()
+    lock = threading.Lock()
+
+    def record_worker(context):
+        with lock:
+            workers.add(threading.current_thread().name)
+
+    builder.add_hook(BuildStage.POST_COMPILE, record_worker)
+    result = builder.build(package)
+
+    assert result.success, result.error
+    assert result.artifacts["output"].exists()
+    assert all((package.get_build_dir() / f"f{i:02d}.o").exists() for i in range(8))
+    assert workers and all(name.startswith("clyde-compile") for name in workers)
+
+
+def test_parallel_build_reports_first_failure_in_source_order(tmp_path, make_package):
+    """Test that the reported error does not depend on completion order."""
+    package = Package(make_package(tmp_path / "many", "many", sources=_sources(8, broken=(2, 6))))
+    builder = Builder(cache_dir=tmp_path / "cache", jobs=8)
+
+    result = builder.build(package)
+
+    assert not result.success
+    assert "f02.c" in result.error
+    assert "f06.c" not in result.error.splitlines()[0]
+
+
+def test_collector_records_concurrent_steps(tmp_path, make_package):
+    """Test that concurrent compile steps are all recorded by the collector."""
+    package = Package(make_package(tmp_path / "many", "many", sources=_sources(6)))
+    builder = Builder(cache_dir=tmp_path / "cache", jobs=3)
+
+    steps = []
+    builder.add_hook(
+        BuildStage.PRE_LINK,
+        lambda context: steps.extend(builder.collector.current_build.compilation_steps)
+    )
+    result = builder.build(package)
+
+    assert result.success, result.error
+    assert len(steps) == 6
+    assert all(step.success and step.end_time >= step.start_time for step in steps)
+    assert builder.collector.current_step is None
+
+
+def test_scheduler_runs_independent_packages_concurrently():
+    """Test that packages with no dependency between them build side by side."""
+    barrier = threading.Barrier(2, timeout=5)
+    finished = []
+
+    def build(name):
+        if name in ("a", "b"):
+            barrier.wait()  # Deadlocks (and times out) unless a and b overlap
+        finished.append(name)
+        return None
+
+    graph = {"a": set(), "b": set(), "app": {"a", "b"}}
+    assert PackageScheduler(max_parallel=2).run(graph, build) is None
+    assert finished[-1] == "app"
+
+
+def test_scheduler_stops_dependents_after_failure():
+    """Test that a failed package prevents its dependents from building."""
+    built = []
+
+    def build(name):
+        built.append(name)
+        return "boom" if name == "b" else None
+
+    graph = {"a": set(), "b": set(), "app": {"a", "b"}}
+    assert PackageScheduler(max_parallel=2).run(graph, build) == "boom"
+    assert "app" not in built
+
+
+def test_build_graph_with_independent_libraries(tmp_path, make_package):
+    """Test building an application whose two libraries share nothing."""
+    make_package(tmp_path / "liba", "liba", sources={"liba.c": "int a(void) { return 1; }\n"})
+    make_package(tmp_path / "libb", "libb", sources={"libb.c": "int b(void) { return 2; }\n"})
+    app_dir = make_package(
+        tmp_path / "app", "app", "application",
+        sources={"app.c": "int a(void);\nint b(void);\nint main(void) { return a() + b() == 3 ? 0 : 1; }\n"},
+        requires={"liba": "local:../liba", "libb": "local:../libb"},
+    )
+    builder = Builder(cache_dir=tmp_path / "cache", jobs=2, max_parallel_packages=2)
+
+    result = builder.build(Package(app_dir))
+
+    assert result.success, result.error
+    assert (app_dir / "build" / "deps" / "liba" / "libliba.a").exists()
+    assert (app_dir / "build" / "deps" / "libb" / "liblibb.a").exists()
+    assert result.artifacts["output"].exists()
@@ -0,0 +1,71 @@
+"""Tests for precompiled header support."""
+import shutil
+from pathlib import Path
+
+from clydepm.build.builder import Builder
+from clydepm.build.hooks import BuildStage
+from clydepm.core.package import Package
+
+
+def _make_package(make_package, root: Path) -> Path:
+    return make_package(
+        root, "app", "application", language="cpp", config="pch: include/common.h\n",
+        sources={
+            "main.cpp": (
+                "int helper();\nint main() { std::vector<int> v{VALUE}; return v[0] + helper() - 3; }\n"
+            ),
+            "helper.cpp": "int helper() { return VALUE + 1; }\n",
+        },
+        files={
+            "include/common.h": '#include "values.h"\n#include <vector>\n',
+            "include/values.h": "#define VALUE 1\n",
+        },
+    )
+
+
+def _track_compiles(builder: Builder) -> list:
+    compiled = []
+    builder.add_hook(
+        BuildStage.POST_COMPILE,
+        lambda context: compiled.append((context.source_file.name, context.cache_hit))
+    )
+    return compiled
+
+
+def test_pch_is_precompiled_and_force_included(tmp_path, make_package):
+    """Test that sources compile against the pch without including it themselves."""
+    root = _make_package(make_package, tmp_path / "app")
+    builder = Builder(cache_dir=tmp_path / "cache")
+    package = Package(root)
+
+    result = builder.build(package)
+
+    assert result.success, result.error
+    assert (root / ".build" / "pch" / "common.h.gch").exists()
+    cmd = builder._compile_command(
+        root / "src" / "main.cpp", Path("main.o"), package,
+        builder._create_build_metadata(package), root / ".build"
+    )
+    assert cmd[cmd.index("-include") + 1] == "pch/common.h"
+
+
+def test_pch_is_cached_and_invalidated_by_its_headers(tmp_path, make_package):
+    """Test that a clean build reuses the cached pch, and header edits rebuild it."""
+    root = _make_package(make_package, tmp_path / "app")
+    assert Builder(cache_dir=tmp_path / "cache").build(Package(root)).success
+
+    # From a clean build directory, everything comes from the cache
+    shutil.rmtree(root / ".build")
+    builder = Builder(cache_dir=tmp_path / "cache")
+    compiled = _track_compiles(builder)
+    assert builder.build(Package(root)).success
+    assert sorted(compiled) == [("helper.cpp", True), ("main.cpp", True)]
+
+    # A header included by the pch changes both the pch and every source
+    (root / "include" / "values.h").write_text("#define VALUE 2\n")
+    (root / "src" / "main.cpp").write_text(
+        "int helper();\nint main() { std::vector<int> v{VALUE}; return v[0] + helper() - 5; }\n"
+    )
+    compiled.clear()
+    assert builder.build(Package(root)).success
+    assert sorted(compiled) == [("helper.cpp", False), ("main.cpp", False)]
@@ -0,0 +1,84 @@
+"""Tests for profiling builds."""
+from pathlib import Path
+
+import pytest
+
+from clydepm.build.builder import Builder
+from clydepm.build.profile import parse_time_report, parse_time_trace, summarize_profiles
+from clydepm.core.package import Package
+
+GCC_REPORT = """\
+Time variable                                   usr           sys          wall           GGC
+ phase setup                        :   0.00 (  0%)   0.00 (  0%)   0.01 ( 10%)  1326k ( 64%)
+ phase parsing                      :   0.01 ( 50%)   0.01 (100%)   0.05 ( 50%)   680k ( 33%)
+ phase lang. deferred               :   0.00 (  0%)   0.00 (  0%)   0.01 ( 10%)    10k (  1%)
+ phase opt and generate             :   0.00 (  0%)   0.00 (  0%)   0.03 ( 30%)    58k (  3%)
+ parser (global)                    :   0.01 ( 50%)   0.00 (  0%)   0.04 ( 40%)   456k ( 22%)
+ TOTAL                              :   0.02          0.01          0.10         2066k
+"""
+
+
+def test_parse_gcc_time_report():
+    """Test that GCC phases are split into frontend and backend time."""
+    profile = parse_time_report("main.c", GCC_REPORT)
+    assert profile.compiler == "gcc"
+    assert profile.frontend == pytest.approx(0.07)
+    assert profile.backend == pytest.approx(0.03)
+    assert profile.total == pytest.approx(0.10)
+    assert profile.headers == {}
+
+
+def test_parse_clang_time_trace_and_summarize(tmp_path):
+    """Test header and template times from Clang traces, aggregated across TUs."""
+    def trace(header_us, template_us):
+        return {"traceEvents": [
+            {"ph": "X", "name": "Source", "dur": header_us, "args": {"detail": "../include/big.h"}},
+            {"ph": "X", "name": "Source", "dur": 100, "args": {"detail": "/usr/include/stdio.h"}},
+            {"ph": "X", "name": "InstantiateClass", "dur": template_us, "args": {"detail": "std::vector<int>"}},
+            {"ph": "X", "name": "Total Frontend", "dur": 3000},
+            {"ph": "X", "name": "Total Backend", "dur": 1000},
+            {"ph": "X", "name": "Total ExecuteCompiler", "dur": 4200},
+            {"ph": "M", "name": "thread_name", "args": {"name": "clang"}},
+        ]}
+
+    build_dir = tmp_path / "build"
+    a = parse_time_trace("a.cpp", trace(2000, 500), build_dir)
+    b = parse_time_trace("b.cpp", trace(1000, 0), build_dir)
+    b.frontend = 5.0
+
+    big = str(tmp_path / "include" / "big.h")
+    assert a.headers == {big: pytest.approx(0.002), "/usr/include/stdio.h": pytest.approx(0.0001)}
+    assert (a.frontend, a.backend, a.total) == pytest.approx((0.003, 0.001, 0.0042))
+
+    summary = summarize_profiles("s1", [a, b], top=1)
+    assert summary.headers == [(big, pytest.approx(0.003), 2)]
+    assert summary.templates == [("std::vector<int>", pytest.approx(0.0005), 2)]
+    assert [p.source for p in summary.frontend] == ["b.cpp"]
+    assert summary.compilers == ["clang"]
+
+
+def test_profiling_build_saves_reports(tmp_path, make_package):
+    """Test that profiling recompiles cached objects and saves a profile per TU."""
+    make_package(tmp_path / "lib", sources={"lib.c": "int f(void) { return 0; }\n"})
+    app = make_package(
+        tmp_path / "app", "app", "application",
+        sources={"main.c": "#include <stdio.h>\nint f(void);\nint main(void) { return f(); }\n"},
+        requires={"lib": "local:../lib"},
+    )
+
+    # Warm the object cache without profiling
+    assert Builder(cache_dir=tmp_path / "cache").build(Package(app)).success
+    builder = Builder(cache_dir=tmp_path / "cache", profile=True)
+    assert builder.collector.profile_summary() is None
+    assert builder.build(Package(app)).success
+
+    summary = builder.collector.profile_summary(package="app")
+    assert summary.translation_units == 2
+    assert {(p.package, Path(p.source).name) for p in summary.frontend} == {("app", "main.c"), ("lib", "lib.c")}
+    assert all(p.report for p in summary.frontend)
+    assert summary.compilers in (["gcc"], ["clang"])
+
+    session_dir = builder.collector.profiles_dir / summary.session
+    reports = [p.name for p in session_dir.glob("*/*") if not p.name.endswith(".profile.json")]
+    assert sorted(reports) in (["lib.time-report", "main.time-report"], ["lib.trace.json", "main.trace.json"])
+    assert builder.collector.profile_summary(package="lib") is None
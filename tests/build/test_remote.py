@@ -0,0 +1,110 @@
+"""Tests for the shared HTTP build cache."""
+import threading
+import urllib.error
+
+import pytest
+
+from clydepm.build.builder import Builder
+from clydepm.build.cache import BuildCache, CacheSettings
+from clydepm.build.hooks import BuildStage
+from clydepm.build.remote import HttpBackend, make_cache_server
+from clydepm.core.package import Package
+
+
+@pytest.fixture
+def server_url(tmp_path):
+    """A cache server on a free port."""
+    server = make_cache_server(tmp_path / "server", port=0)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=10)
+
+
+def test_http_backend_round_trip(server_url, tmp_path):
+    """Test put, get and batched existence checks."""
+    backend = HttpBackend(server_url)
+    blob = tmp_path / "blob"
+    blob.write_bytes(b"\x7fELF object")
+
+    assert backend.contains(["abc.o", "def.o"]) == set()
+    backend.put("abc.o", blob)
+    assert backend.contains(["abc.o", "def.o"]) == {"abc.o"}
+
+    assert backend.get("abc.o", tmp_path / "out")
+    assert (tmp_path / "out").read_bytes() == b"\x7fELF object"
+    assert not backend.get("def.o", tmp_path / "missing")
+    assert not (tmp_path / "missing").exists()
+
+    with pytest.raises(ValueError):
+        backend.get("../escape", tmp_path / "out")
+
+
+def test_server_token(tmp_path):
+    """Test that a server started with a token rejects clients without it."""
+    server = make_cache_server(tmp_path / "server", port=0, token="s3cret")
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    host, port = server.server_address[:2]
+    url = f"http://{host}:{port}"
+    blob = tmp_path / "blob"
+    blob.write_bytes(b"poisoned")
+    try:
+        for backend in (HttpBackend(url), HttpBackend(url, token="wrong")):
+            with pytest.raises((urllib.error.HTTPError, ConnectionError)):
+                backend.put("abc.o", blob)
+            with pytest.raises(urllib.error.HTTPError):
+                backend.contains(["abc.o"])
+        assert not (tmp_path / "server" / "abc.o").exists()
+
+        backend = HttpBackend(url, token="s3cret")
+        backend.put("abc.o", blob)
+        assert backend.contains(["abc.o"]) == {"abc.o"}
+        assert backend.get("abc.o", tmp_path / "out")
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join(timeout=10)
+
+
+_SOURCES = {"a.c": '#include "a.h"\n#include "b.h"\nint a(void) { return A + B; }\n', "a.h": "#define A 1\n"}
+_INCLUDES = {"include/b.h": "#define B 2\n"}
+
+
+def test_builders_share_objects_through_server(server_url, tmp_path, make_package):
+    """Test that a fresh checkout elsewhere reuses objects another machine compiled."""
+    for name in ("cache1", "cache2"):
+        CacheSettings(remote_url=server_url).save(tmp_path / name)
+    first_root = tmp_path / "ci1" / "lib"
+    make_package(first_root, sources=_SOURCES, files=_INCLUDES)
+    assert Builder(cache_dir=tmp_path / "cache1").build(Package(first_root)).success
+
+    # Nothing local: no objects, no header lists, and a different checkout path
+    second_root = tmp_path / "runners" / "ci2" / "lib"
+    make_package(second_root, sources=_SOURCES, files=_INCLUDES)
+    second = Builder(cache_dir=tmp_path / "cache2")
+    hits = []
+    second.add_hook(BuildStage.POST_COMPILE, lambda context: hits.append(context.cache_hit))
+
+    assert second.build(Package(second_root)).success
+    assert hits == [True]
+    assert list(second.cache.objects_dir.glob("*.o"))
+
+    # A changed header is still noticed
+    (second_root / "include" / "b.h").write_text("#define B 3\n")
+    third = Builder(cache_dir=tmp_path / "cache3")
+    third.cache.remote = second.cache.remote
+    hits.clear()
+    third.add_hook(BuildStage.POST_COMPILE, lambda context: hits.append(context.cache_hit))
+    assert third.build(Package(second_root)).success
+    assert hits == [False]
+
+
+def test_unreachable_remote_is_not_fatal(tmp_path):
+    """Test that builds keep working when the cache server is down."""
+    cache = BuildCache(tmp_path / "cache", remote=HttpBackend("http://127.0.0.1:9", timeout=1))
+    assert not cache._fetch_remote(cache.objects_dir / "x.o")
+    assert cache.remote is None
@@ -0,0 +1,56 @@
+"""Tests for build trace export."""
+import json
+from pathlib import Path
+
+from clydepm.build.builder import Builder
+from clydepm.core.package import Package
+
+
+def _make_app(make_package, root: Path) -> Path:
+    make_package(root / "lib", sources={"lib.c": "int f(void) { return 0; }\n"})
+    return make_package(
+        root / "app", "app", "application",
+        sources={
+            "main.c": "int f(void);\nint main(void) { return f(); }\n",
+            "util.c": "int util(void) { return 1; }\n",
+        },
+        requires={"lib": "local:../lib"},
+    )
+
+
+def test_trace_covers_packages_phases_and_files(tmp_path, make_package):
+    """Test that a traced build exports nested spans for every phase and file."""
+    app = _make_app(make_package, tmp_path)
+    builder = Builder(cache_dir=tmp_path / "cache", jobs=2)
+    builder.collector.enable_trace()
+    assert builder.build(Package(app)).success
+
+    trace_file = tmp_path / "trace.json"
+    builder.collector.write_trace(trace_file)
+    events = json.loads(trace_file.read_text())["traceEvents"]
+
+    spans = [e for e in events if e["ph"] == "X"]
+    assert {e["cat"] for e in spans} >= {"package", "resolve", "fetch", "compile", "link", "hook"}
+    assert {e["name"] for e in spans if e["cat"] == "package"} == {"app", "lib"}
+    files = {e["name"]: e for e in spans if e["cat"] == "compile" and "source" in e["args"]}
+    assert set(files) == {"main.c", "util.c", "lib.c"}
+    assert files["lib.c"]["args"]["package"] == "lib"
+
+    # Every file span lies within its package's span
+    packages = {e["name"]: e for e in spans if e["cat"] == "package"}
+    for span in files.values():
+        package = packages[span["args"]["package"]]
+        assert package["ts"] <= span["ts"]
+        assert span["ts"] + span["dur"] <= package["ts"] + package["dur"]
+
+    # Worker threads are named
+    thread_names = {e["args"]["name"] for e in events if e["name"] == "thread_name"}
+    assert any(name.startswith("clyde-compile") for name in thread_names)
+
+
+def test_tracing_is_off_by_default(tmp_path, make_package):
+    """Test that builds record nothing unless tracing is enabled."""
+    app = _make_app(make_package, tmp_path)
+    builder = Builder(cache_dir=tmp_path / "cache")
+    assert builder.build(Package(app)).success
+    assert builder.collector.trace is None
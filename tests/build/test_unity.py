@@ -0,0 +1,56 @@
+"""Tests for unity builds."""
+from pathlib import Path
+
+from clydepm.build.builder import Builder
+from clydepm.build.hooks import BuildStage
+from clydepm.core.package import Package
+
+
+_SOURCES = {
+    **{f"{name}.c": f"int {name}(void) {{ return 1; }}\n" for name in "abe"},
+    # d.c can't share a translation unit with c.c: both define a static value()
+    **{
+        f"{name}.c": f"static int value(void) {{ return 1; }}\nint {name}(void) {{ return value(); }}\n"
+        for name in "cd"
+    },
+}
+
+
+def _track_compiles(builder: Builder) -> list:
+    compiled = []
+    builder.add_hook(
+        BuildStage.POST_COMPILE,
+        lambda context: compiled.append((Path(context.source_file).name, context.cache_hit))
+    )
+    return compiled
+
+
+def test_unity_batches_sources_and_keeps_excluded_files_separate(tmp_path, make_package):
+    """Test batching, exclusion and per-batch cache invalidation."""
+    root = make_package(
+        tmp_path / "lib", sources=_SOURCES,
+        config="unity:\n  batch_size: 2\n  exclude:\n    - src/d.c\n",
+    )
+    builder = Builder(cache_dir=tmp_path / "cache")
+    compiled = _track_compiles(builder)
+
+    result = builder.build(Package(root))
+
+    assert result.success, result.error
+    assert sorted(compiled) == [("0.c", False), ("1.c", False), ("d.c", False)]
+    assert (root / ".build" / "unity" / "0.c").read_text().count("#include") == 2
+
+    # Editing a source recompiles only its batch
+    (root / "src" / "e.c").write_text("int e(void) { return 2; }\n")
+    compiled.clear()
+    result = builder.build(Package(root))
+    assert result.success, result.error
+    assert sorted(compiled) == [("0.c", True), ("1.c", False), ("d.c", True)]
+
+
+def test_unity_failure_suggests_exclude(tmp_path, make_package):
+    """Test that a unit failing from clashing statics points at unity.exclude."""
+    root = make_package(tmp_path / "lib", sources=_SOURCES, config="unity:\n  batch_size: 4\n")
+    result = Builder(cache_dir=tmp_path / "cache").build(Package(root))
+    assert not result.success
+    assert "unity.exclude" in result.error
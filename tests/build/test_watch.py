@@ -0,0 +1,92 @@
+"""Tests for watch mode."""
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from clydepm.build.builder import Builder
+from clydepm.build.hooks import BuildStage
+from clydepm.build.watch import ChangeQueue, InotifyWatcher, _load_libc, watch_and_build
+
+
+_SOURCES = {"a.c": "int a(void) { return 1; }\n", "b.c": "int b(void) { return 2; }\n"}
+
+
+def _wait_for(predicate, timeout=10):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+@pytest.mark.skipif(_load_libc() is None, reason="inotify not available")
+def test_inotify_watcher_sees_edits_new_dirs_and_renames(tmp_path, make_package):
+    """Test inotify events for edits, files in new directories and atomic saves."""
+    root = make_package(tmp_path / "lib", sources=_SOURCES)
+    queue = ChangeQueue()
+    watcher = InotifyWatcher(queue)
+    watcher.watch([root / "src", root / "include", root / "package.yml"])
+    watcher.start()
+    try:
+        (root / "src" / "a.c").write_text("int a(void) { return 3; }\n")
+        assert (root / "src" / "a.c").absolute() in queue.wait(timeout=5)
+
+        (root / "include").mkdir()
+        time.sleep(0.3)  # Let the watcher pick up the new directory
+        (root / "include" / "lib.h").write_text("int a(void);\n")
+        _wait_for(lambda: (root / "include" / "lib.h").absolute() in queue.wait(timeout=1))
+
+        (root / "package.yml.tmp").write_text((root / "package.yml").read_text())
+        (root / "package.yml.tmp").rename(root / "package.yml")
+        assert (root / "package.yml").absolute() in queue.wait(timeout=5)
+    finally:
+        watcher.stop()
+
+
+def test_change_queue_debounces_bursts():
+    """Test that a burst of changes comes out as one batch."""
+    queue = ChangeQueue()
+
+    def burst():
+        for i in range(5):
+            queue({Path(f"/f{i}")})
+            time.sleep(0.02)
+
+    threading.Thread(target=burst).start()
+    assert queue.wait(debounce=0.2, timeout=5) == {Path(f"/f{i}") for i in range(5)}
+    assert queue.wait(timeout=0.1) == set()
+
+
+def test_watch_rebuilds_only_changed_sources(tmp_path, make_package):
+    """Test that an edit triggers a rebuild recompiling just that file."""
+    root = make_package(tmp_path / "lib", sources=_SOURCES)
+    builder = Builder(cache_dir=tmp_path / "cache")
+    compiled = []
+    builder.add_hook(
+        BuildStage.POST_COMPILE,
+        lambda context: compiled.append((context.source_file.name, context.cache_hit))
+    )
+    results = []
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=watch_and_build,
+        args=(builder, root, lambda result, changed: results.append((result, changed))),
+        kwargs={"stop": stop, "debounce": 0.1},
+    )
+    thread.start()
+    try:
+        _wait_for(lambda: len(results) == 1)
+        assert results[0][0].success
+        compiled.clear()
+
+        (root / "src" / "b.c").write_text("int b(void) { return 20; }\n")
+        _wait_for(lambda: len(results) == 2)
+
+        result, changed = results[1]
+        assert result.success and not result.up_to_date
+        assert (root / "src" / "b.c").absolute() in changed
+        assert sorted(compiled) == [("a.c", True), ("b.c", False)]
+    finally:
+        stop.set()
+        thread.join(timeout=10)
@@ -0,0 +1,55 @@
+"""Tests for package manifest loading."""
+import pytest
+from pydantic import ValidationError
+
+from clydepm.core.config import loader
+from clydepm.core.config.loader import ManifestLoader
+from clydepm.core.config.schema import UnityConfig
+
+MANIFEST = """\
+name: lib
+version: 1.2.3
+language: c
+sources:
+  - src/
+requires:
+  base: ^1.0.0
+unity:
+  batch_size: 4
+"""
+
+
+def test_cached_manifest_skips_parsing(tmp_path, monkeypatch):
+    """Test that a manifest seen before is loaded without YAML or validation."""
+    manifest = tmp_path / "package.yml"
+    manifest.write_text(MANIFEST)
+    manifest_loader = ManifestLoader(tmp_path / "cache")
+    config, validated = manifest_loader.load(manifest)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("manifest parsed again")
+    monkeypatch.setattr(loader.yaml, "load", fail)
+    monkeypatch.setattr(loader.PackageConfig, "model_validate", fail)
+
+    cached_config, cached = manifest_loader.load(manifest)
+    assert cached_config == config
+    assert cached == validated
+    assert isinstance(cached.unity, UnityConfig)
+    assert cached.unity.batch_size == 4
+    assert cached.requires == {"base": "^1.0.0"}
+
+    # A changed manifest has a different digest, so it is parsed again
+    manifest.write_text(MANIFEST.replace("1.2.3", "1.2.4"))
+    with pytest.raises(AssertionError, match="parsed again"):
+        manifest_loader.load(manifest)
+
+
+def test_invalid_manifest_is_not_cached(tmp_path):
+    """Test that validation errors are raised every time."""
+    manifest = tmp_path / "package.yml"
+    manifest.write_text(MANIFEST.replace("1.2.3", "one"))
+    manifest_loader = ManifestLoader(tmp_path / "cache")
+    for _ in range(2):
+        with pytest.raises(ValidationError):
+            manifest_loader.load(manifest)
+    assert not (tmp_path / "cache").exists()
@@ -0,0 +1,108 @@
+"""Tests for dependency version solving."""
+import time
+
+import pytest
+
+from clydepm.core.version import Version
+from clydepm.core.version.solver import DependencyProvider, SolveFailure, Solver
+
+
+class Provider(DependencyProvider):
+    """Packages from a dict of {name: {version: {dependency: spec}}}."""
+
+    def __init__(self, packages):
+        self.packages = packages
+        self.calls = []
+
+    def versions(self, package):
+        return [Version.parse(v) for v in self.packages.get(package, {})]
+
+    def dependencies(self, package, version):
+        self.calls.append((package, str(version)))
+        return self.packages[package][str(version)]
+
+
+def _solve(packages, **kwargs):
+    solution = Solver(Provider(packages), **kwargs).solve("app")
+    return {name: str(version) for name, version in solution.items()}
+
+
+def test_picks_highest_compatible_versions():
+    """Test a graph without conflicts."""
+    assert _solve({
+        "app": {"1.0.0": {"a": "^1.0.0", "b": "^1.0.0"}},
+        "a": {"1.0.0": {}, "1.4.0": {"c": "~2.1.0"}, "2.0.0": {}},
+        "b": {"1.0.0": {"c": ">=2.0.0"}},
+        "c": {"2.0.0": {}, "2.1.0": {}, "2.1.3": {}, "2.2.0": {}},
+    }) == {"app": "1.0.0", "a": "1.4.0", "b": "1.0.0", "c": "2.1.3"}
+
+
+def test_backtracks_past_conflicts():
+    """Test the conflict resolution example from the PubGrub documentation."""
+    assert _solve({
+        "app": {"1.0.0": {"foo": ">=1.0.0"}},
+        "foo": {"1.0.0": {}, "2.0.0": {"bar": "^1.0.0"}},
+        "bar": {"1.0.0": {"foo": "^1.0.0"}},
+    }) == {"app": "1.0.0", "foo": "1.0.0"}
+
+    # A dependency of the newest b that conflicts with a moves b back
+    assert _solve({
+        "app": {"1.0.0": {"a": "^1.0.0", "b": "^1.0.0"}},
+        "a": {"1.0.0": {"c": "^1.0.0"}},
+        "b": {"1.0.0": {"c": "^1.0.0"}, "1.1.0": {"c": "^2.0.0"}},
+        "c": {"1.0.0": {}, "2.0.0": {}},
+    }) == {"app": "1.0.0", "a": "1.0.0", "b": "1.0.0", "c": "1.0.0"}
+
+
+def test_prefers_locked_versions():
+    """Test that preferred versions win while they are allowed."""
+    packages = {
+        "app": {"1.0.0": {"a": "^1.0.0"}},
+        "a": {"1.0.0": {}, "1.1.0": {}, "2.0.0": {}},
+    }
+    assert _solve(packages, preferred={"a": Version.parse("1.0.0")})["a"] == "1.0.0"
+    assert _solve(packages, preferred={"a": Version.parse("2.0.0")})["a"] == "1.1.0"
+
+
+def test_explains_conflicts():
+    """Test that an unsolvable graph names the requirements that conflict."""
+    with pytest.raises(SolveFailure) as failure:
+        _solve({
+            "app": {"1.0.0": {"a": "^1.0.0", "b": "^1.0.0"}},
+            "a": {"1.0.0": {"c": "^1.0.0"}},
+            "b": {"1.0.0": {"c": "^2.0.0"}, "1.1.0": {"c": "^2.0.0"}},
+            "c": {"1.0.0": {}, "2.0.0": {}},
+        })
+    explanation = str(failure.value)
+    assert "a 1.0.0 depends on c ^1.0.0" in explanation
+    assert "depends on c ^2.0.0" in explanation
+    assert "app depends on a ^1.0.0" in explanation
+    assert explanation.splitlines()[-1].endswith("version solving for app failed.")
+
+    with pytest.raises(SolveFailure, match=r"app depends on zlib \^3.0.0, which matches no versions"):
+        _solve({
+            "app": {"1.0.0": {"zlib": "^3.0.0"}},
+            "zlib": {"1.0.0": {}},
+        })
+
+
+def test_large_graph():
+    """Test that hundreds of packages with many versions solve quickly."""
+    packages = {"app": {"1.0.0": {f"p{i}": "^1.0.0" for i in range(0, 300, 10)}}}
+    for i in range(300):
+        packages[f"p{i}"] = {
+            f"1.{minor}.0": {f"p{j}": f"^1.{min(minor, 5)}.0" for j in (i + 1, i + 2) if j < 300}
+            for minor in range(10)
+        }
+    # The newest p299 is broken, forcing a backjump deep in the graph
+    packages["p299"]["1.9.0"] = {"missing": "^1.0.0"}
+
+    provider = Provider(packages)
+    start = time.time()
+    solution = Solver(provider).solve("app")
+    assert time.time() - start < 10
+    assert len(solution) == 301
+    assert str(solution["p299"]) == "1.8.0"
+    assert str(solution["p0"]) == "1.9.0"
+    # Each version's dependencies are asked for once
+    assert len(provider.calls) == len(set(provider.calls))